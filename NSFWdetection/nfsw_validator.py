@@ -2,14 +2,46 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from PIL import Image, ImageFilter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
 import io
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
 import numpy as np
+from scipy import ndimage
 from typing import Dict, List, Tuple
 import uvicorn
 import logging
 import math
 
-app = FastAPI(title="NSFW Validator Strict")
+# Pool de procesos para la validación (CPU): el event loop solo recibe y responde
+NSFW_WORKERS = int(os.getenv('NSFW_WORKERS', str(os.cpu_count() or 1)))
+# Validaciones en espera además de las que se ejecutan; con el cupo lleno se responde 503
+NSFW_QUEUE_MAX = int(os.getenv('NSFW_QUEUE_MAX', str(NSFW_WORKERS * 2)))
+# Segundos máximos por validación (incluida la espera en cola)
+NSFW_TIMEOUT = float(os.getenv('NSFW_TIMEOUT', '15'))
+# forkserver/spawn: no heredar el estado del event loop ni sus hilos
+NSFW_MP_CONTEXT = os.getenv(
+    'NSFW_MP_CONTEXT',
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    validation_pool.start()
+    yield
+    validation_pool.shutdown()
+    result_cache.close()
+
+app = FastAPI(title="NSFW Validator Strict", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +51,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Pesos de luminancia (ITU-R 601) en float32 para no promover a float64
+GRAY_WEIGHTS = np.array([0.2989, 0.5870, 0.1140], dtype=np.float32)
+
+# Subir al cambiar reglas o puntajes: invalida los resultados cacheados
+RULES_VERSION = 2
+
 class StrictNSFWValidator:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
@@ -30,6 +68,23 @@ class StrictNSFWValidator:
         self.MIN_RESOLUTION = 200  # ancho/alto mínimo
         self.CONTRAST_THRESHOLD = 0.4
         
+        # Lado máximo de la copia usada para las estadísticas (0 = resolución completa).
+        # Son medidas globales: a 512px cambian poco y el costo baja ~50x en 12MP
+        self.ANALYSIS_MAX_SIDE = int(os.getenv('NSFW_ANALYSIS_MAX_SIDE', '512'))
+    
+    def config_fingerprint(self) -> str:
+        """Huella de reglas y umbrales; forma parte de la clave de cache"""
+        config = {
+            'rules_version': RULES_VERSION,
+            'skin': self.SKIN_THRESHOLD,
+            'aspect_max': self.ASPECT_RATIO_MAX,
+            'aspect_min': self.ASPECT_RATIO_MIN,
+            'min_resolution': self.MIN_RESOLUTION,
+            'contrast': self.CONTRAST_THRESHOLD,
+            'analysis_max_side': self.ANALYSIS_MAX_SIDE,
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+        
     def validate_image(self, image_data: bytes) -> Dict:
         """
         Valida imagen con reglas más estrictas
@@ -37,22 +92,20 @@ class StrictNSFWValidator:
         try:
             image = Image.open(io.BytesIO(image_data))
             
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
+            # Dimensiones reales antes de reducir
             width, height = image.size
             file_size = len(image_data)
             aspect_ratio = width / height
             
-            img_array = np.array(image)
+            features = self._extract_features(image)
             
-            # Múltiples análisis
-            skin_percentage = self._analyze_skin_tone(img_array)
-            contrast_score = self._calculate_contrast(img_array)
-            brightness_score = self._calculate_brightness(img_array)
-            edge_density = self._analyze_edges(img_array)
-            color_variance = self._analyze_color_variance(img_array)
-            saturation_score = self._analyze_saturation(img_array)
+            # Múltiples análisis sobre las mismas matrices
+            skin_percentage = self._analyze_skin_tone(features['rgb'], features['maxc'], features['minc'])
+            contrast_score = self._calculate_contrast(features['gray'])
+            brightness_score = self._calculate_brightness(features['gray'])
+            edge_density = self._analyze_edges(features['gray'])
+            color_variance = self._analyze_color_variance(features['hsv'])
+            saturation_score = self._analyze_saturation(features['hsv'])
             
             # Reglas de validación MÁS ESTRICTAS
             violations = []
@@ -116,6 +169,7 @@ class StrictNSFWValidator:
                 'image_analysis': {
                     'width': width,
                     'height': height,
+                    'analyzed_size': list(features['size']),
                     'file_size_kb': round(file_size / 1024, 1),
                     'skin_percentage': round(skin_percentage, 2),
                     'aspect_ratio': round(aspect_ratio, 2),
@@ -139,108 +193,398 @@ class StrictNSFWValidator:
                 'error': str(e)
             }
     
-    def _analyze_skin_tone(self, img_array: np.ndarray) -> float:
+    def _extract_features(self, image: Image.Image) -> Dict:
+        """
+        Decodifica una sola vez (reducida a ANALYSIS_MAX_SIDE si corresponde) y
+        calcula en float32 lo que comparten los análisis: RGB, gris, máx/mín por
+        píxel y HSV.
+        """
+        max_side = self.ANALYSIS_MAX_SIDE
+        if max_side and max(image.size) > max_side:
+            # JPEG: el decodificador escala por DCT (1/2, 1/4, 1/8) sin decodificar completo
+            image.draft('RGB', (max_side, max_side))
+        
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        if max_side and max(image.size) > max_side:
+            image.thumbnail((max_side, max_side), Image.Resampling.BILINEAR)
+        
+        rgb = np.asarray(image, dtype=np.float32)
+        maxc = rgb.max(axis=2)
+        minc = rgb.min(axis=2)
+        
+        return {
+            'size': image.size,
+            'rgb': rgb,
+            'maxc': maxc,
+            'minc': minc,
+            'gray': rgb @ GRAY_WEIGHTS,
+            'hsv': self._rgb_to_hsv(rgb, maxc, minc),
+        }
+    
+    def _analyze_skin_tone(self, rgb: np.ndarray, maxc: np.ndarray, minc: np.ndarray) -> float:
         """Análisis mejorado de tonos de piel"""
-        r, g, b = img_array[:,:,0], img_array[:,:,1], img_array[:,:,2]
+        # En float32 las restas no desbordan como en uint8
+        r, g, b = rgb[:,:,0], rgb[:,:,1], rgb[:,:,2]
         
         # Múltiples rangos para diferentes tonos de piel
         skin_mask1 = (
             (r > 95) & (g > 40) & (b > 20) &
             ((r - g) > 15) & (r > g) & (r > b) &
-            (np.maximum.reduce([r, g, b]) - np.minimum.reduce([r, g, b]) > 15) &
-            (abs(r - g) > 15)
+            ((maxc - minc) > 15) &
+            (np.abs(r - g) > 15)
         )
         
         # Rangos para tonos más claros
         skin_mask2 = (
             (r > 200) & (g > 180) & (b > 160) &
-            (abs(r - g) < 30) & (abs(r - b) < 30) & (abs(g - b) < 30)
+            (np.abs(r - g) < 30) & (np.abs(r - b) < 30) & (np.abs(g - b) < 30)
         )
         
         # Combinar máscaras
         skin_mask = skin_mask1 | skin_mask2
-        total_pixels = img_array.shape[0] * img_array.shape[1]
         
-        return (np.sum(skin_mask) / total_pixels) * 100
+        return float(np.count_nonzero(skin_mask) / skin_mask.size * 100)
     
-    def _calculate_contrast(self, img_array: np.ndarray) -> float:
+    def _calculate_contrast(self, gray: np.ndarray) -> float:
         """Calcula contraste usando desviación estándar"""
-        gray = np.dot(img_array[...,:3], [0.2989, 0.5870, 0.1140])
-        return np.std(gray) / 255.0
+        return float(np.std(gray) / 255.0)
     
-    def _calculate_brightness(self, img_array: np.ndarray) -> float:
+    def _calculate_brightness(self, gray: np.ndarray) -> float:
         """Calcula brillo promedio"""
-        gray = np.dot(img_array[...,:3], [0.2989, 0.5870, 0.1140])
-        return np.mean(gray) / 255.0
+        return float(np.mean(gray) / 255.0)
     
-    def _analyze_edges(self, img_array: np.ndarray) -> float:
+    def _analyze_edges(self, gray: np.ndarray) -> float:
         """Analiza densidad de bordes (detalle anatómico)"""
-        gray = np.dot(img_array[...,:3], [0.2989, 0.5870, 0.1140]).astype(np.uint8)
-        
-        # Simular detección de bordes simple
-        from scipy import ndimage
+        # Sobel en float32: en uint8 la salida desbordaba
         dx = ndimage.sobel(gray, 0)  # Derivada horizontal
         dy = ndimage.sobel(gray, 1)  # Derivada vertical
         mag = np.hypot(dx, dy)
         
-        edge_density = np.sum(mag > 50) / mag.size  # Umbral empírico
-        return edge_density
+        edge_density = np.count_nonzero(mag > 50) / mag.size  # Umbral empírico
+        return float(edge_density)
     
-    def _analyze_color_variance(self, img_array: np.ndarray) -> float:
+    def _analyze_color_variance(self, hsv: np.ndarray) -> float:
         """Analiza variación de colores"""
-        # Convertir a HSV para mejor análisis
-        hsv = self._rgb_to_hsv(img_array)
-        hue_variance = np.std(hsv[:,:,0]) / 180.0  # Normalizar
-        return hue_variance
+        hue_variance = np.std(hsv[:,:,0])  # El tono ya está en [0, 1]
+        return float(hue_variance)
     
-    def _analyze_saturation(self, img_array: np.ndarray) -> float:
+    def _analyze_saturation(self, hsv: np.ndarray) -> float:
         """Analiza saturación promedio"""
-        hsv = self._rgb_to_hsv(img_array)
-        return np.mean(hsv[:,:,1])
+        return float(np.mean(hsv[:,:,1]))
     
-    def _rgb_to_hsv(self, img_array: np.ndarray) -> np.ndarray:
-        """Convierte RGB a HSV manualmente"""
-        r, g, b = img_array[:,:,0]/255.0, img_array[:,:,1]/255.0, img_array[:,:,2]/255.0
-        
-        maxc = np.maximum.reduce([r, g, b])
-        minc = np.minimum.reduce([r, g, b])
+    def _rgb_to_hsv(self, rgb: np.ndarray, maxc: np.ndarray, minc: np.ndarray) -> np.ndarray:
+        """
+        Convierte RGB (float32, 0-255) a HSV en [0, 1]. Los píxeles grises
+        (max == min) tienen tono 0; antes daban 0/0 = NaN.
+        """
+        r, g, b = rgb[:,:,0], rgb[:,:,1], rgb[:,:,2]
         
-        v = maxc
+        v = maxc / 255.0
         
         deltac = maxc - minc
-        s = np.where(maxc != 0, deltac / maxc, 0)
+        chroma = deltac > 0
+        s = np.divide(deltac, maxc, out=np.zeros_like(maxc), where=maxc > 0)
         
-        # Hue calculation
-        rc = np.where(maxc != 0, (maxc - r) / deltac, 0)
-        gc = np.where(maxc != 0, (maxc - g) / deltac, 0)
-        bc = np.where(maxc != 0, (maxc - b) / deltac, 0)
+        # Hue calculation (divisor 1 donde no hay croma; se anula abajo)
+        divisor = np.where(chroma, deltac, np.float32(1))
+        rc = (maxc - r) / divisor
+        gc = (maxc - g) / divisor
+        bc = (maxc - b) / divisor
         
         h = np.where(maxc == r, bc - gc, 
                     np.where(maxc == g, 2.0 + rc - bc, 
                             4.0 + gc - rc))
-        h = (h / 6.0) % 1.0
+        h = np.where(chroma, (h / 6.0) % 1.0, 0).astype(np.float32)
         
         return np.stack([h, s, v], axis=2)
 
 validator = StrictNSFWValidator()
 
+def _validate_in_worker(image_data: bytes) -> Dict:
+    """Punto de entrada en el proceso hijo (cada uno tiene su propio validador)"""
+    return validator.validate_image(image_data)
+
+class PoolSaturated(Exception):
+    """No quedan cupos: todos los workers ocupados y la cola llena"""
+
+class ValidationPool:
+    """
+    ProcessPoolExecutor con cupo acotado (workers + cola). El cupo se libera
+    cuando el worker termina de verdad, no cuando vence el timeout del cliente:
+    así una imagen lenta sigue contando como carga.
+    """
+    
+    def __init__(self, workers: int, queue_max: int, timeout: float, mp_context: str):
+        self.logger = logging.getLogger(__name__)
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_max)
+        self.timeout = timeout
+        self.mp_context = mp_context
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._executor = None
+    
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.mp_context)
+                )
+                self.logger.info(f"Pool de validación: {self.workers} workers, cupo {self.capacity}")
+    
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _restart(self, broken):
+        """Reemplaza el executor si un worker murió (p. ej. por falta de memoria)"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+        self.logger.error("Pool de validación roto; se recrea")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+    
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+    
+    def stats(self) -> Dict:
+        return {'workers': self.workers, 'capacity': self.capacity, 'in_flight': self._in_flight}
+    
+    def _acquire(self, n: int):
+        """Reserva ``n`` cupos, todos o ninguno"""
+        acquired = 0
+        while acquired < n and self._slots.acquire(blocking=False):
+            acquired += 1
+        if acquired < n:
+            for _ in range(acquired):
+                self._slots.release()
+            raise PoolSaturated()
+    
+    def _submit(self, executor, fn, args):
+        """Envía con el cupo ya reservado; se libera cuando el worker termina"""
+        try:
+            future = executor.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._slots.release()
+            self._restart(executor)
+            raise BrokenProcessPool("Pool de validación no disponible")
+        
+        with self._lock:
+            self._in_flight += 1
+        future.add_done_callback(self._release)
+        return future
+    
+    async def _wait(self, executor, future):
+        try:
+            # Al vencer, wait_for cancela el futuro (si aún está en cola no llega a ejecutarse)
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise
+    
+    async def run(self, fn, *args):
+        """
+        Ejecuta ``fn(*args)`` en un worker. Lanza PoolSaturated si no hay cupo,
+        asyncio.TimeoutError si supera ``timeout`` y BrokenProcessPool si el
+        worker murió.
+        """
+        self._acquire(1)
+        self.start()
+        executor = self._executor
+        return await self._wait(executor, self._submit(executor, fn, args))
+    
+    async def run_many(self, fn, args_list: List[Tuple]) -> List:
+        """
+        Ejecuta ``fn`` para cada tupla de ``args_list`` en paralelo. Reserva
+        todos los cupos o lanza PoolSaturated; el resto de errores se devuelven
+        por elemento, en el mismo orden.
+        """
+        self._acquire(len(args_list))
+        self.start()
+        executor = self._executor
+        
+        waits = []
+        for i, args in enumerate(args_list):
+            try:
+                waits.append(self._wait(executor, self._submit(executor, fn, args)))
+            except BrokenProcessPool:
+                for _ in range(len(args_list) - i - 1):
+                    self._slots.release()
+                for pending in waits:
+                    pending.close()
+                raise
+        
+        return await asyncio.gather(*waits, return_exceptions=True)
+
+validation_pool = ValidationPool(NSFW_WORKERS, NSFW_QUEUE_MAX, NSFW_TIMEOUT, NSFW_MP_CONTEXT)
+
+class ResultCache:
+    """
+    Cache LRU con TTL de resultados de validación, por SHA-256 del contenido
+    más la huella de configuración del validador. Con ``db_path`` los
+    resultados también se guardan en SQLite y sobreviven reinicios; la
+    memoria actúa como primer nivel.
+    """
+    
+    def __init__(self, fingerprint: str, max_entries: int, ttl: float, db_path: str = None):
+        self.logger = logging.getLogger(__name__)
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+    
+    def key(self, image_data: bytes) -> str:
+        return f"{hashlib.sha256(image_data).hexdigest()}:{self.fingerprint}"
+    
+    def _connection(self):
+        """Conexión SQLite perezosa (los procesos del pool nunca la abren)"""
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, result TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            self._db.execute('DELETE FROM results WHERE created_at < ?', (time.time() - self.ttl,))
+            self._db.commit()
+        return self._db
+    
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, result = entry
+                if now - created_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.counters['hits'] += 1
+                    return result
+                del self._entries[key]
+            
+            if self.db_path:
+                try:
+                    row = self._connection().execute(
+                        'SELECT result, created_at FROM results WHERE key = ? AND created_at >= ?',
+                        (key, now - self.ttl)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Cache SQLite no disponible: {e}")
+                    row = None
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._remember(key, row[1], result)
+                    self.counters['hits'] += 1
+                    self.counters['disk_hits'] += 1
+                    return result
+            
+            self.counters['misses'] += 1
+            return None
+    
+    def put(self, key: str, result: Dict):
+        """Guarda solo resultados completos (los errores se reintentan)"""
+        if 'error' in result:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, result)
+            self.counters['stores'] += 1
+            if self.db_path:
+                try:
+                    db = self._connection()
+                    db.execute(
+                        'INSERT OR REPLACE INTO results (key, result, created_at) VALUES (?, ?, ?)',
+                        (key, json.dumps(result), now)
+                    )
+                    db.commit()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"No se pudo persistir el resultado: {e}")
+    
+    def _remember(self, key: str, created_at: float, result: Dict):
+        self._entries[key] = (created_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict:
+        lookups = self.counters['hits'] + self.counters['misses']
+        return {
+            **self.counters,
+            'entries': len(self._entries),
+            'hit_ratio': round(self.counters['hits'] / lookups, 3) if lookups else None,
+            'persistent': bool(self.db_path),
+        }
+    
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+result_cache = ResultCache(
+    validator.config_fingerprint(),
+    max_entries=int(os.getenv('NSFW_CACHE_MAX', '5000')),
+    ttl=float(os.getenv('NSFW_CACHE_TTL', str(7 * 24 * 3600))),
+    db_path=os.getenv('NSFW_CACHE_DB') or None
+)
+
+ALLOWED_TYPES = ['image/jpeg', 'image/png', 'image/jpg', 'image/webp']
+MAX_SIZE = 10 * 1024 * 1024
+# Archivos por llamada a /validate/batch (nunca más que el cupo del pool)
+NSFW_BATCH_MAX = int(os.getenv('NSFW_BATCH_MAX', '10'))
+
+async def _read_upload(file: UploadFile) -> bytes:
+    """Lee el archivo validando tipo y tamaño; lanza HTTPException 400"""
+    if file.content_type not in ALLOWED_TYPES:
+        raise HTTPException(400, "Tipo de archivo no permitido")
+    
+    contents = await file.read()
+    if len(contents) > MAX_SIZE:
+        raise HTTPException(400, "Imagen demasiado grande. Máximo 10MB")
+    return contents
+
 @app.post("/validate")
 async def validate_image(file: UploadFile = File(...)) -> Dict:
     try:
-        allowed_types = ['image/jpeg', 'image/png', 'image/jpg', 'image/webp']
-        if file.content_type not in allowed_types:
-            raise HTTPException(400, "Tipo de archivo no permitido")
+        contents = await _read_upload(file)
         
-        max_size = 10 * 1024 * 1024
-        contents = await file.read()
-        if len(contents) > max_size:
-            raise HTTPException(400, "Imagen demasiado grande. Máximo 10MB")
+        cache_key = result_cache.key(contents)
+        result = result_cache.get(cache_key)
+        if result is not None:
+            return {
+                "filename": file.filename,
+                "validation_passed": result['approved'],
+                "cached": True,
+                "result": result
+            }
         
-        result = validator.validate_image(contents)
+        try:
+            result = await validation_pool.run(_validate_in_worker, contents)
+        except PoolSaturated:
+            raise HTTPException(503, "Servicio saturado, intente nuevamente", headers={"Retry-After": "1"})
+        except asyncio.TimeoutError:
+            raise HTTPException(504, "La validación excedió el tiempo máximo")
+        except BrokenProcessPool:
+            raise HTTPException(503, "Validador reiniciándose, intente nuevamente", headers={"Retry-After": "2"})
         
+        result_cache.put(cache_key, result)
         return {
             "filename": file.filename,
             "validation_passed": result['approved'],
+            "cached": False,
             "result": result
         }
         
@@ -250,9 +594,84 @@ async def validate_image(file: UploadFile = File(...)) -> Dict:
         logging.error(f"Error validando imagen: {e}")
         raise HTTPException(500, "Error interno del servidor")
 
+@app.post("/validate/batch")
+async def validate_batch(files: List[UploadFile] = File(...)) -> Dict:
+    """
+    Valida varias imágenes en paralelo en el pool. Devuelve el resultado de
+    cada archivo (en el orden recibido) y un veredicto global: solo pasa si
+    todas pasan.
+    """
+    try:
+        max_files = min(NSFW_BATCH_MAX, validation_pool.capacity)
+        if not files:
+            raise HTTPException(400, "No se recibieron imágenes")
+        if len(files) > max_files:
+            raise HTTPException(400, f"Demasiadas imágenes. Máximo {max_files} por solicitud")
+        
+        items = []
+        # Pendientes por clave de cache: una imagen repetida en el lote se analiza una vez
+        to_validate = {}
+        for file in files:
+            item = {"filename": file.filename, "validation_passed": False}
+            items.append(item)
+            try:
+                contents = await _read_upload(file)
+            except HTTPException as e:
+                item["error"] = e.detail
+                continue
+            
+            cache_key = result_cache.key(contents)
+            cached = result_cache.get(cache_key) if cache_key not in to_validate else None
+            if cached is not None:
+                item.update(validation_passed=cached['approved'], cached=True, result=cached)
+            else:
+                to_validate.setdefault(cache_key, (contents, []))[1].append(item)
+        
+        try:
+            outcomes = await validation_pool.run_many(
+                _validate_in_worker, [(contents,) for contents, _ in to_validate.values()]
+            )
+        except PoolSaturated:
+            raise HTTPException(503, "Servicio saturado, intente nuevamente", headers={"Retry-After": "1"})
+        except BrokenProcessPool:
+            raise HTTPException(503, "Validador reiniciándose, intente nuevamente", headers={"Retry-After": "2"})
+        
+        for (cache_key, (_, pending)), outcome in zip(to_validate.items(), outcomes):
+            for item in pending:
+                if isinstance(outcome, asyncio.TimeoutError):
+                    item["error"] = "La validación excedió el tiempo máximo"
+                elif isinstance(outcome, Exception):
+                    logging.error(f"Error validando {item['filename']}: {outcome}")
+                    item["error"] = "Error procesando imagen"
+                else:
+                    item.update(validation_passed=outcome['approved'], cached=False, result=outcome)
+            if not isinstance(outcome, Exception):
+                result_cache.put(cache_key, outcome)
+        
+        approved = sum(1 for item in items if item["validation_passed"])
+        return {
+            "validation_passed": approved == len(items),
+            "total": len(items),
+            "approved": approved,
+            "rejected": len(items) - approved,
+            "max_risk_score": max((item["result"]['risk_score'] for item in items if "result" in item), default=None),
+            "results": items
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error validando lote: {e}")
+        raise HTTPException(500, "Error interno del servidor")
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "NSFW Validator Strict"}
+    return {
+        "status": "healthy",
+        "service": "NSFW Validator Strict",
+        "pool": validation_pool.stats(),
+        "cache": result_cache.stats()
+    }
 
 if __name__ == "__main__":
     print("🚀 Iniciando NSFW Validator STRICT en http://localhost:8000")
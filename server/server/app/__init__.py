@@ -155,7 +155,6 @@
 
 import os
 import logging
-import traceback
 from dotenv import load_dotenv
 
 from flask import Flask, jsonify
@@ -164,21 +163,22 @@ from flask_cors import CORS
 from flask_session import Session
 from werkzeug.exceptions import HTTPException, BadRequest
 
-from app.utils.database import db
+from app.utils.database import configurar_base_datos
+from app.utils.logger import setup_logger
 
 # Cargar variables de entorno
 load_dotenv()
 
 def create_app():
-    # Configuración básica de logging
-    logging.basicConfig(level=logging.DEBUG)
-    
     # Crear aplicación Flask
     app = Flask(__name__)
     
     # Configuración de la aplicación
     configure_app(app)
     
+    # Logging estructurado (JSON, niveles por módulo, escritura en segundo plano)
+    setup_logger(app)
+    
     # Inicializar extensiones
     initialize_extensions(app)
     
@@ -191,6 +191,9 @@ def create_app():
     # Configurar manejo de errores
     configure_error_handlers(app)
     
+    # Registrar comandos CLI
+    register_commands(app)
+    
     return app
 
 
@@ -239,8 +242,17 @@ def initialize_extensions(app):
     # Inicializar sesiones
     Session(app)
     
-    # Inicializar base de datos
-    db.init_app(app)
+    # Inicializar base de datos (pool e instrumentación desde el entorno)
+    configurar_base_datos(app)
+
+    # Migraciones del esquema (flask db ...), directorio server/server/migrations
+    from flask_migrate import Migrate
+    from app.utils.database import db
+    Migrate(app, db, directory=os.path.join(os.path.dirname(app.root_path), 'migrations'))
+
+    # Cola de salida de correo: cada worker arranca su remitente y vacía lo pendiente
+    from app.services.email.cola_correo import registrar_cola_correo
+    registrar_cola_correo(app)
 
 
 def configure_api(app):
@@ -261,7 +273,7 @@ def register_namespaces(api):
     """Registra todos los namespaces de la API"""
     
     # Importar namespaces
-    from app.controllers.auth import auth_ns, player_ns, account_ns, posts_ns, cancha_ns, reserva_ns
+    from app.controllers.auth import auth_ns, player_ns, account_ns, posts_ns, cancha_ns, reserva_ns, interno_ns
 
     # Registrar namespaces
     api.add_namespace(account_ns, path='/account')
@@ -270,7 +282,17 @@ def register_namespaces(api):
     api.add_namespace(posts_ns, path='/posts')
     api.add_namespace(cancha_ns, path='/cancha')
     api.add_namespace(reserva_ns, path='/reserva') 
+    api.add_namespace(interno_ns, path='/interno')
+    
+
+
+def register_commands(app):
+    """Registra los comandos de mantenimiento (flask <comando>)"""
+    
+    from app.commands import recalcular_contadores, explicar_consultas
     
+    app.cli.add_command(recalcular_contadores)
+    app.cli.add_command(explicar_consultas)
 
 
 def configure_error_handlers(app):
@@ -299,8 +321,7 @@ def configure_error_handlers(app):
             return jsonify({'message': error.description}), error.code
         
         # Loggear error completo para depuración
-        app.logger.error(f"Error no manejado: {str(error)}")
-        traceback.print_exc()
+        app.logger.exception("Error no manejado: %s", error)
         
         return jsonify({'message': 'Error inesperado en el servidor'}), 500
 
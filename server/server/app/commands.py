@@ -0,0 +1,33 @@
+"""
+Comandos CLI de mantenimiento
+
+Uso: flask --app run <comando>
+"""
+import click
+
+from app.services.auth.post_service import PostService
+
+
+@click.command('recalcular-contadores')
+@click.option('--lote', default=1000, show_default=True, help='Filas por transacción')
+def recalcular_contadores(lote):
+    """Recalcular total_likes / total_comentarios de posts y comentarios"""
+    resultado = PostService.recalcular_contadores(lote=lote)
+    click.echo(f"Posts actualizados: {resultado['posts']}")
+    click.echo(f"Comentarios actualizados: {resultado['comentarios']}")
+
+
+@click.command('explicar-consultas')
+def explicar_consultas():
+    """Comprobar con EXPLAIN que las consultas frecuentes usan índice"""
+    from app.utils.database import db
+    from app.utils.explicar import explicar_consultas as explicar
+
+    sin_indice = 0
+    for nombre, usa_indice, detalle in explicar(db.engine):
+        if not usa_indice:
+            sin_indice += 1
+        click.echo(f"[{'ok' if usa_indice else 'SIN INDICE'}] {nombre}: {detalle}")
+
+    if sin_indice:
+        raise click.ClickException(f"{sin_indice} consulta(s) sin índice")
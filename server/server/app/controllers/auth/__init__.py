@@ -11,6 +11,7 @@ account_ns = Namespace('account', description='Operaciones de gestión de cuenta
 posts_ns = Namespace('posts', description='Operaciones de publicaciones')
 cancha_ns = Namespace('cancha', description='Operaciones con canchas')
 reserva_ns = Namespace('reserva', description='Operaciones de reserva') 
+interno_ns = Namespace('interno', description='Endpoints internos de operación')
                     
 
 # 🎯 Modelos para Swagger
@@ -288,38 +289,6 @@ cancha_error_model = cancha_ns.model('CanchaError', {
     'codigo': fields.String(description='Código de error', example='VALIDACION_FALLIDA')
 })
 
-# Modelo para imagen en base64
-imagen_base64_model = cancha_ns.model('ImagenBase64', {
-    'id': fields.Integer,
-    'orden': fields.Integer,
-    'data': fields.String(description='Imagen en formato base64'),
-    'nombre': fields.String,
-    'tipo': fields.String(enum=['local', 'externo'])
-})
-
-# Modelo extendido para respuesta con base64
-cancha_response_base64_model = cancha_ns.model('CanchaResponseBase64', {
-    'id': fields.Integer,
-    'nombre': fields.String,
-    'tipo': fields.String,
-    'subtipo': fields.String,
-    'direccion': fields.String,
-    'latitud': fields.Float,
-    'longitud': fields.Float,
-    'direccion_completa': fields.String,
-    'superficie': fields.String,
-    'capacidad': fields.Integer,
-    'precio_hora': fields.Float,
-    'descripcion': fields.String,
-    'estado': fields.String,
-    'owner_id': fields.Integer,
-    'imagenes': fields.List(fields.String, description='URLs de imágenes'),
-    'imagenes_base64': fields.List(fields.Nested(imagen_base64_model), description='Imágenes en base64'),
-    'horarios': fields.List(fields.Nested(horario_response_model)),
-    'reglas': fields.List(fields.Nested(regla_model)),
-    'amenidades': fields.List(fields.Nested(amenidad_model))
-})
-
 # 🎯 Modelos para Swagger - Reservas (ACTUALIZADOS)
 reserva_model = reserva_ns.model('Reserva', {
     'cancha_id': fields.Integer(required=True, example=1),
@@ -519,11 +488,12 @@ from app.controllers.auth.profile_controller import (
     UserImagenPerfilResource, 
     UserBasicInfo
 )
-from app.controllers.auth.post_controller import Posts, PostDetail, PostComentarios, PostLike, ComentarioLike, MisPosts, MisLikes, obtenerpost
+from app.controllers.auth.post_controller import Posts, PostDetail, PostComentarios, ComentarioDetail, PostLike, ComentarioLike, MisPosts, MisLikes, obtenerpost
 from app.controllers.auth.account_controller import CambioContrasena, CambioCorreo
 from app.controllers.auth.cancha_controller import CanchaCreateResource, CanchaListResource, CanchaDetailResource, HorariosDisponiblesResource
 from app.controllers.auth.reserva_controller import CrearReservaController, HorariosOcupadosController, VerificarReservaUsuario, MisReservasController, CancelarReservaController
 from app.controllers.auth.check_controller import CheckSession
+from app.controllers.auth.interno_controller import PoolBaseDatosResource
 
 # 📤 Exportar lo necesario
 __all__ = [
@@ -534,6 +504,7 @@ __all__ = [
     'posts_ns',
     'cancha_ns',
     'reserva_ns',
+    'interno_ns',
     
     # Modelos de autenticación
     'register_model',
@@ -576,8 +547,6 @@ __all__ = [
     'cancha_creada_response_model',
     'cancha_error_model',
     'horario_response_model',
-    'imagen_base64_model',
-    'cancha_response_base64_model',
     
     # Modelos de reservas
     'reserva_model',
@@ -616,6 +585,7 @@ __all__ = [
     'Posts',
     'PostDetail',
     'PostComentarios', 
+    'ComentarioDetail',
     'PostLike',
     'ComentarioLike',
     'MisPosts',
@@ -637,5 +607,8 @@ __all__ = [
     'HorariosOcupadosController',
     'VerificarReservaUsuario',
     'MisReservasController',
-    'CancelarReservaController'
+    'CancelarReservaController',
+    
+    # Controladores internos
+    'PoolBaseDatosResource'
 ]
\ No newline at end of file
@@ -1,14 +1,22 @@
+import logging
 from flask import request
 from flask_restx import Resource, fields
 from app.services.auth.cancha_service import CanchaService
 import json
-from flask import request, send_file, abort, make_response, current_app, send_from_directory
+from flask import request, send_file, abort, make_response, current_app, send_from_directory, Response, stream_with_context
+from datetime import datetime
+from app.services.auth.disponibilidad_service import DisponibilidadService
+from app.services.media.imagen_pipeline import ImagenPipeline
+from app.utils.media import servir_imagen, generar_zip
+from app.services.media.almacenamiento import obtener_almacenamiento
 import os
 from urllib.parse import quote
 
 # Importar namespace y modelos
 from . import cancha_ns, cancha_model, cancha_response_model, horarios_disponibles_model, cancha_creada_response_model, cancha_error_model
 
+logger = logging.getLogger(__name__)
+
 # Ruta para CREAR cancha (POST) - ACTUALIZADO para multipart/form-data
 @cancha_ns.route('/create')
 class CanchaCreateResource(Resource):
@@ -19,13 +27,13 @@ class CanchaCreateResource(Resource):
     @cancha_ns.response(500, 'Error interno del servidor', cancha_error_model)
     def post(self):
         """Crear una nueva cancha con soporte para subida de imágenes"""
-        print("🎯 Llegó request a /cancha/create POST")
-        print(f"📋 Content-Type: {request.content_type}")
+        logger.debug('Llegó request a /cancha/create POST')
+        logger.debug('Content-Type: %s', request.content_type)
         
         try:
             # ✅ SOPORTAR multipart/form-data
             if request.content_type and 'multipart/form-data' in request.content_type:
-                print("📦 Datos recibidos como multipart/form-data")
+                logger.debug('Datos recibidos como multipart/form-data')
                 
                 # Obtener datos del form
                 data = {
@@ -43,19 +51,19 @@ class CanchaCreateResource(Resource):
                     'estado': request.form.get('estado', 'activa')
                 }
                 
-                print(f"📥 Datos recibidos del form: {data}")
+                logger.debug('Datos recibidos del form: %s', data)
                 
                 # ✅ DEBUG: Mostrar todos los campos recibidos
-                print("🔍 Campos en request.form:")
+                logger.debug('Campos en request.form:')
                 for key in request.form.keys():
-                    print(f"  {key}: {request.form.get(key)}")
+                    logger.debug('  %s: %s', key, request.form.get(key))
                 
-                print("🔍 Archivos en request.files:")
+                logger.debug('Archivos en request.files:')
                 for key in request.files.keys():
                     files = request.files.getlist(key)
-                    print(f"  {key}: {len(files)} archivos")
+                    logger.debug('  %s: %s archivos', key, len(files))
                     for i, file in enumerate(files):
-                        print(f"    [{i}] {file.filename} ({file.content_type})")
+                        logger.debug('    [%s] %s (%s)', i, file.filename, file.content_type)
                 
                 # Procesar listas desde JSON strings
                 try:
@@ -64,7 +72,7 @@ class CanchaCreateResource(Resource):
                     data['amenidades'] = json.loads(request.form.get('amenidades', '[]'))
                     data['imagenes'] = json.loads(request.form.get('imagenes', '[]'))
                 except json.JSONDecodeError as e:
-                    print(f"❌ Error decodificando JSON: {str(e)}")
+                    logger.info('Error decodificando JSON: %s', e)
                     return {
                         "error": "Error al procesar datos JSON en formulario",
                         "codigo": "JSON_INVALIDO",
@@ -77,12 +85,12 @@ class CanchaCreateResource(Resource):
                 # Formato 1: 'imagenes[]' (array)
                 if 'imagenes[]' in request.files:
                     imagenes_files = request.files.getlist('imagenes[]')
-                    print(f"📸 Archivos recibidos como 'imagenes[]': {len(imagenes_files)}")
+                    logger.debug("Archivos recibidos como 'imagenes[]': %s", len(imagenes_files))
                 
                 # Formato 2: 'imagenes' (individual)
                 elif 'imagenes' in request.files:
                     imagenes_files = [request.files['imagenes']]
-                    print(f"📸 Archivo recibido como 'imagenes': {len(imagenes_files)}")
+                    logger.debug("Archivo recibido como 'imagenes': %s", len(imagenes_files))
                 
                 # Formato 3: 'imagenes[0]', 'imagenes[1]', etc.
                 else:
@@ -95,9 +103,9 @@ class CanchaCreateResource(Resource):
                         i += 1
                     
                     if imagenes_files:
-                        print(f"📸 Archivos recibidos como 'imagenes[0]...': {len(imagenes_files)}")
+                        logger.debug("Archivos recibidos como 'imagenes[0]...': %s", len(imagenes_files))
                 
-                print(f"📦 Total de archivos de imagen a procesar: {len(imagenes_files)}")
+                logger.debug('Total de archivos de imagen a procesar: %s', len(imagenes_files))
                 
                 # Validar datos requeridos
                 campos_requeridos = ['nombre', 'tipo', 'subtipo', 'direccion', 'latitud', 'longitud', 
@@ -124,14 +132,14 @@ class CanchaCreateResource(Resource):
                     }, 400
                 
                 # Crear cancha con archivos de imagen
-                print("🔄 Llamando a servicio para crear cancha...")
+                logger.debug('Llamando a servicio para crear cancha...')
                 cancha = CanchaService.crear_cancha_con_todo(data, imagenes_files)
                 
             else:
                 # Formato JSON tradicional
-                print("📦 Datos recibidos como JSON")
+                logger.debug('Datos recibidos como JSON')
                 data = request.json
-                print(f"📥 Datos recibidos: {list(data.keys())}")
+                logger.debug('Datos recibidos: %s', list(data.keys()))
                 
                 # Validar datos requeridos
                 campos_requeridos = ['nombre', 'tipo', 'subtipo', 'direccion', 'latitud', 'longitud', 
@@ -152,27 +160,25 @@ class CanchaCreateResource(Resource):
             }, 201
             
         except PermissionError as e:
-            print(f"❌ Error de permisos: {str(e)}")
+            logger.info('Error de permisos: %s', e)
             return {"error": str(e), "codigo": "NO_AUTORIZADO"}, 401
         except ValueError as e:
-            print(f"❌ Error de validación: {str(e)}")
+            logger.info('Error de validación: %s', e)
             return {"error": str(e), "codigo": "VALIDACION_FALLIDA"}, 400
         except Exception as e:
-            print(f"❌ Error interno: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception('Error interno: %s', e)
             return {"error": "Error interno del servidor", "codigo": "ERROR_INTERNO"}, 500
 
 @cancha_ns.route('/list')
 class CanchaListResource(Resource):
     def get(self):
         """Obtener todas las canchas activas con URLs de imágenes WebP"""
-        print("🎯 Llegó request a /cancha/list GET")
+        logger.debug('Llegó request a /cancha/list GET')
         try:
             # ✅ El servicio retorna diccionarios con URLs WebP
             canchas = CanchaService.obtener_todas_las_canchas()
             
-            print(f"✅ Retornando {len(canchas)} canchas con URLs WebP")
+            logger.debug('Retornando %s canchas con URLs WebP', len(canchas))
             return {
                 'success': True,
                 'data': canchas,
@@ -180,7 +186,7 @@ class CanchaListResource(Resource):
                 'formato_imagenes': 'webp_url'
             }, 200
         except Exception as e:
-            print(f"❌ Error: {str(e)}")
+            logger.exception('Error: %s', e)
             return {
                 "success": False,
                 "error": "Error al obtener canchas", 
@@ -192,31 +198,49 @@ class CanchaImagenWebPResource(Resource):
     def get(self, cancha_id, filename):
         """Servir archivo WebP de cancha"""
         try:
-            # Construir ruta al directorio WebP
-            webp_folder = os.path.join(
-                current_app.root_path, 
-                'utils', 'pictures', 'canchas', 
-                str(cancha_id), 'webp'
-            )
-            
-            # Verificar que el archivo existe
-            file_path = os.path.join(webp_folder, filename)
-            if not os.path.exists(file_path):
-                print(f"❌ Archivo WebP no encontrado: {file_path}")
-                return {"error": "Imagen WebP no encontrada"}, 404
+            # Carpeta de la entidad en el almacenamiento (imágenes anteriores a cas/)
+            carpeta = f"canchas/{cancha_id}/webp"
             
-            print(f"📤 Sirviendo archivo WebP: {filename}")
-            return send_from_directory(webp_folder, filename)
+            # Existencia, ETag, 304 y Range se resuelven en el componente de media
+            return servir_imagen(carpeta, filename, "Imagen WebP no encontrada")
             
         except Exception as e:
-            print(f"❌ Error sirviendo imagen WebP: {str(e)}")
+            logger.exception('Error sirviendo imagen WebP: %s', e)
             return {"error": "Error al cargar imagen WebP"}, 500
 
+@cancha_ns.route('/<int:cancha_id>/imagenes.zip')
+class CanchaImagenesZipResource(Resource):
+    @cancha_ns.doc(params={'lado': 'Variante a empaquetar: 96, 320, 800 o 1200 (opcional)'})
+    @cancha_ns.response(400, 'Parámetros inválidos o paquete demasiado grande', cancha_error_model)
+    @cancha_ns.response(404, 'Cancha no encontrada', cancha_error_model)
+    def get(self, cancha_id):
+        """Descargar las imágenes de la cancha en un ZIP generado por bloques (con tope de tamaño)"""
+        try:
+            entradas = CanchaService.preparar_paquete_imagenes(cancha_id, request.args.get('lado', type=int))
+            if entradas is None:
+                return {"error": "Cancha no encontrada", "codigo": "CANCHA_NO_ENCONTRADA"}, 404
+
+            return Response(
+                stream_with_context(generar_zip(obtener_almacenamiento(), entradas)),
+                mimetype='application/zip',
+                headers={
+                    'Content-Disposition': f'attachment; filename="cancha_{cancha_id}_imagenes.zip"',
+                    'Cache-Control': 'no-cache'
+                }
+            )
+
+        except ValueError as e:
+            logger.info('Paquete de imágenes rechazado: %s', e)
+            return {"error": str(e), "codigo": "PARAMETROS_INVALIDOS"}, 400
+        except Exception as e:
+            logger.exception('Error generando paquete de imágenes: %s', e)
+            return {"error": "Error al generar el paquete de imágenes", "codigo": "ERROR_INTERNO"}, 500
+
 @cancha_ns.route('/<int:id>')
 class CanchaDetailResource(Resource):
     def get(self, id):
         """Obtener cancha por ID con URLs de imágenes WebP"""
-        print(f"🎯 Llegó request a /cancha/{id} GET")
+        logger.debug('Llegó request a /cancha/%s GET', id)
         try:
             cancha = CanchaService.obtener_cancha_por_id(id)
             if not cancha:
@@ -246,10 +270,12 @@ class CanchaDetailResource(Resource):
             
             for img in cancha.imagenes:
                 if img.url_imagen.startswith('/utils/pictures/'):
+                    url_webp = f"/cancha/{cancha.id}/imagen-webp/{os.path.basename(img.url_imagen)}"
                     cancha_data['imagenes_webp'].append({
                         'id': img.id,
                         'orden': img.orden,
-                        'url_webp': f"/cancha/{cancha.id}/imagen-webp/{os.path.basename(img.url_imagen)}",
+                        'url_webp': url_webp,
+                        'srcset': ImagenPipeline.srcset(url_webp),
                         'nombre': os.path.basename(img.url_imagen),
                         'formato': 'webp'
                     })
@@ -267,7 +293,7 @@ class CanchaDetailResource(Resource):
             }, 200
             
         except Exception as e:
-            print(f"❌ Error: {str(e)}")
+            logger.exception('Error: %s', e)
             return {
                 "success": False,
                 "error": "Error al obtener cancha", 
@@ -283,7 +309,7 @@ class HorariosDisponiblesResource(Resource):
     @cancha_ns.response(500, 'Error al obtener horarios', cancha_error_model)
     def get(self, cancha_id):
         """Obtener horarios disponibles para una cancha en una fecha específica"""
-        print(f"🎯 Llegó request a /cancha/{cancha_id}/horarios-disponibles GET")
+        logger.debug('Llegó request a /cancha/%s/horarios-disponibles GET', cancha_id)
         try:
             fecha = request.args.get('fecha')
             if not fecha:
@@ -297,5 +323,63 @@ class HorariosDisponiblesResource(Resource):
                 "total_disponibles": len(disponibles)
             }, 200
         except Exception as e:
-            print(f"❌ Error: {str(e)}")
-            return {"error": "Error al obtener horarios", "codigo": "ERROR_OBTENER_HORARIOS"}, 500
\ No newline at end of file
+            logger.exception('Error: %s', e)
+            return {"error": "Error al obtener horarios", "codigo": "ERROR_OBTENER_HORARIOS"}, 500
+
+# Ruta para disponibilidad de varias canchas en un rango de fechas
+@cancha_ns.route('/disponibilidad')
+class DisponibilidadLoteResource(Resource):
+    @cancha_ns.doc(params={
+        'canchas': {'description': 'IDs de cancha separados por coma', 'required': True, 'example': '1,2,3'},
+        'desde': {'description': 'Fecha inicial YYYY-MM-DD', 'required': True, 'example': '2024-12-23'},
+        'hasta': {'description': 'Fecha final YYYY-MM-DD (incluida)', 'required': True, 'example': '2024-12-29'}
+    })
+    @cancha_ns.response(400, 'Parámetros inválidos', cancha_error_model)
+    @cancha_ns.response(500, 'Error al obtener disponibilidad', cancha_error_model)
+    def get(self):
+        """Obtener horarios disponibles de varias canchas en un rango de fechas (respuesta en streaming)"""
+        logger.debug('Llegó request a /cancha/disponibilidad GET')
+        try:
+            canchas = request.args.get('canchas', '')
+            desde = request.args.get('desde')
+            hasta = request.args.get('hasta')
+            if not desde or not hasta:
+                return {"error": "Debe enviar 'desde' y 'hasta' en formato YYYY-MM-DD", "codigo": "FECHA_REQUERIDA"}, 400
+
+            try:
+                cancha_ids = [int(c) for c in canchas.split(',') if c.strip()]
+            except ValueError:
+                return {"error": "IDs de cancha inválidos", "codigo": "PARAMETROS_INVALIDOS"}, 400
+
+            try:
+                desde_fecha = datetime.strptime(desde, '%Y-%m-%d').date()
+                hasta_fecha = datetime.strptime(hasta, '%Y-%m-%d').date()
+                filas = DisponibilidadService.disponibilidad_por_rango(cancha_ids, desde_fecha, hasta_fecha)
+            except ValueError as e:
+                return {"error": str(e), "codigo": "PARAMETROS_INVALIDOS"}, 400
+
+            def generar():
+                # Un bloque por cancha para no armar toda la respuesta en memoria
+                yield json.dumps({"desde": desde, "hasta": hasta})[:-1] + ', "disponibilidad": ['
+                bloque = []
+                cancha_actual = None
+                primero = True
+                for cancha_id, fecha, horas in filas:
+                    if cancha_actual is not None and cancha_id != cancha_actual:
+                        yield ('' if primero else ',') + ','.join(bloque)
+                        bloque, primero = [], False
+                    cancha_actual = cancha_id
+                    bloque.append(json.dumps({
+                        "cancha_id": cancha_id,
+                        "fecha": fecha.isoformat(),
+                        "horarios_disponibles": horas,
+                        "total_disponibles": len(horas)
+                    }))
+                if bloque:
+                    yield ('' if primero else ',') + ','.join(bloque)
+                yield ']}'
+
+            return Response(stream_with_context(generar()), mimetype='application/json')
+        except Exception as e:
+            logger.exception('Error: %s', e)
+            return {"error": "Error al obtener disponibilidad", "codigo": "ERROR_OBTENER_DISPONIBILIDAD"}, 500
@@ -2,10 +2,14 @@
 Controlador de verificación de sesión
 """
 
+import logging
+
 from flask_restx import Resource
 from app.controllers.auth import auth_ns
 from app.services.auth.check_service import AuthService
 
+logger = logging.getLogger(__name__)
+
 
 @auth_ns.route('/check-session')
 class CheckSession(Resource):
@@ -24,17 +28,14 @@ class CheckSession(Resource):
     ''')
     def get(self):
         """Verificar si la sesión está activa"""
-        print("\n=== Iniciando verificación de sesión ===")
         try:
             # El servicio retorna (data, status_code)
             response_data, status_code = AuthService.check_session()
-            print(f"✅ Respuesta de check_session - Status: {status_code}, Data: {response_data}")
-            print("=== Fin de verificación de sesión ===\n")
+            logger.debug('Verificación de sesión - status: %s', status_code)
             
             # Retornar la respuesta exacta del servicio
             return response_data, status_code
             
         except Exception as e:
-            print("💥 Error inesperado en el controlador:", str(e))
-            print("=== Fin de verificación con error ===\n")
+            logger.exception('Error inesperado al verificar sesión: %s', e)
             return {'error': 'Error al verificar sesión'}, 500
\ No newline at end of file
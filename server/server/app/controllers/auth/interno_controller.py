@@ -0,0 +1,55 @@
+"""
+Endpoints internos de operación (no forman parte de la API pública)
+"""
+import hmac
+import logging
+import os
+from functools import wraps
+
+from flask import request
+from flask_restx import Resource
+
+from app.controllers.auth import interno_ns
+from app.services.email.cola_correo import obtener_cola_correo
+from app.utils.database import db
+from app.utils.db_config import estadisticas_pool
+
+logger = logging.getLogger(__name__)
+
+# Se exige la cabecera X-Interno-Token; sin INTERNO_TOKEN configurado los endpoints
+# quedan cerrados. La dirección del cliente no sirve: detrás del proxy inverso todas
+# las peticiones llegan desde loopback
+INTERNO_TOKEN = os.getenv('INTERNO_TOKEN', '')
+
+
+def solo_interno(f):
+    @wraps(f)
+    def envoltura(*args, **kwargs):
+        permitido = bool(INTERNO_TOKEN) and hmac.compare_digest(
+            request.headers.get('X-Interno-Token', ''), INTERNO_TOKEN
+        )
+        if not permitido:
+            logger.warning('Acceso interno rechazado desde %s', request.remote_addr)
+            return {"error": "Acceso restringido", "codigo": "ACCESO_INTERNO"}, 403
+        return f(*args, **kwargs)
+    return envoltura
+
+
+@interno_ns.route('/db/pool', doc=False)
+class PoolBaseDatosResource(Resource):
+    @solo_interno
+    def get(self):
+        """Ocupación del pool de conexiones y contadores de espera/timeouts"""
+        datos = estadisticas_pool(db.engine)
+        replicas = {clave: estadisticas_pool(engine) for clave, engine in db.engines.items() if clave}
+        if replicas:
+            datos['binds'] = replicas
+        return datos, 200
+
+
+@interno_ns.route('/correo/cola', doc=False)
+class ColaCorreoResource(Resource):
+    @solo_interno
+    def get(self):
+        """Mensajes de la cola de salida por estado"""
+        return obtener_cola_correo().estadisticas(), 200
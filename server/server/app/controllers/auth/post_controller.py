@@ -1,29 +1,28 @@
+import logging
 from flask_restx import Resource
-from flask import request, current_app, send_from_directory
-import os
+from flask import request
 from app.services.auth.post_service import PostService
-from app.utils.auth_utils import obtener_usuario_desde_token
+from app.utils.media import servir_imagen
+from app.utils.auth_utils import requiere_auth
 
 # ✅ CORREGIDO: Importar desde el __init__ de auth
 from . import posts_ns, post_model, post_update_model, comentario_model
 
+logger = logging.getLogger(__name__)
+
 # Endpoints para Posts
 @posts_ns.route('/create')
 class Posts(Resource):
-    def post(self):
+    @requiere_auth()
+    def post(self, auth):
         """Crear una nueva publicación con soporte para imágenes"""
-        print("🌐 [POSTS] Solicitud recibida para crear post")
-        print(f"📋 Content-Type: {request.content_type}")
+        logger.debug('Solicitud recibida para crear post')
+        logger.debug('Content-Type: %s', request.content_type)
         
-        # Obtener usuario desde el token JWT
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
-
         try:
             # ✅ SOPORTAR multipart/form-data para imágenes
             if request.content_type and 'multipart/form-data' in request.content_type:
-                print("📦 Datos recibidos como multipart/form-data")
+                logger.debug('Datos recibidos como multipart/form-data')
                 
                 # Obtener datos del form
                 data = {
@@ -32,35 +31,32 @@ class Posts(Resource):
                     'imagen_url': request.form.get('imagen_url')
                 }
                 
-                print(f"📥 Datos recibidos del form: {data}")
-                print(f"📁 Archivos recibidos: {list(request.files.keys())}")
+                logger.debug('Datos recibidos del form: %s', data)
+                logger.debug('Archivos recibidos: %s', list(request.files.keys()))
                 
                 # Obtener archivo de imagen
                 imagen_file = None
                 if 'imagen' in request.files:
                     imagen_file = request.files['imagen']
                     if imagen_file and imagen_file.filename != '':
-                        print(f"📸 Archivo de imagen recibido: {imagen_file.filename}")
-                        print(f"📏 Tamaño del archivo: {len(imagen_file.read())} bytes")
-                        # Reset file pointer después de leer
-                        imagen_file.seek(0)
+                        logger.debug('Archivo de imagen recibido: %s', imagen_file.filename)
                     else:
-                        print("⚠️ Campo 'imagen' existe pero está vacío")
+                        logger.warning("Campo 'imagen' existe pero está vacío")
                         imagen_file = None
                 else:
-                    print("❌ No se encontró campo 'imagen' en los archivos")
+                    logger.info("No se encontró campo 'imagen' en los archivos")
                 
                 # ✅ Llamar al servicio con el archivo de imagen
-                result = PostService.crear_post(usuario.id, data, imagen_file)
+                result = PostService.crear_post(auth.id, data, imagen_file)
                 
             else:
                 # Formato JSON tradicional (sin imagen)
-                print("📦 Datos recibidos como JSON")
+                logger.debug('Datos recibidos como JSON')
                 data = request.get_json()
                 if not data:
                     return {'message': 'Datos inválidos'}, 400
                 
-                print(f"📥 Datos recibidos: {data}")
+                logger.debug('Datos recibidos: %s', data)
                 
                 # ✅ No permitir tipo 'foto' sin imagen en JSON
                 if data.get('tipo_post') == 'foto':
@@ -68,70 +64,81 @@ class Posts(Resource):
                         'message': 'Los posts de tipo "foto" deben enviarse como multipart/form-data con una imagen'
                     }, 400
                 
-                result = PostService.crear_post(usuario.id, data)
+                result = PostService.crear_post(auth.id, data)
             
             return result, 201
             
         except ValueError as e:
             return {'message': str(e)}, 400
         except Exception as e:
-            print(f"❌ Error interno: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception('Error interno: %s', e)
             return {'message': 'Error interno del servidor'}, 500
 
 @posts_ns.route('/obtener_post')
 class obtenerpost(Resource):
+    @posts_ns.doc(params={
+        'pagina': 'Página (modo OFFSET)',
+        'por_pagina': 'Publicaciones por página',
+        'after': 'Cursor <created_at>,<id> para paginar por keyset (vacío = primera página)',
+        'incluir_total': 'true para calcular total_posts en modo cursor'
+    })
     def get(self):
         """Obtener lista de publicaciones paginadas"""
-        print("🌐 [POSTS] Solicitud recibida para obtener posts")
+        logger.debug('Solicitud recibida para obtener posts')
         
         pagina = request.args.get('pagina', 1, type=int)
         por_pagina = request.args.get('por_pagina', 10, type=int)
+        # Modo cursor: ?after=<created_at>,<id> (vacío para la primera página)
+        after = request.args.get('after')
+        incluir_total = request.args.get('incluir_total', 'false').lower() == 'true'
 
         try:
-            result = PostService.obtener_posts(pagina, por_pagina)
+            result = PostService.obtener_posts(pagina, por_pagina, after, incluir_total)
             return result, 200
+        except ValueError as e:
+            return {'message': str(e)}, 400
         except Exception as e:
             return {'message': 'Error interno del servidor'}, 500
         
 @posts_ns.route('/mis-posts')
 class MisPosts(Resource):
-    def get(self):
+    @requiere_auth()
+    def get(self, auth):
         """Obtener las publicaciones del usuario autenticado"""
-        print("🌐 [POSTS] Solicitud recibida para obtener mis posts")
-        
-        # Obtener usuario desde el token JWT
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
+        logger.debug('Solicitud recibida para obtener mis posts')
         
         pagina = request.args.get('pagina', 1, type=int)
         por_pagina = request.args.get('por_pagina', 10, type=int)
+        # Modo cursor: ?after=<created_at>,<id> (vacío para la primera página)
+        after = request.args.get('after')
+        incluir_total = request.args.get('incluir_total', 'false').lower() == 'true'
 
         try:
-            result = PostService.obtener_mis_posts(usuario.id, pagina, por_pagina)
+            result = PostService.obtener_mis_posts(auth.id, pagina, por_pagina, after, incluir_total)
             return result, 200
+        except ValueError as e:
+            return {'message': str(e)}, 400
         except Exception as e:
             return {'message': 'Error interno del servidor'}, 500
 
 @posts_ns.route('/mis-likes')
 class MisLikes(Resource):
-    def get(self):
+    @requiere_auth()
+    def get(self, auth):
         """Obtener publicaciones que el usuario autenticado ha dado like"""
-        print("🌐 [POSTS] Solicitud recibida para obtener mis likes")
-        
-        # Obtener usuario desde el token JWT
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
+        logger.debug('Solicitud recibida para obtener mis likes')
         
         pagina = request.args.get('pagina', 1, type=int)
         por_pagina = request.args.get('por_pagina', 10, type=int)
+        # Modo cursor: ?after=<created_at>,<id> (vacío para la primera página)
+        after = request.args.get('after')
+        incluir_total = request.args.get('incluir_total', 'false').lower() == 'true'
 
         try:
-            result = PostService.obtener_mis_likes_posts(usuario.id, pagina, por_pagina)
+            result = PostService.obtener_mis_likes_posts(auth.id, pagina, por_pagina, after, incluir_total)
             return result, 200
+        except ValueError as e:
+            return {'message': str(e)}, 400
         except Exception as e:
             return {'message': 'Error interno del servidor'}, 500
 
@@ -139,7 +146,7 @@ class MisLikes(Resource):
 class PostDetail(Resource):
     def get(self, post_id):
         """Obtener una publicación específica"""
-        print(f"🌐 [POSTS] Solicitud recibida para obtener post ID: {post_id}")
+        logger.debug('Solicitud recibida para obtener post ID: %s', post_id)
         
         try:
             result = PostService.obtener_post_por_id(post_id)
@@ -149,23 +156,19 @@ class PostDetail(Resource):
         except Exception as e:
             return {'message': 'Error interno del servidor'}, 500
 
-    def put(self, post_id):
+    @requiere_auth()
+    def put(self, post_id, auth):
         """Actualizar una publicación con soporte para nueva imagen"""
-        print(f"🌐 [POSTS] Solicitud recibida para actualizar post ID: {post_id}")
-        print(f"📋 Content-Type: {request.content_type}")
+        logger.debug('Solicitud recibida para actualizar post ID: %s', post_id)
+        logger.debug('Content-Type: %s', request.content_type)
         
-        # Obtener usuario desde el token JWT
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
-
         try:
             # ✅ SOPORTAR multipart/form-data para nueva imagen
             imagen_file = None
             data = {}
             
             if request.content_type and 'multipart/form-data' in request.content_type:
-                print("📦 Actualizando con multipart/form-data")
+                logger.debug('Actualizando con multipart/form-data')
                 
                 # Obtener datos del form
                 data = {
@@ -178,7 +181,7 @@ class PostDetail(Resource):
                 if 'imagen' in request.files:
                     imagen_file = request.files['imagen']
                     if imagen_file and imagen_file.filename != '':
-                        print(f"📸 Nueva imagen recibida: {imagen_file.filename}")
+                        logger.debug('Nueva imagen recibida: %s', imagen_file.filename)
                     else:
                         imagen_file = None
                 
@@ -188,28 +191,22 @@ class PostDetail(Resource):
                 if not data:
                     return {'message': 'Datos inválidos'}, 400
             
-            result = PostService.actualizar_post(post_id, usuario.id, data, imagen_file)
+            result = PostService.actualizar_post(post_id, auth.id, data, imagen_file)
             return result, 200
             
         except ValueError as e:
             return {'message': str(e)}, 400
         except Exception as e:
-            print(f"❌ Error interno: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception('Error interno: %s', e)
             return {'message': 'Error interno del servidor'}, 500
 
-    def delete(self, post_id):
+    @requiere_auth()
+    def delete(self, post_id, auth):
         """Eliminar una publicación"""
-        print(f"🌐 [POSTS] Solicitud recibida para eliminar post ID: {post_id}")
+        logger.debug('Solicitud recibida para eliminar post ID: %s', post_id)
         
-        # Obtener usuario desde el token JWT
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
-
         try:
-            result = PostService.eliminar_post(post_id, usuario.id)
+            result = PostService.eliminar_post(post_id, auth.id)
             return result, 200
         except ValueError as e:
             return {'message': str(e)}, 400
@@ -219,21 +216,17 @@ class PostDetail(Resource):
 @posts_ns.route('/<int:post_id>/comentarios')
 class PostComentarios(Resource):
     @posts_ns.expect(comentario_model)
-    def post(self, post_id):
+    @requiere_auth()
+    def post(self, post_id, auth):
         """Agregar comentario a una publicación"""
-        print(f"🌐 [POSTS] Solicitud recibida para agregar comentario al post ID: {post_id}")
-        
-        # Obtener usuario desde el token JWT
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
+        logger.debug('Solicitud recibida para agregar comentario al post ID: %s', post_id)
         
         data = request.get_json()
         if not data:
             return {'message': 'Datos inválidos'}, 400
 
         try:
-            result = PostService.agregar_comentario(post_id, usuario.id, data)
+            result = PostService.agregar_comentario(post_id, auth.id, data)
             return result, 201
         except ValueError as e:
             return {'message': str(e)}, 400
@@ -242,7 +235,7 @@ class PostComentarios(Resource):
 
     def get(self, post_id):
         """Obtener comentarios de una publicación"""
-        print(f"🌐 [POSTS] Solicitud recibida para obtener comentarios del post ID: {post_id}")
+        logger.debug('Solicitud recibida para obtener comentarios del post ID: %s', post_id)
         
         try:
             result = PostService.obtener_comentarios(post_id)
@@ -254,17 +247,28 @@ class PostComentarios(Resource):
 
 @posts_ns.route('/<int:post_id>/like')
 class PostLike(Resource):
-    def post(self, post_id):
+    @requiere_auth()
+    def post(self, post_id, auth):
         """Agregar o quitar like de una publicación"""
-        print(f"🌐 [POSTS] Solicitud recibida para toggle like en post ID: {post_id}")
+        logger.debug('Solicitud recibida para toggle like en post ID: %s', post_id)
         
-        # Obtener usuario desde el token JWT
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
+        try:
+            result = PostService.toggle_like_post(post_id, auth.id)
+            return result, 200
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        except Exception as e:
+            return {'message': 'Error interno del servidor'}, 500
 
+@posts_ns.route('/comentarios/<int:comentario_id>')
+class ComentarioDetail(Resource):
+    @requiere_auth()
+    def delete(self, comentario_id, auth):
+        """Eliminar un comentario propio"""
+        logger.debug('Solicitud recibida para eliminar comentario ID: %s', comentario_id)
+        
         try:
-            result = PostService.toggle_like_post(post_id, usuario.id)
+            result = PostService.eliminar_comentario(comentario_id, auth.id)
             return result, 200
         except ValueError as e:
             return {'message': str(e)}, 400
@@ -273,17 +277,13 @@ class PostLike(Resource):
 
 @posts_ns.route('/comentarios/<int:comentario_id>/like')
 class ComentarioLike(Resource):
-    def post(self, comentario_id):
+    @requiere_auth()
+    def post(self, comentario_id, auth):
         """Agregar o quitar like de un comentario"""
-        print(f"🌐 [POSTS] Solicitud recibida para toggle like en comentario ID: {comentario_id}")
+        logger.debug('Solicitud recibida para toggle like en comentario ID: %s', comentario_id)
         
-        # Obtener usuario desde el token JWT
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
-
         try:
-            result = PostService.toggle_like_comentario(comentario_id, usuario.id)
+            result = PostService.toggle_like_comentario(comentario_id, auth.id)
             return result, 200
         except ValueError as e:
             return {'message': str(e)}, 400
@@ -296,24 +296,14 @@ class PostImagenResource(Resource):
     def get(self, user_id, filename):
         """Servir archivo WebP de post"""
         try:
-            print(f"📤 Sirviendo imagen de post para usuario {user_id}: {filename}")
-            
-            # Construir ruta al directorio WebP del usuario para posts
-            webp_folder = os.path.join(
-                current_app.root_path, 
-                'utils', 'pictures', 'posts', 
-                str(user_id), 'webp'
-            )
+            logger.debug('Sirviendo imagen de post para usuario %s: %s', user_id, filename)
             
-            # Verificar que el archivo existe
-            file_path = os.path.join(webp_folder, filename)
-            if not os.path.exists(file_path):
-                print(f"❌ Archivo WebP no encontrado: {file_path}")
-                return {"error": "Imagen de post no encontrada"}, 404
+            # Carpeta de la entidad en el almacenamiento (imágenes anteriores a cas/)
+            carpeta = f"posts/{user_id}/webp"
             
-            print(f"✅ Sirviendo archivo WebP: {filename}")
-            return send_from_directory(webp_folder, filename)
+            # Existencia, ETag, 304 y Range se resuelven en el componente de media
+            return servir_imagen(carpeta, filename, "Imagen de post no encontrada")
             
         except Exception as e:
-            print(f"❌ Error sirviendo imagen de post: {str(e)}")
+            logger.exception('Error sirviendo imagen de post: %s', e)
             return {"error": "Error al cargar imagen de post"}, 500
\ No newline at end of file
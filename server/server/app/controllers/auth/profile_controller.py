@@ -1,11 +1,16 @@
+import logging
+
 from app.models.user_model import User
 from app.utils.database import db
+from app.utils.replicas import solo_lectura
 from datetime import datetime
-from app.utils.auth_utils import obtener_usuario_desde_token
-from flask import request, send_from_directory, current_app
+from app.utils.auth_utils import obtener_contexto_auth, requiere_auth
+from flask import request
 from flask_restx import Resource
 import os
 from app.services.auth.profile_service import PlayerService
+from app.services.media.imagen_pipeline import ImagenPipeline, LADO_PERFIL
+from app.utils.media import servir_imagen
 
 # Importar desde el archivo de modelos Swagger
 from .swagger_models import (
@@ -17,6 +22,8 @@ from .swagger_models import (
 )
 from . import player_ns
 
+logger = logging.getLogger(__name__)
+
 
 # 🔹 Obtener perfil de jugador (por ID o por token si no se pasa ID)
 @player_ns.route('/profile', defaults={'user_id': None})
@@ -28,11 +35,11 @@ class PlayerProfileById(Resource):
         """Obtener perfil de jugador (por ID o token JWT)"""
         # Si no se pasa user_id, obtenerlo desde el token
         if user_id is None:
-            usuario, error, status_code = obtener_usuario_desde_token()
+            contexto, error, status_code = obtener_contexto_auth()
             if error:
                 return error, status_code
-            user_id = usuario.id
-            print(f"🧩 Obtenido user_id desde token: {user_id}")
+            user_id = contexto.id
+            logger.debug('Obtenido user_id desde token: %s', user_id)
 
         # Llamar al servicio para obtener el perfil
         result = PlayerService.get_profile(user_id)
@@ -46,37 +53,24 @@ class PlayerProfile(Resource):
     @player_ns.response(400, 'Datos inválidos', error_response_model)
     @player_ns.response(403, 'No autorizado', error_response_model)
     @player_ns.response(500, 'Error interno del servidor', error_response_model)
-    def put(self):
+    @requiere_auth('player', mensaje_rol='Solo jugadores pueden completar este perfil')
+    def put(self, auth):
         """Crear o completar el perfil del jugador logueado con soporte para imagen"""
-        print("🎯 Llegó request a /profile_user PUT")
-        print(f"📋 Content-Type: {request.content_type}")
-        print(f"📦 Método: {request.method}")
-        print(f"📊 Headers: {dict(request.headers)}")
-        
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
+        logger.debug('Llegó request a /profile_user PUT (Content-Type: %s)', request.content_type)
         
-        if usuario.role != 'player':
-            return {'message': 'Solo jugadores pueden completar este perfil'}, 403
-
         try:
             # ✅ DETECCIÓN MEJORADA DEL TIPO DE CONTENIDO
             content_type = request.content_type or ''
-            print(f"🔍 Content-Type detectado: '{content_type}'")
             
             # Verificar si hay datos en form
             has_form_data = any(key in request.form for key in ['telephone', 'city', 'sport', 'position'])
             has_files = 'profilePicture' in request.files
             
-            print(f"📝 Tiene datos de formulario: {has_form_data}")
-            print(f"📸 Tiene archivos: {has_files}")
-            print(f"📋 Keys en request.form: {list(request.form.keys())}")
-            print(f"📁 Keys en request.files: {list(request.files.keys())}")
+            logger.debug('Campos del form: %s, archivos: %s', list(request.form.keys()), list(request.files.keys()))
             
             # ✅ SOPORTAR multipart/form-data para imágenes
             if has_form_data or has_files:
-                print("📦 Procesando como multipart/form-data")
+                logger.debug('Procesando como multipart/form-data')
                 
                 # Obtener datos del form
                 data = {
@@ -87,18 +81,14 @@ class PlayerProfile(Resource):
                     'biography': request.form.get('biography')
                 }
                 
-                print(f"📥 Datos recibidos del form: {data}")
                 
                 # Obtener archivo de imagen de perfil
                 profile_picture_file = None
                 if 'profilePicture' in request.files:
                     profile_picture_file = request.files['profilePicture']
-                    print(f"📸 Archivo de imagen recibido: {profile_picture_file.filename}")
-                    print(f"📏 Tamaño del archivo: {len(profile_picture_file.read())} bytes")
-                    # Resetear el stream de lectura
-                    profile_picture_file.seek(0)
+                    logger.debug('Archivo de imagen recibido: %s', profile_picture_file.filename)
                 else:
-                    print("⚠️ No se recibió archivo de imagen")
+                    logger.debug('No se recibió archivo de imagen')
                 
                 # Validar campos obligatorios
                 campos_obligatorios = ['telephone', 'city', 'sport', 'position']
@@ -108,21 +98,21 @@ class PlayerProfile(Resource):
                 
                 # Llamar al servicio con el archivo de imagen
                 result = PlayerService.create_player_profile(
-                    usuario.id, 
+                    auth.id, 
                     data, 
                     profile_picture_file=profile_picture_file
                 )
                 
             # ✅ SOPORTAR JSON tradicional
             elif content_type == 'application/json' or request.get_data():
-                print("📦 Intentando procesar como JSON")
+                logger.debug('Intentando procesar como JSON')
                 
                 try:
                     # Forzar la lectura de JSON incluso sin Content-Type
                     if request.get_data():
                         data = request.get_json(force=True, silent=True)
                         if data:
-                            print(f"📥 Datos JSON recibidos: {data}")
+                            logger.debug('Campos JSON recibidos: %s', list(data.keys()))
                             
                             # Validar campos obligatorios
                             campos_obligatorios = ['telephone', 'city', 'sport', 'position']
@@ -130,18 +120,18 @@ class PlayerProfile(Resource):
                             if campos_faltantes:
                                 return {'message': f'Campos obligatorios faltantes: {", ".join(campos_faltantes)}'}, 400
                             
-                            result = PlayerService.create_player_profile(usuario.id, data)
+                            result = PlayerService.create_player_profile(auth.id, data)
                         else:
                             return {'message': 'No se pudieron procesar los datos JSON'}, 400
                     else:
                         return {'message': 'No se recibieron datos'}, 400
                         
                 except Exception as json_error:
-                    print(f"❌ Error procesando JSON: {str(json_error)}")
+                    logger.info('Error procesando JSON: %s', json_error)
                     return {'message': 'Error al procesar datos JSON'}, 400
                 
             else:
-                print("❌ No se pudo determinar el tipo de contenido")
+                logger.debug('No se pudo determinar el tipo de contenido')
                 return {
                     'message': 'Content-Type no soportado. Use multipart/form-data para imágenes o application/json para datos simples'
                 }, 415
@@ -149,28 +139,20 @@ class PlayerProfile(Resource):
             return result, 201
             
         except ValueError as e:
-            print(f"❌ Error de validación: {str(e)}")
+            logger.info('Perfil rechazado: %s', e)
             return {'message': str(e)}, 400
         except Exception as e:
-            print(f"❌ Error interno: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception('Error interno: %s', e)
             return {'message': 'Error interno del servidor'}, 500
 
     @player_ns.response(200, 'Perfil obtenido exitosamente', player_profile_response)
     @player_ns.response(403, 'No autorizado', error_response_model)
     @player_ns.response(404, 'Perfil no encontrado', error_response_model)
-    def get(self):
+    @requiere_auth('player', mensaje_rol='Solo jugadores pueden acceder a este perfil')
+    def get(self, auth):
         """Obtener perfil del jugador logueado"""
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
-        
-        if usuario.role != 'player':
-            return {'message': 'Solo jugadores pueden acceder a este perfil'}, 403
-
         try:
-            result = PlayerService.get_profile(usuario.id)
+            result = PlayerService.get_profile(auth.id)
             return result, 200
         except ValueError as e:
             return {'message': str(e)}, 404
@@ -183,17 +165,11 @@ class PlayerProfilePicture(Resource):
     @player_ns.response(400, 'Archivo inválido', error_response_model)
     @player_ns.response(403, 'No autorizado', error_response_model)
     @player_ns.response(500, 'Error interno del servidor', error_response_model)
-    def put(self):
+    @requiere_auth('player', mensaje_rol='Solo jugadores pueden actualizar su foto de perfil')
+    def put(self, auth):
         """Actualizar solo la foto de perfil del jugador"""
-        print("🎯 Llegó request a /profile_user/picture PUT")
+        logger.debug('Llegó request a /profile_user/picture PUT')
         
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
-        
-        if usuario.role != 'player':
-            return {'message': 'Solo jugadores pueden actualizar su foto de perfil'}, 403
-
         try:
             # Verificar que se envió un archivo
             if 'profilePicture' not in request.files:
@@ -203,39 +179,33 @@ class PlayerProfilePicture(Resource):
             if not profile_picture_file or not profile_picture_file.filename:
                 return {'message': 'Archivo de imagen no válido'}, 400
             
-            print(f"📸 Actualizando foto de perfil: {profile_picture_file.filename}")
+            logger.debug('Actualizando foto de perfil: %s', profile_picture_file.filename)
             
             # Llamar al servicio para actualizar solo la foto
-            result = PlayerService.actualizar_foto_perfil(usuario.id, profile_picture_file)
+            result = PlayerService.actualizar_foto_perfil(auth.id, profile_picture_file)
             return result, 200
             
         except ValueError as e:
-            print(f"❌ Error de validación: {str(e)}")
+            logger.info('Foto de perfil rechazada: %s', e)
             return {'message': str(e)}, 400
         except Exception as e:
-            print(f"❌ Error interno: {str(e)}")
+            logger.exception('Error interno: %s', e)
             return {'message': 'Error interno del servidor'}, 500
 
     @player_ns.response(200, 'Foto de perfil eliminada exitosamente')
     @player_ns.response(403, 'No autorizado', error_response_model)
     @player_ns.response(500, 'Error interno del servidor', error_response_model)
-    def delete(self):
+    @requiere_auth('player', mensaje_rol='Solo jugadores pueden eliminar su foto de perfil')
+    def delete(self, auth):
         """Eliminar foto de perfil del jugador"""
-        print("🎯 Llegó request a /profile_user/picture DELETE")
-        
-        usuario, error, status_code = obtener_usuario_desde_token()
-        if error:
-            return error, status_code
+        logger.debug('Llegó request a /profile_user/picture DELETE')
         
-        if usuario.role != 'player':
-            return {'message': 'Solo jugadores pueden eliminar su foto de perfil'}, 403
-
         try:
-            result = PlayerService.eliminar_foto_perfil(usuario.id)
+            result = PlayerService.eliminar_foto_perfil(auth.id)
             return result, 200
             
         except Exception as e:
-            print(f"❌ Error interno: {str(e)}")
+            logger.exception('Error interno: %s', e)
             return {'message': 'Error interno del servidor'}, 500
 
 # 🔹 Ruta para SERVIR IMÁGENES DE PERFIL DE USUARIO - VERIFICADA
@@ -244,28 +214,16 @@ class UserImagenPerfilResource(Resource):
     def get(self, user_id, filename):
         """Servir archivo WebP de perfil de usuario"""
         try:
-            print(f"📤 Sirviendo imagen de perfil para usuario {user_id}: {filename}")
-            
-            # Construir ruta al directorio WebP del usuario
-            webp_folder = os.path.join(
-                current_app.root_path, 
-                'utils', 'pictures', 'users', 
-                str(user_id), 'webp'
-            )
-            
-            # Verificar que el archivo existe
-            file_path = os.path.join(webp_folder, filename)
-            print(f"🔍 Buscando archivo en: {file_path}")
+            logger.debug('Sirviendo imagen de perfil para usuario %s: %s', user_id, filename)
             
-            if not os.path.exists(file_path):
-                print(f"❌ Archivo WebP no encontrado: {file_path}")
-                return {"error": "Imagen de perfil no encontrada"}, 404
+            # Carpeta de la entidad en el almacenamiento (imágenes anteriores a cas/)
+            carpeta = f"users/{user_id}/webp"
             
-            print(f"✅ Archivo encontrado, sirviendo: {filename}")
-            return send_from_directory(webp_folder, filename)
+            # Existencia, ETag, 304 y Range se resuelven en el componente de media
+            return servir_imagen(carpeta, filename, "Imagen de perfil no encontrada")
             
         except Exception as e:
-            print(f"❌ Error sirviendo imagen de perfil: {str(e)}")
+            logger.exception('Error sirviendo imagen de perfil: %s', e)
             return {"error": "Error al cargar imagen de perfil"}, 500
 
 # 🔹 Ruta para OBTENER DATOS BÁSICOS DEL USUARIO (pública)
@@ -274,10 +232,11 @@ class UserBasicInfo(Resource):
     @player_ns.response(200, 'Información básica obtenida', user_basic_info_model)
     @player_ns.response(404, 'Usuario no encontrado', error_response_model)
     @player_ns.response(500, 'Error interno del servidor', error_response_model)
+    @solo_lectura
     def get(self, user_id):
         """Obtener información básica pública de un usuario"""
         try:
-            print(f"🔍 Obteniendo información básica del usuario ID: {user_id}")
+            logger.debug('Obteniendo información básica del usuario ID: %s', user_id)
             
             user = User.query.get(user_id)
             if not user:
@@ -291,9 +250,11 @@ class UserBasicInfo(Resource):
             
             # Construir URL accesible para la foto
             url_foto_accesible = user.urlphotoperfil
+            srcset_foto = None
             if user.urlphotoperfil and user.urlphotoperfil.startswith('/utils/pictures/'):
                 filename = os.path.basename(user.urlphotoperfil)
                 url_foto_accesible = f"/user/{user.id}/imagen-perfil/{filename}"
+                srcset_foto = ImagenPipeline.srcset(url_foto_accesible, max_lado=LADO_PERFIL)
             
             return {
                 'id': user.id,
@@ -303,9 +264,10 @@ class UserBasicInfo(Resource):
                 'edad': edad_calculada,
                 'city': user.city,
                 'urlphotoperfil': url_foto_accesible,
+                'urlphotoperfil_srcset': srcset_foto,
                 'is_profile_completed': user.is_profile_completed
             }, 200
             
         except Exception as e:
-            print(f"❌ Error obteniendo información básica: {str(e)}")
+            logger.exception('Error obteniendo información básica: %s', e)
             return {"error": "Error al obtener información del usuario"}, 500
\ No newline at end of file
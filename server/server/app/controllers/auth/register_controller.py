@@ -2,15 +2,14 @@
 Controlador de registro de usuarios
 """
 
+import logging
 from flask_restx import Resource
 from flask import request
 from . import auth_ns, register_model, verify_email_model, resend_code_model
 from app.services.auth.register_service import AuthService
 from app.utils.validation_utils import validate_registration
 
-# Almacenamiento temporal para datos de usuario pendientes de verificación
-# En producción, usa Redis o una base de datos temporal
-pending_registrations = {}
+logger = logging.getLogger(__name__)
 
 @auth_ns.route('/register')
 class Register(Resource):
@@ -20,7 +19,7 @@ class Register(Resource):
     @auth_ns.response(500, 'Error en el servidor')
     def post(self):
         """Registrar nuevo usuario - Paso 1: Enviar código de verificación"""
-        print("🌐 [AUTH] Solicitud recibida para registro")
+        logger.debug('Solicitud recibida para registro')
         
         data = auth_ns.payload
 
@@ -34,15 +33,15 @@ class Register(Resource):
             
             # ✅ Almacenar datos temporales del usuario para usar en la verificación
             if result.get('needs_verification') and 'user_data' in result:
-                pending_registrations[data['email']] = result['user_data']
-                print(f"💾 Datos temporales almacenados para: {data['email']}")
+                AuthService.store_pending_registration(data['email'], result['user_data'])
+                logger.debug('Datos temporales almacenados para: %s', data['email'])
             
             return result, 201
             
         except ValueError as e:
             return {'error': str(e)}, 400
         except Exception as e:
-            print("💥 Error inesperado en el servidor:", str(e))
+            logger.exception('Error inesperado en registro: %s', e)
             return {'error': 'Error en el servidor'}, 500
 
 @auth_ns.route('/verify-email')
@@ -54,7 +53,7 @@ class VerifyEmail(Resource):
     @auth_ns.response(500, 'Error en el servidor')
     def post(self):
         """Verificar código de email y completar registro - Paso 2: Crear usuario"""
-        print("🌐 [AUTH] Solicitud recibida para verificar email")
+        logger.debug('Solicitud recibida para verificar email')
         
         data = request.get_json()
         if not data:
@@ -64,12 +63,12 @@ class VerifyEmail(Resource):
             email = data['email']
             verification_code = data['verification_code']
             
-            # ✅ Recuperar datos temporales del usuario
-            if email not in pending_registrations:
+            # ✅ Recuperar datos temporales del usuario (compartidos entre workers)
+            user_data = AuthService.get_pending_registration(email)
+            if user_data is None:
                 return {'message': 'No se encontró un registro pendiente para este email. Por favor, regístrate nuevamente.'}, 404
             
-            user_data = pending_registrations[email]
-            print(f"🔍 Datos temporales recuperados para: {email}")
+            logger.debug('Datos temporales recuperados para: %s', email)
             
             # Verificar código y crear usuario
             result = AuthService.verify_and_create_user(
@@ -79,16 +78,15 @@ class VerifyEmail(Resource):
             )
             
             # ✅ Limpiar datos temporales después de verificación exitosa
-            if email in pending_registrations:
-                del pending_registrations[email]
-                print(f"🧹 Datos temporales eliminados para: {email}")
+            AuthService.delete_pending_registration(email)
+            logger.debug('Datos temporales eliminados para: %s', email)
             
             return result, 200
             
         except ValueError as e:
             return {'message': str(e)}, 400
         except Exception as e:
-            print(f"💥 Error en verificación de email: {str(e)}")
+            logger.exception('Error en verificación de email: %s', e)
             return {'message': 'Error interno del servidor'}, 500
 
 @auth_ns.route('/resend-verification')
@@ -99,7 +97,7 @@ class ResendVerification(Resource):
     @auth_ns.response(500, 'Error en el servidor')
     def post(self):
         """Reenviar código de verificación"""
-        print("🌐 [AUTH] Solicitud recibida para reenviar código")
+        logger.debug('Solicitud recibida para reenviar código')
         
         data = request.get_json()
         if not data:
@@ -115,5 +113,5 @@ class ResendVerification(Resource):
         except ValueError as e:
             return {'message': str(e)}, 400
         except Exception as e:
-            print(f"💥 Error al reenviar código: {str(e)}")
+            logger.exception('Error al reenviar código: %s', e)
             return {'message': 'Error interno del servidor'}, 500
\ No newline at end of file
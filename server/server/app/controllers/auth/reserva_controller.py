@@ -1,6 +1,7 @@
+import logging
 from flask import request
 from app.models.reserva import Reserva
-from app.utils.auth_utils import obtener_usuario_desde_token 
+from app.utils.auth_utils import requiere_auth
 from datetime import datetime
 from flask_restx import Resource, fields
 
@@ -17,6 +18,8 @@ from . import (
 )
 from app.services.auth.reserva_service import ReservaService
 
+logger = logging.getLogger(__name__)
+
 @reserva_ns.route('/crear')
 class CrearReservaController(Resource):
     @reserva_ns.expect(reserva_model)
@@ -27,7 +30,7 @@ class CrearReservaController(Resource):
     def post(self):
         """Crear una nueva reserva"""
         try:
-            print("🎯 Llegó request a /reserva/crear POST")
+            logger.debug('Llegó request a /reserva/crear POST')
             reserva = ReservaService.crear_reserva(request.json)
             
             return {
@@ -36,15 +39,13 @@ class CrearReservaController(Resource):
             }, 201
             
         except PermissionError as e:
-            print(f"❌ Error de permisos: {str(e)}")
+            logger.info('Error de permisos: %s', e)
             return {"error": str(e)}, 401
         except ValueError as e:
-            print(f"❌ Error de validación: {str(e)}")
+            logger.info('Error de validación: %s', e)
             return {"error": str(e)}, 400
         except Exception as e:
-            print(f"💥 Error interno: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception('Error interno: %s', e)
             return {"error": "Error interno del servidor"}, 500
 
 @reserva_ns.route('/ocupados/<int:cancha_id>/<string:fecha>')
@@ -54,7 +55,7 @@ class HorariosOcupadosController(Resource):
     @reserva_ns.response(500, 'Error interno del servidor', error_response_model)
     def get(self, cancha_id, fecha):
         """Obtener horarios ocupados para una cancha en una fecha específica (por ruta)"""
-        print(f"🎯 Llegó request a /reserva/ocupados/{cancha_id}/{fecha} GET")
+        logger.debug('Llegó request a /reserva/ocupados/%s/%s GET', cancha_id, fecha)
         
         try:
             fecha_date = datetime.strptime(fecha, '%Y-%m-%d').date()
@@ -75,14 +76,11 @@ class VerificarReservaUsuario(Resource):
     @reserva_ns.response(400, 'Parámetros inválidos', error_response_model)
     @reserva_ns.response(401, 'No autorizado', error_response_model)
     @reserva_ns.response(500, 'Error interno del servidor', error_response_model)
-    def get(self):
+    @requiere_auth()
+    def get(self, auth):
         """Verificar si el usuario ya tiene una reserva para una fecha específica"""
-        print("🎯 Llegó request a /reserva/ya-reservado GET")
+        logger.debug('Llegó request a /reserva/ya-reservado GET')
         
-        usuario, error, status = obtener_usuario_desde_token()
-        if error:
-            return error, status
-
         fecha_str = request.args.get('fecha')
         if not fecha_str:
             return {"error": "Parámetro 'fecha' requerido"}, 400
@@ -92,7 +90,7 @@ class VerificarReservaUsuario(Resource):
         except ValueError:
             return {"error": "Formato de fecha inválido (debe ser YYYY-MM-DD)"}, 400
 
-        reserva = Reserva.query.filter_by(user_id=usuario.id, fecha=fecha).first()
+        reserva = Reserva.query.filter_by(user_id=auth.id, fecha=fecha).first()
         return {"reservado": bool(reserva)}, 200
 
 @reserva_ns.route('/mis-reservas')
@@ -102,7 +100,7 @@ class MisReservasController(Resource):
     @reserva_ns.response(500, 'Error interno del servidor', error_response_model)
     def get(self):
         """Obtener TODAS las reservas del usuario autenticado"""
-        print("🎯 Llegó request a /reserva/mis-reservas GET - TODAS las reservas")
+        logger.debug('Llegó request a /reserva/mis-reservas GET - TODAS las reservas')
         
         try:
             # Usar el servicio simplificado
@@ -110,10 +108,10 @@ class MisReservasController(Resource):
             return reservas, 200
             
         except PermissionError as e:
-            print(f"❌ Error de autenticación: {str(e)}")
+            logger.info('Error de autenticación: %s', e)
             return {"error": str(e)}, 401
         except Exception as e:
-            print(f"💥 Error interno: {str(e)}")
+            logger.exception('Error interno: %s', e)
             return {"error": "Error interno del servidor"}, 500
 
 @reserva_ns.route('/cancelar/<int:reserva_id>')
@@ -125,7 +123,7 @@ class CancelarReservaController(Resource):
     @reserva_ns.response(500, 'Error interno del servidor', error_response_model)
     def delete(self, reserva_id):
         """Cancelar una reserva específica del usuario"""
-        print(f"🎯 Llegó request a /reserva/cancelar/{reserva_id} DELETE")
+        logger.debug('Llegó request a /reserva/cancelar/%s DELETE', reserva_id)
         
         try:
             resultado = ReservaService.cancelar_reserva(reserva_id)
@@ -135,11 +133,11 @@ class CancelarReservaController(Resource):
             }, 200
             
         except PermissionError as e:
-            print(f"❌ Error de permisos: {str(e)}")
+            logger.info('Error de permisos: %s', e)
             return {"error": str(e)}, 401
         except ValueError as e:
-            print(f"❌ Error de validación: {str(e)}")
+            logger.info('Error de validación: %s', e)
             return {"error": str(e)}, 400
         except Exception as e:
-            print(f"💥 Error interno: {str(e)}")
+            logger.exception('Error interno: %s', e)
             return {"error": "Error interno del servidor"}, 500
\ No newline at end of file
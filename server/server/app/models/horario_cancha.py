@@ -4,6 +4,10 @@ from sqlalchemy import event
 
 class HorarioCancha(db.Model):
     __tablename__ = 'horarios_cancha'
+    __table_args__ = (
+        # Horarios de una cancha por día (verificación de turnos, edición de la cancha)
+        db.Index('ix_horarios_cancha_cancha_dia_disponible', 'cancha_id', 'dia_semana', 'disponible'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     cancha_id = db.Column(db.Integer, db.ForeignKey('canchas.id'), nullable=False)
@@ -0,0 +1,17 @@
+# app/models/media_objeto.py
+from app.utils.database import db
+from datetime import datetime
+
+class MediaObjeto(db.Model):
+    """
+    Imagen procesada guardada por contenido: la clave deriva del SHA-256 del
+    original, así que subidas idénticas comparten archivos. ``referencias``
+    cuenta las filas (imágenes de cancha, posts, fotos de perfil) que la usan.
+    """
+    __tablename__ = 'media_objetos'
+
+    clave = db.Column(db.String(255), primary_key=True, comment="cas/<sha[:2]>/<sha>_<lado>.webp")
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    bytes_original = db.Column(db.BigInteger, nullable=True)
+    referencias = db.Column(db.Integer, nullable=False, default=1)
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Post(db.Model):
     __tablename__ = 'posts'
+    __table_args__ = (
+        # Feed paginado por keyset: WHERE eliminado = 0 ORDER BY created_at DESC, id DESC
+        db.Index('ix_posts_eliminado_created_at_id', 'eliminado', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -12,6 +16,9 @@ class Post(db.Model):
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
     eliminado = db.Column(db.Boolean, default=False)
+    # Contadores desnormalizados (los mantiene PostService en la misma transacción)
+    total_comentarios = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_likes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relaciones
     usuario = db.relationship('User', backref=db.backref('posts', lazy=True))
@@ -33,12 +40,16 @@ class Post(db.Model):
                 'name_user': self.usuario.name_user,
                 'urlphotoperfil': self.usuario.urlphotoperfil
             } if self.usuario else None,
-            'total_comentarios': len([c for c in self.comentarios if not c.eliminado]),
-            'total_likes': len(self.likes)
+            'total_comentarios': self.total_comentarios or 0,
+            'total_likes': self.total_likes or 0
         }
 
 class PostComentario(db.Model):
     __tablename__ = 'post_comentarios'
+    __table_args__ = (
+        # Comentarios de un post: WHERE post_id = ? AND eliminado = 0 ORDER BY created_at
+        db.Index('ix_post_comentarios_post_eliminado_created', 'post_id', 'eliminado', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False)
@@ -47,6 +58,8 @@ class PostComentario(db.Model):
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
     eliminado = db.Column(db.Boolean, default=False)
+    # Contador desnormalizado (lo mantiene PostService en la misma transacción)
+    total_likes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relaciones
     usuario = db.relationship('User', backref=db.backref('comentarios', lazy=True))
@@ -66,11 +79,15 @@ class PostComentario(db.Model):
                 'name_user': self.usuario.name_user,
                 'urlphotoperfil': self.usuario.urlphotoperfil
             } if self.usuario else None,
-            'total_likes': len(self.likes)
+            'total_likes': self.total_likes or 0
         }
 
 class PostLike(db.Model):
     __tablename__ = 'post_likes'
+    __table_args__ = (
+        # Un like por usuario y post; toggle_like_post se apoya en esta restricción
+        db.UniqueConstraint('post_id', 'usuario_id', name='uq_post_likes_post_usuario'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False)
@@ -87,6 +104,10 @@ class PostLike(db.Model):
 
 class ComentarioLike(db.Model):
     __tablename__ = 'comentario_likes'
+    __table_args__ = (
+        # Un like por usuario y comentario; toggle_like_comentario se apoya en esta restricción
+        db.UniqueConstraint('comentario_id', 'usuario_id', name='uq_comentario_likes_comentario_usuario'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     comentario_id = db.Column(db.Integer, db.ForeignKey('post_comentarios.id'), nullable=False)
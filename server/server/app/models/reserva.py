@@ -4,6 +4,13 @@ from decimal import Decimal
 
 class Reserva(db.Model):
     __tablename__ = 'reservas'
+    __table_args__ = (
+        # Un turno y un día por usuario solo pueden tener una reserva confirmada
+        db.UniqueConstraint('cancha_id', 'fecha', 'hora', 'slot_activo', name='uq_reservas_slot_activo'),
+        db.UniqueConstraint('user_id', 'fecha', 'slot_activo', name='uq_reservas_usuario_dia_activo'),
+        # Estos índices también sirven a las consultas por (cancha_id, fecha) y
+        # (user_id, fecha): no se agregan índices aparte con el mismo prefijo
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     cancha_id = db.Column(db.Integer, db.ForeignKey('canchas.id'), nullable=False)
@@ -11,6 +18,12 @@ class Reserva(db.Model):
     fecha = db.Column(db.Date, nullable=False)
     hora = db.Column(db.Time, nullable=False)
     estado = db.Column(db.String(20), default='pendiente')
+    # 1 si la reserva está confirmada y NULL en otro caso: los índices únicos
+    # ignoran los NULL, así que solo compiten las reservas activas
+    slot_activo = db.Column(
+        db.SmallInteger,
+        db.Computed("CASE WHEN estado = 'confirmada' THEN 1 ELSE NULL END", persisted=True)
+    )
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relaciones
@@ -1,9 +1,7 @@
+import logging
 import os
-import uuid
 import json
-from PIL import Image
 from flask import current_app, url_for
-from werkzeug.utils import secure_filename
 from datetime import datetime, time, timedelta
 from app.models.cancha import Cancha
 from app.models.imagen import Imagen
@@ -11,23 +9,38 @@ from app.models.horario_cancha import HorarioCancha
 from app.models.regla_cancha import ReglaCancha
 from app.models.amenidad_cancha import AmenidadCancha
 from app.utils.database import db
-from app.utils.auth_utils import obtener_usuario_desde_token
-from app.models.dia_festivo import DiaFestivo
-from app.models.reserva import Reserva
+from app.utils.replicas import solo_lectura
+from app.utils.auth_utils import obtener_contexto_auth
+from app.services.auth.disponibilidad_service import DisponibilidadService
+from app.utils.cache import CacheVersionada, invalidar_al_confirmar
+from app.services.media.imagen_pipeline import ImagenPipeline, VARIANTES, ruta_variante
+from app.services.media.almacenamiento import clave_desde_url, obtener_almacenamiento
 from sqlalchemy import Numeric
-import calendar
+from sqlalchemy.orm import selectinload
+
+logger = logging.getLogger(__name__)
+
+# Catálogo de canchas activas; se invalida al confirmar cambios en la cancha o sus hijos
+_catalogo_cache = CacheVersionada(
+    'catalogo_canchas',
+    ttl_segundos=int(os.getenv('CANCHAS_CACHE_TTL', '300'))
+)
+invalidar_al_confirmar(_catalogo_cache, Cancha, Imagen, HorarioCancha, ReglaCancha, AmenidadCancha)
+
+# Tope del ZIP de imágenes de una cancha (suma de los archivos)
+CANCHAS_PAQUETE_MAX_BYTES = int(os.getenv('CANCHAS_PAQUETE_MAX_BYTES', str(25 * 1024 * 1024)))
 
 class CanchaService:
 
     @staticmethod
     def crear_cancha_con_todo(data, imagenes_files=None):
-        print("🔍 Iniciando creación de cancha en servicio...")
+        logger.debug('Iniciando creación de cancha en servicio...')
         
-        usuario, error, status = obtener_usuario_desde_token()
+        usuario, error, status = obtener_contexto_auth()
         if error:
             raise PermissionError("Usuario no autenticado")
         
-        print(f"✅ Usuario autenticado: {usuario.email}")
+        logger.debug('Usuario autenticado: ID %s', usuario.id)
 
         # Crear cancha
         cancha = Cancha(
@@ -58,7 +71,7 @@ class CanchaService:
                         urls_imagenes.append(url_imagen)
                         imagen = Imagen(cancha_id=cancha.id, url_imagen=url_imagen, orden=i)
                         db.session.add(imagen)
-                        print(f"📸 Imagen convertida a WebP: {url_imagen}")
+                        logger.debug('Imagen convertida a WebP: %s', url_imagen)
 
         # URLs de imágenes (compatibilidad)
         for i, url in enumerate(data.get('imagenes', [])):
@@ -72,61 +85,16 @@ class CanchaService:
         CanchaService._procesar_amenidades(data.get('amenidades', []), cancha.id)
 
         db.session.commit()
-        print("✅ Cancha creada exitosamente")
+        logger.debug('Cancha creada exitosamente')
         return cancha
 
     @staticmethod
     def _guardar_y_convertir_a_webp(imagen_file, cancha_id):
         """
-        Guardar imagen y convertir a WebP como archivo
+        Guardar el original y encolar su conversión a WebP.
+        Devuelve la ruta definitiva del WebP (pendiente hasta que el pool termine).
         """
-        try:
-            # Crear directorios
-            upload_folder = os.path.join(current_app.root_path, 'utils', 'pictures', 'canchas', str(cancha_id))
-            webp_folder = os.path.join(upload_folder, 'webp')
-            os.makedirs(webp_folder, exist_ok=True)
-            
-            # Generar nombres únicos
-            original_filename = secure_filename(imagen_file.filename)
-            name_without_ext = os.path.splitext(original_filename)[0]
-            unique_id = uuid.uuid4().hex
-            
-            # Guardar original temporalmente
-            temp_path = os.path.join(upload_folder, f"temp_{unique_id}_{original_filename}")
-            imagen_file.save(temp_path)
-            
-            try:
-                # Abrir y procesar imagen
-                with Image.open(temp_path) as img:
-                    # Convertir a RGB si es necesario
-                    if img.mode in ('RGBA', 'P'):
-                        img = img.convert('RGB')
-                    
-                    # Redimensionar si es muy grande (máximo 1200px en el lado más largo)
-                    max_size = (1200, 1200)
-                    img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                    
-                    # Guardar como WebP
-                    webp_filename = f"{unique_id}_{name_without_ext}.webp"
-                    webp_path = os.path.join(webp_folder, webp_filename)
-                    
-                    # Guardar con calidad optimizada
-                    img.save(webp_path, 'WEBP', quality=80, optimize=True)
-                    
-                    # Retornar ruta relativa del WebP para guardar en BD
-                    relative_path = f"/utils/pictures/canchas/{cancha_id}/webp/{webp_filename}"
-                    print(f"🖼️ Imagen convertida a WebP: {original_filename} -> {webp_filename}")
-                    
-                    return relative_path
-                    
-            finally:
-                # Eliminar archivo temporal
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-            
-        except Exception as e:
-            print(f"❌ Error al procesar imagen: {str(e)}")
-            return None
+        return ImagenPipeline.encolar(imagen_file, max_lado=1200, calidad=80)
 
     @staticmethod
     def _procesar_horarios(horarios, cancha_id):
@@ -158,11 +126,31 @@ class CanchaService:
             db.session.add(a)
 
     @staticmethod
+    @solo_lectura
     def obtener_todas_las_canchas():
-        """Obtener todas las canchas con URLs de imágenes WebP y horarios"""
-        print("🔍 Obteniendo todas las canchas activas")
-        canchas = Cancha.query.filter_by(estado='activa').all()
-        print(f"✅ Encontradas {len(canchas)} canchas activas")
+        """
+        Obtener todas las canchas con URLs de imágenes WebP y horarios.
+        El resultado se comparte entre peticiones: no debe modificarse.
+        """
+        return _catalogo_cache.obtener('activas', CanchaService._construir_catalogo)
+
+    @staticmethod
+    def _construir_catalogo():
+        """Construir el catálogo cargando las relaciones en lote (1 + 4 consultas)"""
+        logger.debug('Obteniendo todas las canchas activas')
+        canchas = (
+            Cancha.query
+            .options(
+                selectinload(Cancha.imagenes),
+                selectinload(Cancha.horarios),
+                selectinload(Cancha.reglas),
+                selectinload(Cancha.amenidades)
+            )
+            .filter_by(estado='activa')
+            .order_by(Cancha.id)
+            .all()
+        )
+        logger.debug('Encontradas %s canchas activas', len(canchas))
         
         canchas_dict = []
         for cancha in canchas:
@@ -190,10 +178,12 @@ class CanchaService:
             for img in cancha.imagenes:
                 if img.url_imagen.startswith('/utils/pictures/'):
                     # Es una imagen local WebP
+                    url_webp = CanchaService._construir_url_accesible(img.url_imagen, cancha.id)
                     cancha_data['imagenes_webp'].append({
                         'id': img.id,
                         'orden': img.orden,
-                        'url_webp': CanchaService._construir_url_accesible(img.url_imagen, cancha.id),
+                        'url_webp': url_webp,
+                        'srcset': ImagenPipeline.srcset(url_webp),  # Variantes 96/320/800/1200
                         'nombre': os.path.basename(img.url_imagen),
                         'formato': 'webp'
                     })
@@ -244,121 +234,73 @@ class CanchaService:
         return f"/cancha/{cancha_id}/imagen-webp/{filename}"
 
     @staticmethod
+    def preparar_paquete_imagenes(cancha_id, lado=None):
+        """
+        Entradas ``(nombre, clave, tamaño)`` con las imágenes locales ya
+        procesadas de la cancha, para empaquetarlas en un ZIP. ``lado`` elige
+        una variante (96, 320, 800, 1200); sin él se usa el archivo base.
+        Devuelve None si la cancha no existe y lanza ValueError si ``lado`` no
+        es válido o el total supera CANCHAS_PAQUETE_MAX_BYTES.
+        """
+        if lado is not None and lado not in VARIANTES:
+            raise ValueError(f"lado debe ser uno de {', '.join(str(v) for v in VARIANTES)}")
+
+        cancha = Cancha.query.get(cancha_id)
+        if not cancha:
+            return None
+
+        almacenamiento = obtener_almacenamiento()
+        entradas = []
+        total = 0
+        for img in sorted(cancha.imagenes, key=lambda i: (i.orden or 0, i.id)):
+            clave = clave_desde_url(img.url_imagen)
+            if clave is None:
+                continue  # URL externa
+            if lado is not None and lado < 1200:
+                clave = ImagenPipeline.resolver_variante(almacenamiento, ruta_variante(clave, lado))
+            if not almacenamiento.existe(clave):
+                continue  # Aún en proceso o con error
+
+            tamano = almacenamiento.tamano(clave)
+            total += tamano
+            if total > CANCHAS_PAQUETE_MAX_BYTES:
+                raise ValueError(
+                    f"Las imágenes superan el máximo de {CANCHAS_PAQUETE_MAX_BYTES / (1024 * 1024):.1f} MB; "
+                    "pide una variante más pequeña con el parámetro lado"
+                )
+            entradas.append((f"{len(entradas) + 1:02d}_{os.path.basename(clave)}", clave, tamano))
+
+        logger.debug('Paquete de imágenes de cancha %s: %s archivos, %s bytes', cancha_id, len(entradas), total)
+        return entradas
+
+    @staticmethod
+    @solo_lectura
     def obtener_cancha_por_id(cancha_id):
-        print(f"🔍 Buscando cancha ID: {cancha_id}")
+        logger.debug('Buscando cancha ID: %s', cancha_id)
         cancha = Cancha.query.get(cancha_id)
         if cancha:
-            print(f"✅ Cancha encontrada: {cancha.nombre}")
+            logger.debug('Cancha encontrada: %s', cancha.nombre)
         else:
-            print("❌ Cancha no encontrada")
+            logger.info('Cancha no encontrada')
         return cancha
     
     @staticmethod
+    @solo_lectura
     def obtener_horarios_disponibles(cancha_id: int, fecha_str: str):
-        print(f"🔍 Obteniendo horarios disponibles para cancha {cancha_id} en fecha {fecha_str}")
+        logger.debug('Obteniendo horarios disponibles para cancha %s en fecha %s', cancha_id, fecha_str)
         
         fecha = datetime.strptime(fecha_str, "%Y-%m-%d").date()
 
-        # Verificar si es festivo
-        festivo = DiaFestivo.query.filter_by(fecha=fecha).first()
-        if festivo:
-            tipo_dia = 'domingo'  # O el tipo que uses para festivos
-            print(f"🎉 Fecha {fecha_str} es festivo, se usa tipo: {tipo_dia}")
-        else:
-            dias_map = {
-                'monday': 'lunes',
-                'tuesday': 'martes',
-                'wednesday': 'miercoles',
-                'thursday': 'jueves',
-                'friday': 'viernes',
-                'saturday': 'sabado',
-                'sunday': 'domingo'
-            }  
-            dia_semana = calendar.day_name[fecha.weekday()].lower()
-            tipo_dia = dias_map.get(dia_semana)
-            print(f"📅 Fecha {fecha_str} es {tipo_dia}")
-
-        # Obtener horarios de ese día para la cancha (NUEVO: rangos)
-        horarios_rango = HorarioCancha.query.filter_by(
-            cancha_id=cancha_id, 
-            dia_semana=tipo_dia,
-            disponible=True
-        ).all()
-
-        # Generar todos los horarios disponibles desde los rangos
-        todos_horarios_disponibles = set()
-        for horario_rango in horarios_rango:
-            horarios_generados = CanchaService._generar_horarios_desde_rango(
-                horario_rango.hora_inicio, 
-                horario_rango.hora_fin, 
-                horario_rango.intervalo_minutos
-            )
-            todos_horarios_disponibles.update(horarios_generados)
-        
-        print(f"🕒 Horarios configurados: {sorted(todos_horarios_disponibles)}")
-
-        # Obtener reservas ya hechas para esa cancha en esa fecha
-        reservas = Reserva.query.filter_by(cancha_id=cancha_id, fecha=fecha).all()
-        horas_reservadas = {r.hora.strftime('%H:%M') for r in reservas}
-        print(f"🔒 Horarios reservados: {sorted(horas_reservadas)}")
-
-        # Calcular horarios disponibles
-        disponibles = sorted(todos_horarios_disponibles - horas_reservadas)
-        print(f"✅ Horarios disponibles: {disponibles}")
+        # Plantilla precalculada del día (festivos usan domingo) menos las horas reservadas
+        disponibles = DisponibilidadService.horas_disponibles(cancha_id, fecha)
+        logger.debug('Horarios disponibles: %s', disponibles)
 
         return disponibles
 
-    @staticmethod
-    def _generar_horarios_desde_rango(hora_inicio: time, hora_fin: time, intervalo_minutos: int):
-        """
-        Generar lista de horarios basado en un rango y intervalo
-        """
-        horarios = []
-        current_time = datetime.combine(datetime.today(), hora_inicio)
-        end_time = datetime.combine(datetime.today(), hora_fin)
-
-        while current_time < end_time:
-            horarios.append(current_time.time().strftime('%H:%M'))
-            current_time += timedelta(minutes=intervalo_minutos)
-
-        return horarios
-
     @staticmethod
     def verificar_disponibilidad_horario(cancha_id: int, dia_semana: str, hora_solicitada: str):
         """
         Verificar si un horario específico está disponible según los rangos configurados
         """
         hora_time = datetime.strptime(hora_solicitada, '%H:%M').time()
-        
-        horarios_disponibles = HorarioCancha.query.filter_by(
-            cancha_id=cancha_id,
-            dia_semana=dia_semana,
-            disponible=True
-        ).all()
-
-        for horario in horarios_disponibles:
-            if CanchaService._hora_en_rango(hora_time, horario.hora_inicio, horario.hora_fin, horario.intervalo_minutos):
-                return True
-        
-        return False
-
-    @staticmethod
-    def _hora_en_rango(hora_solicitada: time, hora_inicio: time, hora_fin: time, intervalo_minutos: int):
-        """
-        Verificar si una hora específica está dentro de un rango considerando el intervalo
-        """
-        hora_solicitada_dt = datetime.combine(datetime.today(), hora_solicitada)
-        inicio_dt = datetime.combine(datetime.today(), hora_inicio)
-        fin_dt = datetime.combine(datetime.today(), hora_fin)
-
-        # Verificar que esté dentro del rango general
-        if not (inicio_dt <= hora_solicitada_dt < fin_dt):
-            return False
-
-        # Verificar que coincida con el intervalo
-        tiempo_desde_inicio = hora_solicitada_dt - inicio_dt
-        minutos_desde_inicio = tiempo_desde_inicio.total_seconds() / 60
-        
-        return minutos_desde_inicio % intervalo_minutos == 0
-    
-    
\ No newline at end of file
+        return DisponibilidadService.hora_en_plantilla(cancha_id, dia_semana, hora_time)
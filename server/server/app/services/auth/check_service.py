@@ -1,7 +1,11 @@
+import logging
+
 from flask import request
 import jwt
 from app.utils.config import Config
 
+logger = logging.getLogger(__name__)
+
 class AuthService:
     @staticmethod
     def check_session():
@@ -11,13 +15,10 @@ class AuthService:
         Returns:
             tuple: (response_data, status_code)
         """
-        print("\n=== [SERVICE] Verificación de sesión ===")
-
         token = request.cookies.get('liga_token')
-        print("🍪 Token recibido:", token)
 
         if not token:
-            print("❌ No se recibió token (usuario no autenticado).")
+            logger.debug('Verificación de sesión sin token')
             return {
                 'authenticated': False, 
                 'message': 'No autenticado'
@@ -26,7 +27,7 @@ class AuthService:
         try:
             # Decodificar el token JWT
             data = jwt.decode(token, Config.SECRET_KEY, algorithms=['HS256'])
-            print("✅ Token válido. Datos decodificados:", data)
+            logger.debug('Sesión válida para el usuario %s', data.get('id'))
 
             # Respuesta exitosa
             return {
@@ -36,21 +37,21 @@ class AuthService:
             }, 200
 
         except jwt.ExpiredSignatureError:
-            print("⌛ Token expirado")
+            logger.debug('Token expirado')
             return {
                 'authenticated': False, 
                 'message': 'Token expirado'
             }, 401
 
         except jwt.InvalidTokenError:
-            print("🚫 Token inválido")
+            logger.info('Token inválido en verificación de sesión')
             return {
                 'authenticated': False, 
                 'message': 'Token inválido'
             }, 401
 
         except Exception as e:
-            print("💥 Error inesperado en el servicio:", str(e))
+            logger.exception('Error inesperado al verificar sesión: %s', e)
             return {
                 'authenticated': False, 
                 'message': 'Error interno del servidor'
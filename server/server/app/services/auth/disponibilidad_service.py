@@ -0,0 +1,179 @@
+import os
+from datetime import date, timedelta
+
+from app.models.dia_festivo import DiaFestivo
+from app.models.horario_cancha import HorarioCancha
+from app.models.reserva import Reserva
+from app.utils.cache import CacheVersionada, invalidar_al_confirmar
+from app.utils.database import db
+
+# Índice = date.weekday()
+DIAS_SEMANA = ('lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo')
+TIPO_DIA_FESTIVO = 'domingo'
+
+# Etiqueta 'HH:MM' precalculada para cada minuto del día
+_HORAS = tuple(f'{m // 60:02d}:{m % 60:02d}' for m in range(24 * 60))
+
+_TTL = int(os.getenv('DISPONIBILIDAD_CACHE_TTL', '300'))
+
+# Límites de la consulta por lotes
+MAX_DIAS_RANGO = int(os.getenv('DISPONIBILIDAD_MAX_DIAS', '31'))
+MAX_CANCHAS_LOTE = int(os.getenv('DISPONIBILIDAD_MAX_CANCHAS', '50'))
+
+# {cancha_id: {dia_semana: bitset}}; se invalida al confirmar cambios en horarios
+_plantillas_cache = CacheVersionada('plantillas_horario', ttl_segundos=_TTL)
+invalidar_al_confirmar(_plantillas_cache, HorarioCancha)
+
+# frozenset de fechas festivas; se invalida al confirmar cambios en festivos
+_festivos_cache = CacheVersionada('dias_festivos', ttl_segundos=_TTL)
+invalidar_al_confirmar(_festivos_cache, DiaFestivo)
+
+
+def minuto_del_dia(hora):
+    """Minutos transcurridos desde las 00:00 para un ``time``"""
+    return hora.hour * 60 + hora.minute
+
+
+def bits_a_horas(bits):
+    """Convertir un bitset de minutos en la lista ordenada de horas 'HH:MM'"""
+    horas = []
+    while bits:
+        menor = bits & -bits
+        horas.append(_HORAS[menor.bit_length() - 1])
+        bits ^= menor
+    return horas
+
+
+class DisponibilidadService:
+    """
+    Disponibilidad de canchas sobre plantillas precalculadas.
+
+    Cada plantilla es un entero donde el bit ``m`` indica que a partir del
+    minuto ``m`` del día empieza un turno reservable. La disponibilidad de
+    una fecha es la plantilla menos los bits de las horas ya reservadas.
+    """
+
+    @staticmethod
+    def tipo_dia(fecha: date, festivos=None):
+        """Día de la semana que aplica a la fecha (los festivos usan el horario de domingo)"""
+        if festivos is None:
+            festivos = DisponibilidadService.obtener_festivos()
+        if fecha in festivos:
+            return TIPO_DIA_FESTIVO
+        return DIAS_SEMANA[fecha.weekday()]
+
+    @staticmethod
+    def obtener_festivos():
+        return _festivos_cache.obtener('todos', DisponibilidadService._cargar_festivos)
+
+    @staticmethod
+    def _cargar_festivos():
+        return frozenset(fecha for (fecha,) in db.session.query(DiaFestivo.fecha))
+
+    @staticmethod
+    def obtener_plantillas():
+        """Plantillas de todas las canchas: {cancha_id: {dia_semana: bitset}}"""
+        return _plantillas_cache.obtener('todas', DisponibilidadService._cargar_plantillas)
+
+    @staticmethod
+    def _cargar_plantillas():
+        plantillas = {}
+        rangos = db.session.query(
+            HorarioCancha.cancha_id,
+            HorarioCancha.dia_semana,
+            HorarioCancha.hora_inicio,
+            HorarioCancha.hora_fin,
+            HorarioCancha.intervalo_minutos
+        ).filter(HorarioCancha.disponible == True)
+
+        for cancha_id, dia_semana, hora_inicio, hora_fin, intervalo in rangos:
+            paso = intervalo or 60
+            if paso <= 0:
+                continue
+            bits = 0
+            for minuto in range(minuto_del_dia(hora_inicio), minuto_del_dia(hora_fin), paso):
+                bits |= 1 << minuto
+            dias = plantillas.setdefault(cancha_id, {})
+            dias[dia_semana] = dias.get(dia_semana, 0) | bits
+        return plantillas
+
+    @staticmethod
+    def plantilla(cancha_id: int, dia_semana: str):
+        return DisponibilidadService.obtener_plantillas().get(cancha_id, {}).get(dia_semana, 0)
+
+    @staticmethod
+    def hora_en_plantilla(cancha_id: int, dia_semana: str, hora):
+        """Verificar si la hora coincide con el inicio de un turno configurado"""
+        return bool(DisponibilidadService.plantilla(cancha_id, dia_semana) >> minuto_del_dia(hora) & 1)
+
+    @staticmethod
+    def bits_reservados(horas):
+        bits = 0
+        for hora in horas:
+            bits |= 1 << minuto_del_dia(hora)
+        return bits
+
+    @staticmethod
+    def horas_disponibles(cancha_id: int, fecha: date):
+        """Horas 'HH:MM' libres de la cancha en la fecha"""
+        dia_semana = DisponibilidadService.tipo_dia(fecha)
+        plantilla = DisponibilidadService.plantilla(cancha_id, dia_semana)
+        if not plantilla:
+            return []
+
+        reservadas = db.session.query(Reserva.hora).filter(
+            Reserva.cancha_id == cancha_id,
+            Reserva.fecha == fecha
+        )
+        ocupados = DisponibilidadService.bits_reservados(hora for (hora,) in reservadas)
+        return bits_a_horas(plantilla & ~ocupados)
+
+    @staticmethod
+    def disponibilidad_por_rango(cancha_ids, desde: date, hasta: date):
+        """
+        Validar la consulta y devolver un generador de
+        ``(cancha_id, fecha, horas_disponibles)`` ordenado por cancha y fecha.
+        """
+        cancha_ids = sorted(set(cancha_ids))
+        if not cancha_ids:
+            raise ValueError("Debe indicar al menos una cancha")
+        if len(cancha_ids) > MAX_CANCHAS_LOTE:
+            raise ValueError(f"Máximo {MAX_CANCHAS_LOTE} canchas por consulta")
+        if hasta < desde:
+            raise ValueError("La fecha 'hasta' debe ser igual o posterior a 'desde'")
+        dias = (hasta - desde).days + 1
+        if dias > MAX_DIAS_RANGO:
+            raise ValueError(f"El rango no puede superar {MAX_DIAS_RANGO} días")
+
+        return DisponibilidadService._generar_rango(cancha_ids, desde, dias)
+
+    @staticmethod
+    def _generar_rango(cancha_ids, desde, dias):
+        festivos = DisponibilidadService.obtener_festivos()
+        plantillas = DisponibilidadService.obtener_plantillas()
+        fechas = [desde + timedelta(days=i) for i in range(dias)]
+        tipos = [DisponibilidadService.tipo_dia(fecha, festivos) for fecha in fechas]
+
+        # Una sola consulta para todo el rango, leída por bloques y en el mismo
+        # orden (cancha, fecha) en que se recorre la salida
+        reservas = iter(
+            db.session.query(Reserva.cancha_id, Reserva.fecha, Reserva.hora)
+            .filter(
+                Reserva.cancha_id.in_(cancha_ids),
+                Reserva.fecha >= fechas[0],
+                Reserva.fecha <= fechas[-1]
+            )
+            .order_by(Reserva.cancha_id, Reserva.fecha)
+            .yield_per(500)
+        )
+        actual = next(reservas, None)
+
+        for cancha_id in cancha_ids:
+            dias_cancha = plantillas.get(cancha_id, {})
+            for fecha, tipo in zip(fechas, tipos):
+                ocupados = 0
+                while actual is not None and (actual.cancha_id, actual.fecha) <= (cancha_id, fecha):
+                    if actual.cancha_id == cancha_id and actual.fecha == fecha:
+                        ocupados |= 1 << minuto_del_dia(actual.hora)
+                    actual = next(reservas, None)
+                yield cancha_id, fecha, bits_a_horas(dias_cancha.get(tipo, 0) & ~ocupados)
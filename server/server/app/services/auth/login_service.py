@@ -1,3 +1,5 @@
+import logging
+
 from app.models.user_model import User
 from app.utils.database import db
 from app.models.owner_model import Owner
@@ -9,23 +11,23 @@ from flask import make_response, jsonify
 from datetime import datetime, timedelta
 from app.utils.config import Config
 
+logger = logging.getLogger(__name__)
+
 class AuthLoginService:
     @staticmethod
     def login_user(data):
         try:
-            print("🔍 Buscando usuario...")
             user = User.query.filter_by(email=data['email']).first()
             if not user:
                 return make_response(jsonify({'message': 'El email ingresado no está registrado'}), 401)
 
-            print("🔐 Verificando contraseña...")
             input_pw = data['password'].encode('utf-8')
             stored_pw = user.password.encode('utf-8')
 
             if not bcrypt.checkpw(input_pw, stored_pw):
                 return make_response(jsonify({'message': 'La contraseña es incorrecta'}), 401)
 
-            print(f"🎭 Role detectado: {user.role}")  # Cambié .value por .role directo
+            logger.debug('Login del usuario %s con rol %s', user.id, user.role)
 
             # Generar JWT
             payload = {
@@ -36,7 +38,6 @@ class AuthLoginService:
             token = jwt.encode(payload, Config.SECRET_KEY, algorithm='HS256')
 
             # Preparar respuesta
-            print("📦 Generando respuesta JSON...")
             response = make_response(jsonify({
                 'message': 'Inicio de sesión exitoso',
                 'user': {
@@ -56,9 +57,8 @@ class AuthLoginService:
                 max_age=86400
             )
 
-            print("✅ Login exitoso.")
             return response
 
         except Exception as e:
-            print("❌ Error durante el login:", str(e))
+            logger.exception('Error durante el login: %s', e)
             return make_response(jsonify({'message': 'Error interno del servidor'}), 500)
\ No newline at end of file
@@ -1,20 +1,25 @@
+import logging
 import os
-import uuid
-from PIL import Image
-from flask import current_app
-from werkzeug.utils import secure_filename
 from app.models.post_model import Post, PostComentario, PostLike, ComentarioLike
 from app.models.user_model import User
 from app.utils.database import db
+from app.utils.replicas import solo_lectura
+from app.services.media.imagen_pipeline import ImagenPipeline, LADO_PERFIL
 from datetime import datetime
+from math import ceil
+from sqlalchemy import func, select, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+logger = logging.getLogger(__name__)
 
 class PostService:
     @staticmethod
     def crear_post(usuario_id: int, data: dict, imagen_file=None) -> dict:
         """Crear una nueva publicación con soporte para imágenes"""
         try:
-            print("📝 Iniciando creación de post...")
-            print(f"👤 Usuario autenticado ID: {usuario_id}")
+            logger.debug('Iniciando creación de post...')
+            logger.debug('Usuario autenticado ID: %s', usuario_id)
             
             # Validar campos requeridos
             required_fields = ['tipo_post', 'contenido']
@@ -30,15 +35,15 @@ class PostService:
             imagen_url = None
             if data['tipo_post'] == 'foto':
                 if imagen_file and imagen_file.filename:
-                    print("🖼️ Procesando imagen del post...")
+                    logger.debug('Procesando imagen del post...')
                     imagen_url = PostService._guardar_y_convertir_a_webp(imagen_file, usuario_id, 'post')
                     if not imagen_url:
                         raise ValueError("Error al procesar la imagen del post")
-                    print(f"📷 Imagen del post guardada: {imagen_url}")
+                    logger.debug('Imagen del post guardada: %s', imagen_url)
                 elif data.get('imagen_url'):
                     # URL existente (compatibilidad)
                     imagen_url = data['imagen_url']
-                    print(f"📷 URL de imagen del post: {imagen_url}")
+                    logger.debug('URL de imagen del post: %s', imagen_url)
                 else:
                     raise ValueError("Los posts de tipo 'foto' deben incluir una imagen")
             
@@ -53,7 +58,7 @@ class PostService:
             db.session.add(post)
             db.session.commit()
             
-            print("✅ Post creado exitosamente")
+            logger.debug('Post creado exitosamente')
             return {
                 'message': 'Post creado exitosamente',
                 'post': PostService._post_to_dict(post)
@@ -61,66 +66,24 @@ class PostService:
             
         except Exception as e:
             db.session.rollback()
-            print(f"❌ Error al crear post: {str(e)}")
+            logger.exception('Error al crear post: %s', e)
             raise e
 
     @staticmethod
     def _guardar_y_convertir_a_webp(imagen_file, user_id, tipo='post'):
         """
-        Guardar imagen y convertir a WebP como archivo - EXACTAMENTE IGUAL QUE CANCHAS Y PROFILE
+        Guardar el original y encolar su conversión a WebP.
+        Devuelve la ruta definitiva del WebP (pendiente hasta que el pool termine).
         """
-        try:
-            # Crear directorios específicos para posts - Misma estructura que canchas y profile
-            upload_folder = os.path.join(current_app.root_path, 'utils', 'pictures', 'posts', str(user_id))
-            webp_folder = os.path.join(upload_folder, 'webp')
-            os.makedirs(webp_folder, exist_ok=True)
-            
-            # Generar nombres únicos - Mismo formato que canchas y profile
-            original_filename = secure_filename(imagen_file.filename)
-            name_without_ext = os.path.splitext(original_filename)[0]
-            unique_id = uuid.uuid4().hex
-            
-            # Guardar original temporalmente
-            temp_path = os.path.join(upload_folder, f"temp_{unique_id}_{original_filename}")
-            imagen_file.save(temp_path)
-            
-            try:
-                # Abrir y procesar imagen - Mismo procesamiento que canchas y profile
-                with Image.open(temp_path) as img:
-                    # Convertir a RGB si es necesario
-                    if img.mode in ('RGBA', 'P'):
-                        img = img.convert('RGB')
-                    
-                    # Redimensionar (máximo 1200px como canchas)
-                    max_size = (1200, 1200)
-                    img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                    
-                    # Guardar como WebP - Mismo formato que canchas y profile
-                    webp_filename = f"{unique_id}_{name_without_ext}.webp"
-                    webp_path = os.path.join(webp_folder, webp_filename)
-                    
-                    # Guardar con calidad optimizada
-                    img.save(webp_path, 'WEBP', quality=80, optimize=True)
-                    
-                    # Retornar ruta relativa del WebP para guardar en BD - Mismo formato
-                    relative_path = f"/utils/pictures/posts/{user_id}/webp/{webp_filename}"
-                    print(f"🖼️ Imagen de post convertida a WebP: {original_filename} -> {webp_filename}")
-                    
-                    return relative_path
-                    
-            finally:
-                # Eliminar archivo temporal - Misma limpieza que canchas y profile
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-            
-        except Exception as e:
-            print(f"❌ Error al procesar imagen de post: {str(e)}")
-            return None
+        return ImagenPipeline.encolar(imagen_file, max_lado=1200, calidad=80)
 
-    
     @staticmethod
-    def _post_to_dict(post: Post) -> dict:
-        """Convertir objeto Post a diccionario con URLs accesibles"""
+    def _post_to_dict(post: Post, autor: dict = None) -> dict:
+        """Convertir objeto Post a diccionario con URLs accesibles
+
+        Si se pasan los datos del autor (precalculados por la query del feed)
+        no se dispara ninguna consulta adicional.
+        """
         post_dict = {
             'id': post.id,
             'usuario_id': post.usuario_id,
@@ -129,33 +92,46 @@ class PostService:
             'created_at': post.created_at.isoformat() if post.created_at else None,
             'updated_at': post.updated_at.isoformat() if post.updated_at else None,
             'eliminado': post.eliminado,
-            'total_comentarios': getattr(post, 'total_comentarios', 0),
-            'total_likes': getattr(post, 'total_likes', 0)
+            'total_comentarios': post.total_comentarios or 0,
+            'total_likes': post.total_likes or 0
         }
         
+        # Sin datos precalculados se usa la relación (carga perezosa)
+        if autor is None and post.usuario:
+            autor = {
+                'id': post.usuario.id,
+                'name_user': post.usuario.name_user,
+                'urlphotoperfil': post.usuario.urlphotoperfil
+            }
+        
         # ✅ INFORMACIÓN DEL USUARIO CON FOTO DE PERFIL ACCESIBLE (IGUAL QUE EL SERVICIO DE PERFIL)
-        if hasattr(post, 'usuario') and post.usuario:
+        if autor:
             # Construir URL accesible para la foto de perfil - MISMO PATRÓN QUE EL SERVICIO DE PERFIL
-            url_foto_accesible = post.usuario.urlphotoperfil
-            if post.usuario.urlphotoperfil and post.usuario.urlphotoperfil.startswith('/utils/pictures/'):
-                filename = os.path.basename(post.usuario.urlphotoperfil)
-                url_foto_accesible = f"/player/{post.usuario.id}/imagen-perfil/{filename}"
-                print(f"🔗 URL de imagen de perfil construida: {url_foto_accesible}")
+            url_foto_accesible = autor['urlphotoperfil']
+            srcset_foto = None
+            if url_foto_accesible and url_foto_accesible.startswith('/utils/pictures/'):
+                filename = os.path.basename(url_foto_accesible)
+                url_foto_accesible = f"/player/{autor['id']}/imagen-perfil/{filename}"
+                logger.debug('URL de imagen de perfil construida: %s', url_foto_accesible)
+                srcset_foto = ImagenPipeline.srcset(url_foto_accesible, max_lado=LADO_PERFIL)
             
             post_dict['usuario'] = {
-                'id': post.usuario.id,
-                'name_user': post.usuario.name_user,
-                'urlphotoperfil': url_foto_accesible  # ✅ URL ACCESIBLE CORREGIDA
+                'id': autor['id'],
+                'name_user': autor['name_user'],
+                'urlphotoperfil': url_foto_accesible,  # ✅ URL ACCESIBLE CORREGIDA
+                'urlphotoperfil_srcset': srcset_foto  # Avatares: la variante de 96px basta
             }
         
         # ✅ ESTRUCTURA DE IMÁGENES DEL POST (MANTENER LA ACTUAL)
         post_dict['imagenes_webp'] = []
         if post.imagen_url and post.imagen_url.startswith('/utils/pictures/'):
             filename = os.path.basename(post.imagen_url)
+            url_webp = f"/posts/{post.usuario_id}/imagen-post/{filename}"
             imagen_info = {
                 'id': post.id,
                 'orden': 0,
-                'url_webp': f"/posts/{post.usuario_id}/imagen-post/{filename}",
+                'url_webp': url_webp,
+                'srcset': ImagenPipeline.srcset(url_webp),
                 'nombre': filename,
                 'formato': 'webp'
             }
@@ -163,87 +139,181 @@ class PostService:
         
         # Mantener compatibilidad
         post_dict['imagen_url_accesible'] = post_dict['imagenes_webp'][0]['url_webp'] if post_dict['imagenes_webp'] else None
+        post_dict['imagen_srcset'] = post_dict['imagenes_webp'][0]['srcset'] if post_dict['imagenes_webp'] else None
         
         return post_dict
 
     @staticmethod
-    def obtener_posts(pagina: int = 1, por_pagina: int = 10) -> dict:
-        """Obtener lista de posts paginados con información completa del usuario"""
+    def _consulta_feed():
+        """
+        Query base del feed: el post (con sus contadores desnormalizados) y las
+        columnas del autor en una sola sentencia SQL
+        """
+        return db.session.query(
+            Post,
+            User.name_user.label('autor_nombre'),
+            User.urlphotoperfil.label('autor_foto')
+        ).join(User, User.id == Post.usuario_id).filter(Post.eliminado == False)
+
+    @staticmethod
+    def _fila_feed_to_dict(fila) -> dict:
+        """Convertir una fila de la query del feed a diccionario"""
+        return PostService._post_to_dict(
+            fila.Post,
+            autor={
+                'id': fila.Post.usuario_id,
+                'name_user': fila.autor_nombre,
+                'urlphotoperfil': fila.autor_foto
+            }
+        )
+
+    @staticmethod
+    def _paginar_feed(query, orden, pagina: int, por_pagina: int):
+        """
+        Paginar una query del feed con OFFSET
+        Retorna (filas, total, total_paginas)
+        """
+        pagina = max(pagina, 1)
+        por_pagina = max(por_pagina, 1)
+        
+        # Un solo COUNT sobre la query filtrada (sin ORDER BY ni subconsultas)
+        total = query.with_entities(func.count(Post.id)).order_by(None).scalar()
+        
+        filas = query.order_by(*orden).limit(por_pagina).offset((pagina - 1) * por_pagina).all()
+        total_paginas = ceil(total / por_pagina) if total else 0
+        
+        return filas, total, total_paginas
+
+    @staticmethod
+    def _parsear_cursor(after: str):
+        """Parsear un cursor con formato '<created_at ISO 8601>,<id>'"""
         try:
-            print(f"📄 Obteniendo posts - página {pagina}")
-            
-            # Query base para posts no eliminados con JOIN para traer información del usuario
-            query = db.session.query(Post).join(User).filter(
-                Post.eliminado == False,
-                User.id == Post.usuario_id
+            fecha_str, id_str = after.rsplit(',', 1)
+            return datetime.fromisoformat(fecha_str.strip()), int(id_str)
+        except ValueError:
+            raise ValueError("Cursor inválido. Formato esperado: <created_at>,<id>")
+
+    @staticmethod
+    def _paginar_feed_cursor(query, col_fecha, col_id, after: str, por_pagina: int, incluir_total: bool = False):
+        """
+        Paginar una query del feed por keyset sobre (col_fecha, col_id) descendente
+        Retorna (filas, total, siguiente_cursor); total es None si no se pidió
+        """
+        por_pagina = max(por_pagina, 1)
+        
+        # El COUNT(*) solo se hace si el cliente lo pide explícitamente
+        total = None
+        if incluir_total:
+            total = query.with_entities(func.count(Post.id)).order_by(None).scalar()
+        
+        # Seek: filas estrictamente posteriores al cursor en el orden descendente
+        if after:
+            fecha, ultimo_id = PostService._parsear_cursor(after)
+            query = query.filter(or_(
+                col_fecha < fecha,
+                and_(col_fecha == fecha, col_id < ultimo_id)
+            ))
+        
+        # Se pide una fila de más para saber si hay otra página
+        filas = query.add_columns(
+            col_fecha.label('cursor_fecha'),
+            col_id.label('cursor_id')
+        ).order_by(col_fecha.desc(), col_id.desc()).limit(por_pagina + 1).all()
+        
+        siguiente_cursor = None
+        if len(filas) > por_pagina:
+            filas = filas[:por_pagina]
+            ultima = filas[-1]
+            siguiente_cursor = f"{ultima.cursor_fecha.isoformat()},{ultima.cursor_id}"
+        
+        return filas, total, siguiente_cursor
+
+    @staticmethod
+    def _paginar(query, col_fecha, col_id, pagina: int, por_pagina: int, after: str = None, incluir_total: bool = False):
+        """
+        Paginar una query del feed por OFFSET (pagina) o por cursor (after)
+        Retorna (filas, total, paginacion)
+        """
+        if after is None:
+            filas, total, total_paginas = PostService._paginar_feed(
+                query, (col_fecha.desc(), col_id.desc()), pagina, por_pagina
             )
+            return filas, total, {
+                'pagina_actual': pagina,
+                'por_pagina': por_pagina,
+                'total_posts': total,
+                'total_paginas': total_paginas
+            }
+        
+        filas, total, siguiente_cursor = PostService._paginar_feed_cursor(
+            query, col_fecha, col_id, after, por_pagina, incluir_total
+        )
+        paginacion = {
+            'modo': 'cursor',
+            'por_pagina': por_pagina,
+            'siguiente_cursor': siguiente_cursor,
+            'hay_mas': siguiente_cursor is not None
+        }
+        if incluir_total:
+            paginacion['total_posts'] = total
+        
+        return filas, total, paginacion
+
+    @staticmethod
+    @solo_lectura
+    def obtener_posts(pagina: int = 1, por_pagina: int = 10, after: str = None, incluir_total: bool = False) -> dict:
+        """
+        Obtener lista de posts paginados con información completa del usuario
+        Con after (cursor '<created_at>,<id>', vacío para la primera página) se pagina por keyset
+        """
+        try:
+            logger.debug('Obteniendo posts - página %s', pagina)
             
-            # Contar total
-            total = query.count()
-            
-            # Obtener posts paginados
-            posts = query.order_by(Post.created_at.desc()).paginate(
-                page=pagina, per_page=por_pagina, error_out=False
+            # Posts no eliminados con autor y totales en una sola query
+            filas, total, paginacion = PostService._paginar(
+                PostService._consulta_feed(), Post.created_at, Post.id,
+                pagina, por_pagina, after, incluir_total
             )
             
-            # Procesar posts con información completa
-            posts_con_totales = []
-            for post in posts.items:
-                post_dict = PostService._post_to_dict(post)
-                
-                # Contar comentarios no eliminados
-                total_comentarios = PostComentario.query.filter_by(
-                    post_id=post.id, eliminado=False
-                ).count()
-                post_dict['total_comentarios'] = total_comentarios
-                
-                # Contar likes
-                total_likes = PostLike.query.filter_by(post_id=post.id).count()
-                post_dict['total_likes'] = total_likes
-                
-                posts_con_totales.append(post_dict)
-            
-            print(f"✅ Encontrados {len(posts_con_totales)} posts con información de usuarios")
+            posts_con_totales = [PostService._fila_feed_to_dict(fila) for fila in filas]
+            
+            logger.debug('Encontrados %s posts con información de usuarios', len(posts_con_totales))
             return {
                 'success': True,
                 'data': posts_con_totales,
                 'count': len(posts_con_totales),
                 'total_posts': total,
-                'paginacion': {
-                    'pagina_actual': pagina,
-                    'por_pagina': por_pagina,
-                    'total_posts': total,
-                    'total_paginas': posts.pages
-                },
+                'paginacion': paginacion,
                 'formato_imagenes': 'webp_url'
             }
             
         except Exception as e:
-            print(f"❌ Error al obtener posts: {str(e)}")
+            logger.exception('Error al obtener posts: %s', e)
             raise e
     @staticmethod
+    @solo_lectura
     def obtener_post_por_id(post_id: int) -> dict:
         """Obtener un post específico por ID con URL accesible"""
         try:
-            print(f"🔍 Buscando post ID: {post_id}")
+            logger.debug('Buscando post ID: %s', post_id)
             
-            post = Post.query.filter_by(id=post_id, eliminado=False).first()
-            if not post:
+            fila = PostService._consulta_feed().filter(Post.id == post_id).first()
+            if not fila:
                 raise ValueError("Post no encontrado")
             
-            print("✅ Post encontrado")
-            return PostService._post_to_dict(post)
+            logger.debug('Post encontrado')
+            return PostService._fila_feed_to_dict(fila)
             
         except Exception as e:
-            print(f"❌ Error al obtener post: {str(e)}")
+            logger.exception('Error al obtener post: %s', e)
             raise e
 
     @staticmethod
     def actualizar_post(post_id: int, usuario_id: int, data: dict, imagen_file=None) -> dict:
         """Actualizar un post existente con soporte para nueva imagen"""
         try:
-            print(f"✏️ Actualizando post ID: {post_id}")
-            print(f"👤 Usuario autenticado ID: {usuario_id}")
+            logger.debug('Actualizando post ID: %s', post_id)
+            logger.debug('Usuario autenticado ID: %s', usuario_id)
             
             post = Post.query.filter_by(id=post_id, eliminado=False).first()
             if not post:
@@ -256,14 +326,14 @@ class PostService:
             # ✅ MANEJO DE NUEVA IMAGEN SI SE PROPORCIONA
             nueva_imagen_url = None
             if imagen_file and imagen_file.filename:
-                print("🖼️ Procesando nueva imagen para el post...")
+                logger.debug('Procesando nueva imagen para el post...')
                 nueva_imagen_url = PostService._guardar_y_convertir_a_webp(imagen_file, usuario_id, 'post')
                 if nueva_imagen_url:
                     # Eliminar imagen anterior si existe y es local
                     if post.imagen_url and post.imagen_url.startswith('/utils/pictures/'):
                         PostService._eliminar_imagen_fisica(post.imagen_url)
                     post.imagen_url = nueva_imagen_url
-                    print(f"📷 Nueva imagen del post guardada: {nueva_imagen_url}")
+                    logger.debug('Nueva imagen del post guardada: %s', nueva_imagen_url)
             
             # Actualizar campos permitidos (si no se proporcionó nueva imagen)
             if 'contenido' in data:
@@ -274,7 +344,7 @@ class PostService:
             
             db.session.commit()
             
-            print("✅ Post actualizado exitosamente")
+            logger.debug('Post actualizado exitosamente')
             return {
                 'message': 'Post actualizado exitosamente',
                 'post': PostService._post_to_dict(post)
@@ -282,39 +352,23 @@ class PostService:
             
         except Exception as e:
             db.session.rollback()
-            print(f"❌ Error al actualizar post: {str(e)}")
+            logger.exception('Error al actualizar post: %s', e)
             raise e
 
     @staticmethod
     def _eliminar_imagen_fisica(ruta_imagen):
-        """Eliminar archivo físico de imagen - Misma lógica que canchas y profile"""
+        """Liberar la imagen en el almacenamiento (se borra al quedar sin referencias)"""
         try:
-            if ruta_imagen.startswith('/utils/pictures/'):
-                ruta_completa = os.path.join(current_app.root_path, ruta_imagen.lstrip('/'))
-                if os.path.exists(ruta_completa):
-                    os.remove(ruta_completa)
-                    print(f"✅ Archivo de imagen eliminado: {ruta_completa}")
-                    
-                    # También eliminar carpetas vacías
-                    carpeta_imagen = os.path.dirname(ruta_completa)
-                    carpeta_padre = os.path.dirname(carpeta_imagen)
-                    
-                    if os.path.exists(carpeta_imagen) and not os.listdir(carpeta_imagen):
-                        os.rmdir(carpeta_imagen)
-                        print(f"✅ Carpeta webp eliminada: {carpeta_imagen}")
-                        
-                    if os.path.exists(carpeta_padre) and not os.listdir(carpeta_padre):
-                        os.rmdir(carpeta_padre)
-                        print(f"✅ Carpeta posts eliminada: {carpeta_padre}")
+            ImagenPipeline.liberar(ruta_imagen)
         except Exception as e:
-            print(f"⚠️ Error al eliminar archivo físico: {str(e)}")
+            logger.warning('Error al eliminar archivo físico: %s', e)
 
     @staticmethod
     def eliminar_post(post_id: int, usuario_id: int) -> dict:
         """Eliminar (soft delete) un post y su imagen física"""
         try:
-            print(f"🗑️ Eliminando post ID: {post_id}")
-            print(f"👤 Usuario autenticado ID: {usuario_id}")
+            logger.debug('Eliminando post ID: %s', post_id)
+            logger.debug('Usuario autenticado ID: %s', usuario_id)
             
             post = Post.query.filter_by(id=post_id, eliminado=False).first()
             if not post:
@@ -332,12 +386,12 @@ class PostService:
             post.eliminado = True
             db.session.commit()
             
-            print("✅ Post eliminado exitosamente")
+            logger.debug('Post eliminado exitosamente')
             return {'message': 'Post eliminado exitosamente'}
             
         except Exception as e:
             db.session.rollback()
-            print(f"❌ Error al eliminar post: {str(e)}")
+            logger.exception('Error al eliminar post: %s', e)
             raise e
 
     # ... (los demás métodos se mantienen igual: agregar_comentario, obtener_comentarios, toggle_like_post, toggle_like_comentario, obtener_mis_posts, obtener_mis_likes_posts)
@@ -346,8 +400,8 @@ class PostService:
     def agregar_comentario(post_id: int, usuario_id: int, data: dict) -> dict:
         """Agregar comentario a un post"""
         try:
-            print(f"💬 Agregando comentario al post ID: {post_id}")
-            print(f"👤 Usuario autenticado ID: {usuario_id}")
+            logger.debug('Agregando comentario al post ID: %s', post_id)
+            logger.debug('Usuario autenticado ID: %s', usuario_id)
             
             # Validar contenido
             if 'contenido' not in data or not data['contenido']:
@@ -366,9 +420,10 @@ class PostService:
             )
             
             db.session.add(comentario)
+            PostService._ajustar_contador(Post, post_id, Post.total_comentarios, 1)
             db.session.commit()
             
-            print("✅ Comentario agregado exitosamente")
+            logger.debug('Comentario agregado exitosamente')
             return {
                 'message': 'Comentario agregado exitosamente',
                 'comentario': comentario.to_dict()
@@ -376,14 +431,110 @@ class PostService:
             
         except Exception as e:
             db.session.rollback()
-            print(f"❌ Error al agregar comentario: {str(e)}")
+            logger.exception('Error al agregar comentario: %s', e)
             raise e
 
     @staticmethod
+    def eliminar_comentario(comentario_id: int, usuario_id: int) -> dict:
+        """Eliminar (soft delete) un comentario propio"""
+        try:
+            logger.debug('Eliminando comentario ID: %s', comentario_id)
+            logger.debug('Usuario autenticado ID: %s', usuario_id)
+            
+            comentario = PostComentario.query.filter_by(
+                id=comentario_id, eliminado=False
+            ).first()
+            if not comentario:
+                raise ValueError("Comentario no encontrado")
+            
+            # Verificar que el usuario es el autor del comentario
+            if comentario.usuario_id != usuario_id:
+                raise ValueError("No tienes permisos para eliminar este comentario")
+            
+            # Soft delete y contador del post en la misma transacción
+            comentario.eliminado = True
+            PostService._ajustar_contador(Post, comentario.post_id, Post.total_comentarios, -1)
+            db.session.commit()
+            
+            logger.debug('Comentario eliminado exitosamente')
+            return {'message': 'Comentario eliminado exitosamente'}
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Error al eliminar comentario: %s', e)
+            raise e
+
+    @staticmethod
+    def _ajustar_contador(modelo, registro_id: int, columna, delta: int):
+        """
+        Sumar delta a un contador desnormalizado con un UPDATE atómico en SQL
+        (columna = columna + delta), dentro de la transacción en curso
+        """
+        db.session.query(modelo).filter(modelo.id == registro_id).update(
+            {columna: columna + delta}, synchronize_session=False
+        )
+
+    @staticmethod
+    def recalcular_contadores(lote: int = 1000) -> dict:
+        """
+        Recalcular en bloque total_likes / total_comentarios de posts y
+        total_likes de comentarios a partir de las tablas de likes y comentarios.
+        Se procesa por rangos de id y se hace commit por lote para no bloquear
+        las tablas durante todo el recálculo.
+        """
+        try:
+            logger.debug('Recalculando contadores de posts y comentarios...')
+            
+            likes_post = select(func.count(PostLike.id)).where(
+                PostLike.post_id == Post.id
+            ).scalar_subquery()
+            comentarios_post = select(func.count(PostComentario.id)).where(
+                PostComentario.post_id == Post.id,
+                PostComentario.eliminado == False
+            ).scalar_subquery()
+            likes_comentario = select(func.count(ComentarioLike.id)).where(
+                ComentarioLike.comentario_id == PostComentario.id
+            ).scalar_subquery()
+            
+            resultado = {
+                'posts': PostService._recalcular_por_lotes(Post, {
+                    Post.total_likes: likes_post,
+                    Post.total_comentarios: comentarios_post
+                }, lote),
+                'comentarios': PostService._recalcular_por_lotes(PostComentario, {
+                    PostComentario.total_likes: likes_comentario
+                }, lote)
+            }
+            
+            logger.debug('Contadores recalculados: %s', resultado)
+            return resultado
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Error al recalcular contadores: %s', e)
+            raise e
+
+    @staticmethod
+    def _recalcular_por_lotes(modelo, valores: dict, lote: int) -> int:
+        """Aplicar un UPDATE ... SET col = (subconsulta) por rangos de id"""
+        max_id = db.session.query(func.max(modelo.id)).scalar() or 0
+        actualizados = 0
+        
+        for inicio in range(1, max_id + 1, lote):
+            resultado = db.session.query(modelo).filter(
+                modelo.id.between(inicio, inicio + lote - 1)
+            ).update(valores, synchronize_session=False)
+            db.session.commit()
+            actualizados += resultado
+        
+        return actualizados
+
+    @staticmethod
+    @solo_lectura
     def obtener_comentarios(post_id: int) -> dict:
         """Obtener comentarios de un post"""
         try:
-            print(f"📋 Obteniendo comentarios del post ID: {post_id}")
+            logger.debug('Obteniendo comentarios del post ID: %s', post_id)
             
             # Verificar que el post existe
             post = Post.query.filter_by(id=post_id, eliminado=False).first()
@@ -394,21 +545,21 @@ class PostService:
                 post_id=post_id, eliminado=False
             ).order_by(PostComentario.created_at.asc()).all()
             
-            print(f"✅ Encontrados {len(comentarios)} comentarios")
+            logger.debug('Encontrados %s comentarios', len(comentarios))
             return {
                 'comentarios': [comentario.to_dict() for comentario in comentarios]
             }
             
         except Exception as e:
-            print(f"❌ Error al obtener comentarios: {str(e)}")
+            logger.exception('Error al obtener comentarios: %s', e)
             raise e
 
     @staticmethod
     def toggle_like_post(post_id: int, usuario_id: int) -> dict:
         """Agregar o quitar like de un post"""
         try:
-            print(f"❤️ Toggle like en post ID: {post_id}")
-            print(f"👤 Usuario autenticado ID: {usuario_id}")
+            logger.debug('Toggle like en post ID: %s', post_id)
+            logger.debug('Usuario autenticado ID: %s', usuario_id)
             
             # Verificar que el post existe
             post = Post.query.filter_by(id=post_id, eliminado=False).first()
@@ -423,16 +574,21 @@ class PostService:
             if like_existente:
                 # Quitar like
                 db.session.delete(like_existente)
+                PostService._ajustar_contador(Post, post_id, Post.total_likes, -1)
                 accion = "quitado"
             else:
-                # Agregar like
-                nuevo_like = PostLike(post_id=post_id, usuario_id=usuario_id)
-                db.session.add(nuevo_like)
+                # Agregar like; uq_post_likes_post_usuario frena el doble clic concurrente
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(PostLike(post_id=post_id, usuario_id=usuario_id))
+                    PostService._ajustar_contador(Post, post_id, Post.total_likes, 1)
+                except IntegrityError:
+                    logger.debug('Like ya registrado por otra petición')
                 accion = "agregado"
             
             db.session.commit()
             
-            print(f"✅ Like {accion} exitosamente")
+            logger.debug('Like %s exitosamente', accion)
             return {
                 'message': f'Like {accion} exitosamente',
                 'liked': accion == "agregado"
@@ -440,15 +596,15 @@ class PostService:
             
         except Exception as e:
             db.session.rollback()
-            print(f"❌ Error al toggle like: {str(e)}")
+            logger.exception('Error al toggle like: %s', e)
             raise e
 
     @staticmethod
     def toggle_like_comentario(comentario_id: int, usuario_id: int) -> dict:
         """Agregar o quitar like de un comentario"""
         try:
-            print(f"❤️ Toggle like en comentario ID: {comentario_id}")
-            print(f"👤 Usuario autenticado ID: {usuario_id}")
+            logger.debug('Toggle like en comentario ID: %s', comentario_id)
+            logger.debug('Usuario autenticado ID: %s', usuario_id)
             
             # Verificar que el comentario existe
             comentario = PostComentario.query.filter_by(
@@ -465,18 +621,21 @@ class PostService:
             if like_existente:
                 # Quitar like
                 db.session.delete(like_existente)
+                PostService._ajustar_contador(PostComentario, comentario_id, PostComentario.total_likes, -1)
                 accion = "quitado"
             else:
-                # Agregar like
-                nuevo_like = ComentarioLike(
-                    comentario_id=comentario_id, usuario_id=usuario_id
-                )
-                db.session.add(nuevo_like)
+                # Agregar like; uq_comentario_likes_comentario_usuario frena el doble clic concurrente
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(ComentarioLike(comentario_id=comentario_id, usuario_id=usuario_id))
+                    PostService._ajustar_contador(PostComentario, comentario_id, PostComentario.total_likes, 1)
+                except IntegrityError:
+                    logger.debug('Like de comentario ya registrado por otra petición')
                 accion = "agregado"
             
             db.session.commit()
             
-            print(f"✅ Like {accion} exitosamente")
+            logger.debug('Like %s exitosamente', accion)
             return {
                 'message': f'Like {accion} exitosamente',
                 'liked': accion == "agregado"
@@ -484,91 +643,66 @@ class PostService:
             
         except Exception as e:
             db.session.rollback()
-            print(f"❌ Error al toggle like comentario: {str(e)}")
+            logger.exception('Error al toggle like comentario: %s', e)
             raise e
 
     @staticmethod
-    def obtener_mis_posts(usuario_id: int, pagina: int = 1, por_pagina: int = 10) -> dict:
+    @solo_lectura
+    def obtener_mis_posts(usuario_id: int, pagina: int = 1, por_pagina: int = 10, after: str = None, incluir_total: bool = False) -> dict:
         """Obtener posts del usuario autenticado con estructura mejorada"""
         try:
-            print(f"📄 Obteniendo posts del usuario ID: {usuario_id} - página {pagina}")
-            
-            # Query para posts del usuario no eliminados
-            query = Post.query.filter_by(usuario_id=usuario_id, eliminado=False)
+            logger.debug('Obteniendo posts del usuario ID: %s - página %s', usuario_id, pagina)
             
-            # Contar total
-            total = query.count()
-            
-            # Obtener posts paginados
-            posts = query.order_by(Post.created_at.desc()).paginate(
-                page=pagina, per_page=por_pagina, error_out=False
+            # Posts del usuario no eliminados con autor y totales en una sola query
+            filas, total, paginacion = PostService._paginar(
+                PostService._consulta_feed().filter(Post.usuario_id == usuario_id),
+                Post.created_at, Post.id,
+                pagina, por_pagina, after, incluir_total
             )
             
-            # Procesar posts con la nueva estructura
-            posts_con_totales = []
-            for post in posts.items:
-                post_dict = PostService._post_to_dict(post)
-                
-                total_comentarios = PostComentario.query.filter_by(
-                    post_id=post.id, eliminado=False
-                ).count()
-                post_dict['total_comentarios'] = total_comentarios
-                
-                total_likes = PostLike.query.filter_by(post_id=post.id).count()
-                post_dict['total_likes'] = total_likes
-                
-                posts_con_totales.append(post_dict)
-            
-            print(f"✅ Encontrados {len(posts_con_totales)} posts del usuario")
+            posts_con_totales = [PostService._fila_feed_to_dict(fila) for fila in filas]
+            
+            logger.debug('Encontrados %s posts del usuario', len(posts_con_totales))
             return {
                 'success': True,
                 'data': posts_con_totales,
                 'count': len(posts_con_totales),
                 'total_posts': total,
-                'paginacion': {
-                    'pagina_actual': pagina,
-                    'por_pagina': por_pagina,
-                    'total_posts': total,
-                    'total_paginas': posts.pages
-                },
+                'paginacion': paginacion,
                 'formato_imagenes': 'webp_url'
             }
             
         except Exception as e:
-            print(f"❌ Error al obtener posts del usuario: {str(e)}")
+            logger.exception('Error al obtener posts del usuario: %s', e)
             raise e
 
     @staticmethod
-    def obtener_mis_likes_posts(usuario_id: int, pagina: int = 1, por_pagina: int = 10) -> dict:
-        """Obtener posts que el usuario autenticado ha dado like con URLs accesibles"""
+    @solo_lectura
+    def obtener_mis_likes_posts(usuario_id: int, pagina: int = 1, por_pagina: int = 10, after: str = None, incluir_total: bool = False) -> dict:
+        """
+        Obtener posts que el usuario autenticado ha dado like con URLs accesibles
+        En modo cursor se pagina sobre (created_at, id) del like, que es el orden de la lista
+        """
         try:
-            print(f"❤️ Obteniendo posts likeados por usuario ID: {usuario_id}")
-            
-            # Query para posts likeados por el usuario
-            query = Post.query.join(PostLike).filter(
-                PostLike.usuario_id == usuario_id,
-                Post.eliminado == False
-            )
+            logger.debug('Obteniendo posts likeados por usuario ID: %s', usuario_id)
             
-            # Contar total
-            total = query.count()
+            # Posts likeados por el usuario con autor y totales en una sola query
+            like_usuario = aliased(PostLike)
+            query = PostService._consulta_feed().join(
+                like_usuario, like_usuario.post_id == Post.id
+            ).filter(like_usuario.usuario_id == usuario_id)
             
-            # Obtener posts paginados
-            posts = query.order_by(PostLike.created_at.desc()).paginate(
-                page=pagina, per_page=por_pagina, error_out=False
+            filas, total, paginacion = PostService._paginar(
+                query, like_usuario.created_at, like_usuario.id,
+                pagina, por_pagina, after, incluir_total
             )
             
-            print(f"✅ Encontrados {len(posts.items)} posts likeados")
+            logger.debug('Encontrados %s posts likeados', len(filas))
             return {
-                'posts': [PostService._post_to_dict(post) for post in posts.items],
-                'paginacion': {
-                    'pagina_actual': pagina,
-                    'por_pagina': por_pagina,
-                    'total_posts': total,
-                    'total_paginas': posts.pages
-                }
+                'posts': [PostService._fila_feed_to_dict(fila) for fila in filas],
+                'paginacion': paginacion
             }
             
         except Exception as e:
-            print(f"❌ Error al obtener posts likeados: {str(e)}")
+            logger.exception('Error al obtener posts likeados: %s', e)
             raise e
\ No newline at end of file
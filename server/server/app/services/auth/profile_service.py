@@ -1,28 +1,28 @@
+import logging
 import os
-import uuid
-from PIL import Image
-from flask import current_app
-from werkzeug.utils import secure_filename
 from app.models.user_model import User
 from app.utils.database import db
+from app.utils.replicas import solo_lectura
+from app.services.media.imagen_pipeline import ImagenPipeline, LADO_PERFIL
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class PlayerService:
     
     @staticmethod
     def create_player_profile(user_id: int, data: dict, profile_picture_file=None) -> dict:
         try:
-            print("🔍 Iniciando creación/actualización de perfil de jugador...")
-            print(f"📋 User ID recibido: {user_id}")
+            logger.debug('Creación/actualización de perfil para el usuario %s', user_id)
 
             # Buscar usuario
-            print("👤 Buscando usuario en la base de datos...")
+            logger.debug('Buscando usuario en la base de datos...')
             user = User.query.get(user_id)
             if not user:
-                print("❌ ERROR: Usuario no encontrado en la base de datos")
+                logger.debug('Usuario no encontrado en la base de datos')
                 raise ValueError("Usuario no encontrado")
             
-            print(f"✅ Usuario encontrado: {user.email}")
+            logger.debug('Usuario encontrado: %s', user.email)
 
             # Validar campos obligatorios
             campos_obligatorios = ['telephone', 'city', 'sport', 'position']
@@ -42,13 +42,15 @@ class PlayerService:
 
             # ✅ MANEJO DE IMÁGENES DE PERFIL - EXACTAMENTE IGUAL QUE CANCHAS
             if profile_picture_file and profile_picture_file.filename:
-                print("🖼️ Procesando imagen de perfil...")
+                logger.debug('Procesando imagen de perfil...')
                 url_imagen = PlayerService._guardar_y_convertir_a_webp(profile_picture_file, user_id)
                 if url_imagen:
+                    if user.urlphotoperfil:
+                        ImagenPipeline.liberar(user.urlphotoperfil)
                     user.urlphotoperfil = url_imagen
-                    print(f"📷 Imagen de perfil guardada: {url_imagen}")
+                    logger.debug('Imagen de perfil guardada: %s', url_imagen)
                 else:
-                    print("❌ No se pudo procesar la imagen de perfil")
+                    logger.debug('No se pudo procesar la imagen de perfil')
             elif 'profilePicture' in data and data['profilePicture']:
                 # Manejar URL existente (compatibilidad)
                 url = data['profilePicture']
@@ -56,105 +58,61 @@ class PlayerService:
                     user.urlphotoperfil = str(url[0])
                 else:
                     user.urlphotoperfil = str(url)
-                print(f"📷 URL de imagen de perfil guardada: {user.urlphotoperfil}")
+                logger.debug('URL de imagen de perfil guardada: %s', user.urlphotoperfil)
             elif 'urlphotoperfil' in data and data['urlphotoperfil']:
                 user.urlphotoperfil = str(data['urlphotoperfil'])
-                print(f"📷 URL de imagen de perfil guardada: {data['urlphotoperfil']}")
+                logger.debug('URL de imagen de perfil guardada: %s', data['urlphotoperfil'])
             else:
-                print("⚠️ No se encontró imagen de perfil para guardar.")
+                logger.debug('No se encontró imagen de perfil para guardar.')
 
             # Marcar perfil como completado
             user.is_profile_completed = True
             user.updated_at = datetime.utcnow()
-            print("✅ Perfil marcado como completado")
+            logger.debug('Perfil marcado como completado')
 
             # Guardar cambios
-            print("💾 Guardando cambios en la base de datos...")
+            logger.debug('Guardando cambios en la base de datos...')
             db.session.commit()
-            print("✅ Cambios guardados exitosamente")
+            logger.debug('Cambios guardados exitosamente')
 
             # Preparar respuesta
-            print("🎉 Perfil de jugador creado/actualizado exitosamente!")
+            logger.debug('Perfil de jugador creado/actualizado exitosamente!')
             return {
                 'message': 'Perfil completado exitosamente',
                 'user': PlayerService._user_to_profile_dict(user)
             }
 
         except ValueError as ve:
-            print(f"❌ ERROR de valor: {str(ve)}")
+            logger.info('Perfil rechazado: %s', ve)
             db.session.rollback()
             raise ve
         except Exception as e:
-            print(f"❌ ERROR inesperado al crear perfil de jugador: {str(e)}")
+            logger.exception('Error inesperado al crear perfil de jugador: %s', e)
             db.session.rollback()
             raise e
 
     @staticmethod
     def _guardar_y_convertir_a_webp(imagen_file, user_id):
         """
-        Guardar imagen y convertir a WebP como archivo - EXACTAMENTE IGUAL QUE CANCHAS
+        Guardar el original y encolar su conversión a WebP (800px para perfil).
+        Devuelve la ruta definitiva del WebP (pendiente hasta que el pool termine).
         """
-        try:
-            # Crear directorios específicos para usuarios - Misma estructura que canchas
-            upload_folder = os.path.join(current_app.root_path, 'utils', 'pictures', 'users', str(user_id))
-            webp_folder = os.path.join(upload_folder, 'webp')
-            os.makedirs(webp_folder, exist_ok=True)
-            
-            # Generar nombres únicos - Mismo formato que canchas
-            original_filename = secure_filename(imagen_file.filename)
-            name_without_ext = os.path.splitext(original_filename)[0]
-            unique_id = uuid.uuid4().hex
-            
-            # Guardar original temporalmente
-            temp_path = os.path.join(upload_folder, f"temp_{unique_id}_{original_filename}")
-            imagen_file.save(temp_path)
-            
-            try:
-                # Abrir y procesar imagen - Mismo procesamiento que canchas
-                with Image.open(temp_path) as img:
-                    # Convertir a RGB si es necesario
-                    if img.mode in ('RGBA', 'P'):
-                        img = img.convert('RGB')
-                    
-                    # Redimensionar (máximo 1200px como canchas, pero para perfil 800px es suficiente)
-                    max_size = (800, 800)  # Un poco más pequeño que canchas para optimizar
-                    img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                    
-                    # Guardar como WebP - Mismo formato que canchas
-                    webp_filename = f"{unique_id}_{name_without_ext}.webp"
-                    webp_path = os.path.join(webp_folder, webp_filename)
-                    
-                    # Guardar con calidad optimizada
-                    img.save(webp_path, 'WEBP', quality=85, optimize=True)
-                    
-                    # Retornar ruta relativa del WebP para guardar en BD - Mismo formato que canchas
-                    relative_path = f"/utils/pictures/users/{user_id}/webp/{webp_filename}"
-                    print(f"🖼️ Imagen convertida a WebP: {original_filename} -> {webp_filename}")
-                    
-                    return relative_path
-                    
-            finally:
-                # Eliminar archivo temporal - Misma limpieza que canchas
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-            
-        except Exception as e:
-            print(f"❌ Error al procesar imagen: {str(e)}")
-            return None
+        return ImagenPipeline.encolar(imagen_file, max_lado=LADO_PERFIL, calidad=85)
 
     @staticmethod
+    @solo_lectura
     def get_profile(user_id: int) -> dict:
         """Obtener perfil completo del jugador con URL accesible de la foto"""
         try:
-            print(f"🔍 Buscando perfil del usuario ID: {user_id}")
+            logger.debug('Buscando perfil del usuario ID: %s', user_id)
             
             user = User.query.get(user_id)
             if not user:
-                print("❌ Usuario no encontrado")
+                logger.debug('Usuario no encontrado')
                 raise ValueError("Usuario no encontrado")
             
             if not user.is_profile_completed:
-                print("⚠️ Perfil del usuario no está completado")
+                logger.debug('Perfil del usuario no está completado')
                 return {
                     'message': 'Perfil no completado',
                     'user': {
@@ -167,11 +125,11 @@ class PlayerService:
                     }
                 }
             
-            print(f"✅ Perfil encontrado para: {user.email}")
+            logger.debug('Perfil encontrado para: %s', user.email)
             return PlayerService._user_to_profile_dict(user)
             
         except Exception as e:
-            print(f"❌ Error al obtener perfil: {str(e)}")
+            logger.exception('Error al obtener perfil: %s', e)
             raise e
 
     @staticmethod
@@ -186,11 +144,13 @@ class PlayerService:
         
         # Construir URL accesible para la foto de perfil si es local - Mismo patrón que canchas
         url_foto_accesible = user.urlphotoperfil
+        srcset_foto = None
         if user.urlphotoperfil and user.urlphotoperfil.startswith('/utils/pictures/'):
             filename = os.path.basename(user.urlphotoperfil)
             # ✅ URL CORREGIDA: /player/ en lugar de /user/
             url_foto_accesible = f"/player/{user.id}/imagen-perfil/{filename}"
-            print(f"🔗 URL de imagen construida: {url_foto_accesible}")
+            srcset_foto = ImagenPipeline.srcset(url_foto_accesible, max_lado=LADO_PERFIL)
+            logger.debug('URL de imagen construida: %s', url_foto_accesible)
         
         return {
             # Datos del registro
@@ -212,6 +172,7 @@ class PlayerService:
             'position': user.position,
             'biography': user.biography,
             'urlphotoperfil': url_foto_accesible,  # ✅ URL accesible corregida
+            'urlphotoperfil_srcset': srcset_foto,  # Variantes para avatares y tarjetas
             'role': user.role
         }
 
@@ -219,7 +180,7 @@ class PlayerService:
     def actualizar_foto_perfil(user_id: int, profile_picture_file):
         """Actualizar solo la foto de perfil del usuario"""
         try:
-            print(f"🖼️ Actualizando foto de perfil para usuario ID: {user_id}")
+            logger.debug('Actualizando foto de perfil para usuario ID: %s', user_id)
             
             user = User.query.get(user_id)
             if not user:
@@ -233,21 +194,26 @@ class PlayerService:
             if not nueva_url_imagen:
                 raise ValueError("Error al procesar la imagen")
             
-            # Actualizar en la base de datos
+            # Actualizar en la base de datos (la foto anterior pierde una referencia)
+            if user.urlphotoperfil:
+                ImagenPipeline.liberar(user.urlphotoperfil)
             user.urlphotoperfil = nueva_url_imagen
             user.updated_at = datetime.utcnow()
             
             db.session.commit()
-            print("✅ Foto de perfil actualizada exitosamente")
+            logger.debug('Foto de perfil actualizada exitosamente')
+            
+            url_accesible = f"/player/{user_id}/imagen-perfil/{os.path.basename(nueva_url_imagen)}"
             
             return {
                 'message': 'Foto de perfil actualizada exitosamente',
                 'url_imagen': nueva_url_imagen,
-                'url_accesible': f"/player/{user_id}/imagen-perfil/{os.path.basename(nueva_url_imagen)}"
+                'url_accesible': url_accesible,
+                'srcset': ImagenPipeline.srcset(url_accesible, max_lado=LADO_PERFIL)
             }
             
         except Exception as e:
-            print(f"❌ Error al actualizar foto de perfil: {str(e)}")
+            logger.exception('Error al actualizar foto de perfil: %s', e)
             db.session.rollback()
             raise e
 
@@ -255,7 +221,7 @@ class PlayerService:
     def eliminar_foto_perfil(user_id: int):
         """Eliminar foto de perfil del usuario"""
         try:
-            print(f"🗑️ Eliminando foto de perfil para usuario ID: {user_id}")
+            logger.debug('Eliminando foto de perfil para usuario ID: %s', user_id)
             
             user = User.query.get(user_id)
             if not user:
@@ -264,35 +230,20 @@ class PlayerService:
             if not user.urlphotoperfil:
                 return {'message': 'El usuario no tiene foto de perfil'}
             
-            # Eliminar archivo físico si es local - Misma lógica que canchas
-            if user.urlphotoperfil.startswith('/utils/pictures/'):
-                ruta_completa = os.path.join(current_app.root_path, user.urlphotoperfil.lstrip('/'))
-                if os.path.exists(ruta_completa):
-                    os.remove(ruta_completa)
-                    print(f"✅ Archivo eliminado: {ruta_completa}")
-                
-                # También eliminar la carpeta si está vacía
-                carpeta_imagen = os.path.dirname(ruta_completa)
-                carpeta_padre = os.path.dirname(carpeta_imagen)
-                
-                if os.path.exists(carpeta_imagen) and not os.listdir(carpeta_imagen):
-                    os.rmdir(carpeta_imagen)
-                    print(f"✅ Carpeta webp eliminada: {carpeta_imagen}")
-                    
-                if os.path.exists(carpeta_padre) and not os.listdir(carpeta_padre):
-                    os.rmdir(carpeta_padre)
-                    print(f"✅ Carpeta usuario eliminada: {carpeta_padre}")
+            # Liberar la imagen si es local (se borra al quedar sin referencias)
+            ImagenPipeline.liberar(user.urlphotoperfil)
+            logger.debug('Imagen liberada: %s', user.urlphotoperfil)
             
             # Actualizar en base de datos
             user.urlphotoperfil = None
             user.updated_at = datetime.utcnow()
             
             db.session.commit()
-            print("✅ Foto de perfil eliminada exitosamente")
+            logger.debug('Foto de perfil eliminada exitosamente')
             
             return {'message': 'Foto de perfil eliminada exitosamente'}
             
         except Exception as e:
-            print(f"❌ Error al eliminar foto de perfil: {str(e)}")
+            logger.exception('Error al eliminar foto de perfil: %s', e)
             db.session.rollback()
             raise e
\ No newline at end of file
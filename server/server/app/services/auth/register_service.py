@@ -1,17 +1,26 @@
 import bcrypt
 import json
+import logging
+import os
 from app.models.user_model import User
 from app.utils.database import db
 from datetime import datetime
 from app.services.email.email_service import EmailService
+from app.utils.almacen_ttl import obtener_almacen_ttl
+
+logger = logging.getLogger(__name__)
+
+# Vigencia de los datos de un registro a la espera de verificar el email;
+# cubre los reenvíos de código (cada código dura 15 minutos)
+PENDING_REGISTRATION_TTL = int(os.getenv('PENDING_REGISTRATION_TTL', str(24 * 60 * 60)))
 
 class AuthService:
     @staticmethod
     def register_user(data):
         try:
-            print("🔐 Iniciando proceso de registro...")
-            print(f"📧 Email recibido: {data.get('email')}")
-            print(f"👤 Nombre recibido: {data.get('name_user')}")
+            logger.debug('Iniciando proceso de registro...')
+            logger.debug('Email recibido: %s', data.get('email'))
+            logger.debug('Nombre recibido: %s', data.get('name_user'))
             
             # Verificar campos requeridos
             required_fields = ['name_user', 'email', 'password', 'fechanacimiento']
@@ -20,46 +29,46 @@ class AuthService:
                     raise ValueError(f"Campo requerido faltante: {field}")
             
             # Verificar si el email ya existe en la base de datos FINAL
-            print("🔍 Verificando si el email ya existe...")
+            logger.debug('Verificando si el email ya existe...')
             if User.query.filter_by(email=data['email']).first():
-                print("❌ Email ya registrado")
+                logger.debug('Email ya registrado')
                 raise ValueError('El email ya está registrado')
             
-            print("✅ Email disponible")
+            logger.debug('Email disponible')
 
             # Validar y formatear fecha de nacimiento
-            print("📅 Procesando fecha de nacimiento...")
+            logger.debug('Procesando fecha de nacimiento...')
             fecha_nacimiento = data['fechanacimiento']
             
             if isinstance(fecha_nacimiento, str):
                 try:
                     fecha_nacimiento = datetime.strptime(fecha_nacimiento, '%Y-%m-%d')
-                    print(f"✅ Fecha de nacimiento parseada: {fecha_nacimiento}")
+                    logger.debug('Fecha de nacimiento parseada: %s', fecha_nacimiento)
                 except ValueError:
                     raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
             
             # Calcular edad y validar que sea mayor de 18
             hoy = datetime.now()
             edad_calculada = hoy.year - fecha_nacimiento.year - ((hoy.month, hoy.day) < (fecha_nacimiento.month, fecha_nacimiento.day))
-            print(f"🎂 Edad calculada: {edad_calculada} años")
+            logger.debug('Edad calculada: %s años', edad_calculada)
             
             if edad_calculada < 18:
-                print("❌ Usuario menor de 18 años")
+                logger.debug('Usuario menor de 18 años')
                 raise ValueError("Debes ser mayor de 18 años para registrarte")
             
-            print("✅ Usuario mayor de 18 años - Validación pasada")
+            logger.debug('Usuario mayor de 18 años - Validación pasada')
 
             # Hashear la contraseña
-            print("🔐 Hasheando contraseña...")
+            logger.debug('Hasheando contraseña...')
             hashed_password = bcrypt.hashpw(
                 data['password'].encode('utf-8'),
                 bcrypt.gensalt()
             ).decode('utf-8')
             
-            print("✅ Contraseña hasheada correctamente")
+            logger.debug('Contraseña hasheada correctamente')
 
             # ✅ GENERAR Y ENVIAR CÓDIGO DE VERIFICACIÓN
-            print("🔐 Generando código de verificación...")
+            logger.debug('Generando código de verificación...')
             verification_code = EmailService.generate_verification_code()
             
             # Enviar email de verificación
@@ -84,7 +93,7 @@ class AuthService:
                 'fechanacimiento': fecha_nacimiento.isoformat() if isinstance(fecha_nacimiento, datetime) else fecha_nacimiento
             }
             
-            print("✅ Proceso de registro inicial completado - Esperando verificación")
+            logger.debug('Proceso de registro inicial completado - Esperando verificación')
             
             return {
                 'message': 'Email de verificación enviado. Por favor verifica tu email para completar el registro.',
@@ -94,17 +103,17 @@ class AuthService:
             }
             
         except ValueError as ve:
-            print(f"❌ Error de validación: {str(ve)}")
+            logger.info('Registro rechazado: %s', ve)
             raise ve
         except Exception as e:
-            print(f"💥 Error inesperado en registro: {str(e)}")
+            logger.exception('Error inesperado en registro: %s', e)
             raise e
 
     @staticmethod
     def verify_and_create_user(email, verification_code, user_data):
         """Verificar código y crear usuario final"""
         try:
-            print(f"🔐 Verificando código para: {email}")
+            logger.debug('Verificando código para: %s', email)
             
             # Verificar que tenemos los datos del usuario
             if not user_data:
@@ -123,7 +132,7 @@ class AuthService:
                 user_data['fechanacimiento'] = datetime.fromisoformat(user_data['fechanacimiento'])
             
             # Crear usuario final
-            print("👤 Creando usuario en base de datos...")
+            logger.debug('Creando usuario en base de datos...')
             user = User(
                 name_user=user_data['name_user'],
                 email=user_data['email'],
@@ -136,11 +145,10 @@ class AuthService:
             db.session.add(user)
             db.session.commit()
             
-            print("✅ Usuario creado exitosamente después de verificación")
+            logger.debug('Usuario creado exitosamente después de verificación')
             
             # Limpiar código de verificación
-            if email in EmailService.verification_codes:
-                del EmailService.verification_codes[email]
+            EmailService.delete_verification_code(email)
             
             # Calcular edad para la respuesta
             hoy = datetime.now()
@@ -161,14 +169,14 @@ class AuthService:
             
         except Exception as e:
             db.session.rollback()
-            print(f"❌ Error en verificación: {str(e)}")
+            logger.exception('Error en verificación: %s', e)
             raise e
 
     @staticmethod
     def resend_verification_code(email, name_user):
         """Reenviar código de verificación"""
         try:
-            print(f"🔄 Reenviando código de verificación a: {email}")
+            logger.debug('Reenviando código de verificación a: %s', email)
             
             # Verificar que el email no esté ya registrado
             if User.query.filter_by(email=email).first():
@@ -196,5 +204,19 @@ class AuthService:
             }
             
         except Exception as e:
-            print(f"❌ Error al reenviar código: {str(e)}")
-            raise e
\ No newline at end of file
+            logger.exception('Error al reenviar código: %s', e)
+            raise e
+
+    @staticmethod
+    def store_pending_registration(email, user_data):
+        """Guardar los datos del registro hasta que se verifique el email"""
+        obtener_almacen_ttl().guardar(f"registro_pendiente:{email}", user_data, PENDING_REGISTRATION_TTL)
+
+    @staticmethod
+    def get_pending_registration(email):
+        """Datos del registro pendiente o None si no existe o expiró"""
+        return obtener_almacen_ttl().obtener(f"registro_pendiente:{email}")
+
+    @staticmethod
+    def delete_pending_registration(email):
+        obtener_almacen_ttl().eliminar(f"registro_pendiente:{email}")
\ No newline at end of file
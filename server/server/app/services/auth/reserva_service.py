@@ -1,11 +1,15 @@
+import logging
 from app.models.reserva import Reserva
 from app.models.cancha import Cancha
-from app.models.horario_cancha import HorarioCancha
+from app.services.auth.disponibilidad_service import DisponibilidadService
 from app.utils.database import db
-from app.utils.auth_utils import obtener_usuario_desde_token
+from sqlalchemy.exc import IntegrityError
+from app.utils.auth_utils import obtener_contexto_auth
 from datetime import datetime, date, time, timedelta
 import calendar
 
+logger = logging.getLogger(__name__)
+
 class ReservaService:
 
     @staticmethod
@@ -15,11 +19,11 @@ class ReservaService:
         """
         try:
             # Obtener usuario autenticado desde el token
-            usuario, error, status = obtener_usuario_desde_token()
+            usuario, error, status = obtener_contexto_auth()
             if error:
                 raise PermissionError("Usuario no autenticado")
 
-            print(f"👤 Usuario haciendo reserva: {usuario.email}")
+            logger.debug('Usuario haciendo reserva: ID %s', usuario.id)
             
             # Validar datos requeridos
             if not all(key in data for key in ['cancha_id', 'fecha', 'hora']):
@@ -29,16 +33,6 @@ class ReservaService:
             hora_solicitada = datetime.strptime(data['hora'], '%H:%M').time().replace(second=0)
             cancha_id = data['cancha_id']
 
-            # Verificar si ya tiene reserva para este día
-            reserva_existente = Reserva.query.filter_by(
-                user_id=usuario.id, 
-                fecha=fecha,
-                estado='confirmada'
-            ).first()
-            
-            if reserva_existente:
-                raise ValueError("Ya tienes una reserva confirmada para este día")
-
             # Verificar si la cancha existe
             cancha = Cancha.query.get(cancha_id)
             if not cancha:
@@ -49,17 +43,6 @@ class ReservaService:
             if not ReservaService._verificar_disponibilidad_horario(cancha_id, dia_semana, hora_solicitada):
                 raise ValueError(f"El horario {hora_solicitada.strftime('%H:%M')} no está disponible para {dia_semana}")
 
-            # Verificar si ya existe una reserva en ese horario
-            reserva_existente = Reserva.query.filter_by(
-                cancha_id=cancha_id,
-                fecha=fecha,
-                hora=hora_solicitada,
-                estado='confirmada'
-            ).first()
-            
-            if reserva_existente:
-                raise ValueError("Ya existe una reserva confirmada en ese horario")
-
             # Crear reserva
             nueva_reserva = Reserva(
                 cancha_id=cancha_id,
@@ -69,10 +52,18 @@ class ReservaService:
                 estado='confirmada'
             )
 
+            # Los índices únicos de turno y de usuario/día resuelven las reservas concurrentes
             db.session.add(nueva_reserva)
-            db.session.commit()
+            try:
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                mensaje = ReservaService._mensaje_conflicto(e)
+                if mensaje is None:
+                    raise
+                raise ValueError(mensaje)
             
-            print(f"✅ Reserva creada exitosamente: ID {nueva_reserva.id}, Cancha {cancha_id}, Fecha {fecha}, Hora {hora_solicitada}")
+            logger.debug('Reserva creada exitosamente: ID %s, Cancha %s, Fecha %s, Hora %s', nueva_reserva.id, cancha_id, fecha, hora_solicitada)
             return nueva_reserva
             
         except PermissionError as e:
@@ -83,9 +74,22 @@ class ReservaService:
             raise e
         except Exception as e:
             db.session.rollback()
-            print(f"💥 Error al crear reserva: {str(e)}")
+            logger.exception('Error al crear reserva: %s', e)
             raise Exception("Error interno al crear la reserva")
 
+    @staticmethod
+    def _mensaje_conflicto(error):
+        """
+        Traducir la violación de un índice único de reservas al mensaje de negocio.
+        MySQL informa el nombre del índice y SQLite las columnas.
+        """
+        detalle = str(error.orig)
+        if 'uq_reservas_usuario_dia_activo' in detalle or 'reservas.user_id' in detalle:
+            return "Ya tienes una reserva confirmada para este día"
+        if 'uq_reservas_slot_activo' in detalle or 'reservas.cancha_id' in detalle:
+            return "Ya existe una reserva confirmada en ese horario"
+        return None
+
     @staticmethod
     def _obtener_dia_semana(fecha):
         """Obtener el día de la semana en español"""
@@ -106,36 +110,7 @@ class ReservaService:
         """
         Verificar si un horario está disponible según los rangos configurados
         """
-        horarios_rango = HorarioCancha.query.filter_by(
-            cancha_id=cancha_id,
-            dia_semana=dia_semana,
-            disponible=True
-        ).all()
-
-        for horario in horarios_rango:
-            if ReservaService._hora_en_rango(hora_solicitada, horario.hora_inicio, horario.hora_fin, horario.intervalo_minutos):
-                return True
-        
-        return False
-
-    @staticmethod
-    def _hora_en_rango(hora_solicitada, hora_inicio, hora_fin, intervalo_minutos):
-        """
-        Verificar si una hora específica está dentro de un rango considerando el intervalo
-        """
-        hora_solicitada_dt = datetime.combine(datetime.today(), hora_solicitada)
-        inicio_dt = datetime.combine(datetime.today(), hora_inicio)
-        fin_dt = datetime.combine(datetime.today(), hora_fin)
-
-        # Verificar que esté dentro del rango general
-        if not (inicio_dt <= hora_solicitada_dt < fin_dt):
-            return False
-
-        # Verificar que coincida con el intervalo
-        tiempo_desde_inicio = hora_solicitada_dt - inicio_dt
-        minutos_desde_inicio = tiempo_desde_inicio.total_seconds() / 60
-        
-        return minutos_desde_inicio % intervalo_minutos == 0
+        return DisponibilidadService.hora_en_plantilla(cancha_id, dia_semana, hora_solicitada)
 
     @staticmethod
     def actualizar_estado_reserva(reserva):
@@ -149,13 +124,13 @@ class ReservaService:
             # Si la fecha de reserva es anterior a hoy, cambiar a finalizado
             if reserva.fecha < hoy and reserva.estado == 'confirmada':
                 reserva.estado = 'finalizado'
-                print(f"✅ Reserva {reserva.id} actualizada a 'finalizado' (fecha: {reserva.fecha})")
+                logger.debug("Reserva %s actualizada a 'finalizado' (fecha: %s)", reserva.id, reserva.fecha)
                 return True
                 
             return False
             
         except Exception as e:
-            print(f"💥 Error al actualizar estado de reserva {reserva.id}: {str(e)}")
+            logger.exception('Error al actualizar estado de reserva %s: %s', reserva.id, e)
             return False
 
     @staticmethod
@@ -165,14 +140,14 @@ class ReservaService:
         CON VALIDACIÓN AUTOMÁTICA DE ESTADO
         """
         try:
-            print(f"🔍 Obteniendo TODAS las reservas del usuario")
+            logger.debug('Obteniendo TODAS las reservas del usuario')
             
             # Obtener usuario desde el token
-            usuario, error, status = obtener_usuario_desde_token()
+            usuario, error, status = obtener_contexto_auth()
             if error:
                 raise PermissionError("Usuario no autenticado")
             
-            print(f"👤 Usuario: {usuario.email} (ID: {usuario.id})")
+            logger.debug('Usuario: ID %s', usuario.id)
             
             # Obtener TODAS las reservas del usuario sin filtros
             reservas = Reserva.query.filter_by(
@@ -182,7 +157,7 @@ class ReservaService:
                 Reserva.hora.desc()    # Hora más reciente primero
             ).all()
             
-            print(f"📊 Total de reservas encontradas: {len(reservas)}")
+            logger.debug('Total de reservas encontradas: %s', len(reservas))
             
             # Validar y actualizar estados de cada reserva
             reservas_actualizadas = 0
@@ -193,7 +168,7 @@ class ReservaService:
             # Guardar cambios si hubo actualizaciones
             if reservas_actualizadas > 0:
                 db.session.commit()
-                print(f"📈 {reservas_actualizadas} reservas actualizadas a 'finalizado'")
+                logger.debug("%s reservas actualizadas a 'finalizado'", reservas_actualizadas)
             
             # Preparar respuesta con información completa
             reservas_formateadas = []
@@ -224,18 +199,16 @@ class ReservaService:
                     }
                 
                 reservas_formateadas.append(reserva_info)
-                print(f"📅 Reserva {reserva.id}: {reserva.fecha} {reserva.hora.strftime('%H:%M')} - Estado: {reserva.estado}")
+                logger.debug('Reserva %s: %s %s - Estado: %s', reserva.id, reserva.fecha, reserva.hora, reserva.estado)
             
-            print(f"✅ Retornando {len(reservas_formateadas)} reservas para el usuario {usuario.email}")
+            logger.debug('Retornando %s reservas para el usuario ID %s', len(reservas_formateadas), usuario.id)
             return reservas_formateadas
             
         except PermissionError as e:
-            print(f"❌ Error de autenticación: {str(e)}")
+            logger.info('Error de autenticación: %s', e)
             raise e
         except Exception as e:
-            print(f"💥 Error al obtener todas las reservas del usuario: {str(e)}")
-            import traceback
-            print(f"🔍 Traceback: {traceback.format_exc()}")
+            logger.exception('Error al obtener todas las reservas del usuario: %s', e)
             raise Exception("Error interno al obtener las reservas")
 
     @staticmethod
@@ -244,14 +217,14 @@ class ReservaService:
         Cancelar una reserva específica del usuario
         """
         try:
-            print(f"🗑️ Intentando cancelar reserva ID: {reserva_id}")
+            logger.debug('Intentando cancelar reserva ID: %s', reserva_id)
             
             # Obtener usuario desde el token
-            usuario, error, status = obtener_usuario_desde_token()
+            usuario, error, status = obtener_contexto_auth()
             if error:
                 raise PermissionError("Usuario no autenticado")
             
-            print(f"👤 Usuario intentando cancelar: {usuario.email} (ID: {usuario.id})")
+            logger.debug('Usuario intentando cancelar: ID %s', usuario.id)
             
             # Buscar la reserva
             reserva = Reserva.query.get(reserva_id)
@@ -279,7 +252,7 @@ class ReservaService:
             reserva.estado = 'cancelada'
             db.session.commit()
             
-            print(f"✅ Reserva {reserva_id} cancelada exitosamente por usuario {usuario.email}")
+            logger.debug('Reserva %s cancelada exitosamente por usuario ID %s', reserva_id, usuario.id)
             
             # Preparar respuesta
             reserva_cancelada = {
@@ -299,12 +272,12 @@ class ReservaService:
             return reserva_cancelada
             
         except PermissionError as e:
-            print(f"❌ Error de permisos al cancelar reserva: {str(e)}")
+            logger.info('Error de permisos al cancelar reserva: %s', e)
             raise e
         except ValueError as e:
-            print(f"❌ Error de validación al cancelar reserva: {str(e)}")
+            logger.info('Error de validación al cancelar reserva: %s', e)
             raise e
         except Exception as e:
-            print(f"💥 Error interno al cancelar reserva: {str(e)}")
+            logger.exception('Error interno al cancelar reserva: %s', e)
             db.session.rollback()
             raise Exception("Error interno al cancelar la reserva")
\ No newline at end of file
@@ -0,0 +1,383 @@
+"""
+Cola de salida de correo
+
+Los mensajes se guardan en una bandeja de salida SQLite (WAL) antes de
+responder, y un hilo por proceso los envía reutilizando una conexión SMTP
+autenticada. Las ráfagas se agrupan en lotes sobre la misma conexión y los
+fallos transitorios se reintentan con espera exponencial. La bandeja es
+compartida por los workers de la máquina: cada lote se reserva con una
+escritura atómica, así que un mensaje lo envía un solo proceso.
+"""
+import logging
+import os
+import smtplib
+import threading
+import time
+import uuid
+
+from app.utils.sqlite_local import conectar_sqlite_privado, ruta_instancia
+
+logger = logging.getLogger(__name__)
+
+
+def _bool_env(nombre, por_defecto):
+    return os.getenv(nombre, por_defecto).strip().lower() in ('1', 'true', 'si', 'yes')
+
+
+# Los cuerpos MIME incluyen los códigos de verificación: archivo 0600 en el directorio de la app
+MAIL_OUTBOX_PATH = os.getenv('MAIL_OUTBOX_PATH') or ruta_instancia('correo.sqlite3')
+MAIL_SMTP_HOST = os.getenv('MAIL_SMTP_HOST', 'smtp.gmail.com')
+MAIL_SMTP_PORT = int(os.getenv('MAIL_SMTP_PORT', '587'))
+MAIL_SMTP_STARTTLS = _bool_env('MAIL_SMTP_STARTTLS', 'true')
+MAIL_SMTP_TIMEOUT = float(os.getenv('MAIL_SMTP_TIMEOUT', '20'))
+# Segundos sin uso tras los que se cierra la conexión SMTP
+MAIL_SMTP_INACTIVIDAD = float(os.getenv('MAIL_SMTP_INACTIVIDAD', '60'))
+# Gmail corta la sesión pasadas ~100 entregas; se reconecta antes
+MAIL_MENSAJES_POR_CONEXION = int(os.getenv('MAIL_MENSAJES_POR_CONEXION', '90'))
+# Espera tras el primer mensaje de una ráfaga para juntar el resto en un lote
+MAIL_LOTE_ESPERA_MS = float(os.getenv('MAIL_LOTE_ESPERA_MS', '200'))
+MAIL_LOTE_MAX = int(os.getenv('MAIL_LOTE_MAX', '50'))
+MAIL_MAX_INTENTOS = int(os.getenv('MAIL_MAX_INTENTOS', '6'))
+MAIL_REINTENTO_BASE = float(os.getenv('MAIL_REINTENTO_BASE', '5'))
+MAIL_REINTENTO_MAX = float(os.getenv('MAIL_REINTENTO_MAX', '900'))
+# Reserva de los mensajes de un lote; se renueva antes de cada envío, así que solo debe
+# cubrir el peor caso de un mensaje (reconexión + envío, cada operación acotada por
+# MAIL_SMTP_TIMEOUT). Lo reservado por un proceso que murió vuelve a la cola al vencer
+MAIL_RESERVA_SEGUNDOS = float(os.getenv('MAIL_RESERVA_SEGUNDOS', str(20 * MAIL_SMTP_TIMEOUT)))
+# Revisión periódica de la bandeja (reintentos vencidos, mensajes de otros procesos)
+MAIL_INTERVALO_REVISION = float(os.getenv('MAIL_INTERVALO_REVISION', '5'))
+# Segundos que se conservan las filas enviadas (sin el cuerpo) antes de borrarlas
+MAIL_RETENCION_ENVIADOS = float(os.getenv('MAIL_RETENCION_ENVIADOS', str(24 * 60 * 60)))
+
+
+def credenciales_smtp():
+    """(remitente, contraseña) desde GMAIL_EMAIL / GMAIL_APP_PASSWORD"""
+    return os.getenv('GMAIL_EMAIL'), os.getenv('GMAIL_APP_PASSWORD')
+
+
+class ConexionSMTP:
+    """
+    Conexión SMTP autenticada reutilizable. Se abre al primer envío, se
+    renueva tras ``MAIL_MENSAJES_POR_CONEXION`` entregas o si el servidor la
+    cerró, y se cierra tras ``MAIL_SMTP_INACTIVIDAD`` segundos sin uso.
+    """
+
+    def __init__(self, host, port, usuario=None, password=None, starttls=True, timeout=20):
+        self.host = host
+        self.port = port
+        self.usuario = usuario
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._smtp = None
+        self._enviados = 0
+        self._ultimo_uso = 0.0
+
+    def _abrir(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.password:
+                smtp.login(self.usuario, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self._enviados = 0
+        logger.debug('Conexión SMTP abierta con %s:%s', self.host, self.port)
+
+    def enviar(self, remitente, destinatario, mensaje):
+        if self._smtp is not None and self._enviados >= MAIL_MENSAJES_POR_CONEXION:
+            self.cerrar()
+        if self._smtp is None:
+            self._abrir()
+        try:
+            self._smtp.sendmail(remitente, destinatario, mensaje)
+        except smtplib.SMTPServerDisconnected:
+            # El servidor cerró la sesión reutilizada: un reintento con conexión nueva
+            self._smtp = None
+            self._abrir()
+            self._smtp.sendmail(remitente, destinatario, mensaje)
+        self._enviados += 1
+        self._ultimo_uso = time.monotonic()
+
+    def cerrar_si_inactiva(self):
+        if self._smtp is not None and time.monotonic() - self._ultimo_uso > MAIL_SMTP_INACTIVIDAD:
+            self.cerrar()
+
+    def cerrar(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+
+def _es_permanente(error):
+    """Rechazos 5xx del servidor: reintentar no cambia el resultado"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(codigo >= 500 for codigo, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500 and not isinstance(error, smtplib.SMTPAuthenticationError)
+    return False
+
+
+def _espera_reintento(intentos):
+    """Segundos hasta el siguiente intento tras ``intentos`` fallos (exponencial con tope)"""
+    return min(MAIL_REINTENTO_BASE * (2 ** (intentos - 1)), MAIL_REINTENTO_MAX)
+
+
+class ColaCorreo:
+    """Bandeja de salida durable y hilo remitente del proceso"""
+
+    def __init__(self, ruta, conexion_smtp=None):
+        self.ruta = ruta
+        self._local = threading.local()
+        self._conexion_smtp = conexion_smtp
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._hilo_lock = threading.Lock()
+        self._conexion().execute(
+            'CREATE TABLE IF NOT EXISTS correos_salientes ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'remitente TEXT NOT NULL, '
+            'destinatario TEXT NOT NULL, '
+            'mensaje TEXT NOT NULL, '
+            "estado TEXT NOT NULL DEFAULT 'pendiente', "
+            'intentos INTEGER NOT NULL DEFAULT 0, '
+            'proximo_intento REAL NOT NULL, '
+            'reservado_hasta REAL, '
+            'reserva TEXT, '
+            'ultimo_error TEXT, '
+            'creado_en REAL NOT NULL, '
+            'enviado_en REAL)'
+        )
+        columnas = {fila[1] for fila in self._conexion().execute('PRAGMA table_info(correos_salientes)')}
+        if 'reserva' not in columnas:
+            # Bandejas creadas antes del token de reserva
+            self._conexion().execute('ALTER TABLE correos_salientes ADD COLUMN reserva TEXT')
+        self._conexion().execute(
+            'CREATE INDEX IF NOT EXISTS ix_correos_salientes_estado_proximo '
+            'ON correos_salientes (estado, proximo_intento)'
+        )
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = conectar_sqlite_privado(self.ruta, timeout=10)
+            # WAL + NORMAL: el commit sobrevive a una caída del proceso
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexion = conexion
+        return conexion
+
+    def encolar(self, remitente, destinatario, mensaje):
+        """Guardar el mensaje (texto MIME completo) y avisar al remitente; devuelve su id"""
+        ahora = time.time()
+        cursor = self._conexion().execute(
+            'INSERT INTO correos_salientes (remitente, destinatario, mensaje, proximo_intento, creado_en) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (remitente, destinatario, mensaje, ahora, ahora)
+        )
+        self.iniciar()
+        self._despertar.set()
+        return cursor.lastrowid
+
+    def estadisticas(self):
+        filas = self._conexion().execute(
+            'SELECT estado, COUNT(*) FROM correos_salientes GROUP BY estado'
+        ).fetchall()
+        datos = {'pendiente': 0, 'enviando': 0, 'enviado': 0, 'fallido': 0}
+        datos.update(dict(filas))
+        datos['remitente_activo'] = self._hilo is not None and self._hilo.is_alive()
+        return datos
+
+    def _reservar_lote(self, limite):
+        """
+        Reservar hasta ``limite`` mensajes vencidos (atómico entre procesos).
+        Devuelve ``(token, filas)``; el token identifica la reserva en las
+        escrituras posteriores.
+        """
+        ahora = time.time()
+        token = uuid.uuid4().hex
+        conexion = self._conexion()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            # Reservas vencidas: el proceso que las tomó murió o se colgó a mitad del envío.
+            # Cuentan como intento, para que un mensaje que tumba al worker no se reintente siempre
+            conexion.execute(
+                "UPDATE correos_salientes SET estado = 'fallido', intentos = intentos + 1, "
+                "reserva = NULL, reservado_hasta = NULL, ultimo_error = 'Reserva vencida sin confirmar el envío' "
+                "WHERE estado = 'enviando' AND reservado_hasta < ? AND intentos + 1 >= ?",
+                (ahora, MAIL_MAX_INTENTOS)
+            )
+            conexion.executemany(
+                "UPDATE correos_salientes SET estado = 'pendiente', intentos = ?, proximo_intento = ?, "
+                "reserva = NULL, reservado_hasta = NULL, ultimo_error = 'Reserva vencida sin confirmar el envío' "
+                'WHERE id = ?',
+                [
+                    (intentos + 1, ahora + _espera_reintento(intentos + 1), id_correo)
+                    for id_correo, intentos in conexion.execute(
+                        "SELECT id, intentos FROM correos_salientes WHERE estado = 'enviando' AND reservado_hasta < ?",
+                        (ahora,)
+                    ).fetchall()
+                ]
+            )
+
+            filas = conexion.execute(
+                'SELECT id, remitente, destinatario, mensaje, intentos FROM correos_salientes '
+                "WHERE estado = 'pendiente' AND proximo_intento <= ? "
+                'ORDER BY id LIMIT ?',
+                (ahora, limite)
+            ).fetchall()
+            if filas:
+                conexion.executemany(
+                    "UPDATE correos_salientes SET estado = 'enviando', reserva = ?, reservado_hasta = ? WHERE id = ?",
+                    [(token, ahora + MAIL_RESERVA_SEGUNDOS, fila[0]) for fila in filas]
+                )
+            conexion.execute('COMMIT')
+        except Exception:
+            conexion.execute('ROLLBACK')
+            raise
+        return token, filas
+
+    def _renovar_reserva(self, token, pendientes):
+        """Extender la reserva de lo que queda del lote; False si otro proceso la recuperó"""
+        cursor = self._conexion().execute(
+            "UPDATE correos_salientes SET reservado_hasta = ? WHERE reserva = ? AND estado = 'enviando'",
+            (time.time() + MAIL_RESERVA_SEGUNDOS, token)
+        )
+        return cursor.rowcount == pendientes
+
+    def _marcar_enviado(self, token, id_correo):
+        self._conexion().execute(
+            "UPDATE correos_salientes SET estado = 'enviado', enviado_en = ?, reserva = NULL, "
+            "reservado_hasta = NULL, mensaje = '' WHERE id = ? AND reserva = ?",
+            (time.time(), id_correo, token)
+        )
+
+    def _marcar_error(self, token, id_correo, intentos, error):
+        intentos += 1
+        if _es_permanente(error) or intentos >= MAIL_MAX_INTENTOS:
+            logger.error('Correo %s descartado tras %s intento(s): %s', id_correo, intentos, error)
+            estado, proximo = 'fallido', time.time()
+        else:
+            espera = _espera_reintento(intentos)
+            logger.warning('Correo %s falló (intento %s), reintento en %.0fs: %s', id_correo, intentos, espera, error)
+            estado, proximo = 'pendiente', time.time() + espera
+        self._conexion().execute(
+            'UPDATE correos_salientes SET estado = ?, intentos = ?, proximo_intento = ?, '
+            'reserva = NULL, reservado_hasta = NULL, ultimo_error = ? WHERE id = ? AND reserva = ?',
+            (estado, intentos, proximo, str(error)[:500], id_correo, token)
+        )
+        return proximo
+
+    def _smtp(self):
+        if self._conexion_smtp is None:
+            usuario, password = credenciales_smtp()
+            self._conexion_smtp = ConexionSMTP(
+                MAIL_SMTP_HOST, MAIL_SMTP_PORT, usuario, password,
+                starttls=MAIL_SMTP_STARTTLS, timeout=MAIL_SMTP_TIMEOUT
+            )
+        return self._conexion_smtp
+
+    def procesar_lote(self):
+        """
+        Enviar un lote de mensajes vencidos. Devuelve cuántos se reservaron, o
+        0 si el servidor falló y el lote se aplazó.
+        """
+        token, lote = self._reservar_lote(MAIL_LOTE_MAX)
+        smtp = self._smtp()
+        for posicion, (id_correo, remitente, destinatario, mensaje, intentos) in enumerate(lote):
+            if posicion and not self._renovar_reserva(token, len(lote) - posicion):
+                # La reserva venció y otro proceso tomó el resto: enviarlo aquí lo duplicaría
+                logger.warning('Reserva de correo perdida, se abandona el resto del lote')
+                return 0
+            try:
+                smtp.enviar(remitente, destinatario, mensaje)
+            except (smtplib.SMTPException, OSError) as e:
+                proximo = self._marcar_error(token, id_correo, intentos, e)
+                if not _es_permanente(e):
+                    # Servidor caído o sesión rota: el resto del lote espera lo mismo, sin gastar intentos
+                    smtp.cerrar()
+                    self._aplazar(token, proximo)
+                    return 0
+            else:
+                self._marcar_enviado(token, id_correo)
+        return len(lote)
+
+    def _aplazar(self, token, proximo):
+        self._conexion().execute(
+            "UPDATE correos_salientes SET estado = 'pendiente', proximo_intento = ?, reserva = NULL, "
+            "reservado_hasta = NULL WHERE reserva = ? AND estado = 'enviando'",
+            (proximo, token)
+        )
+
+    def _purgar_enviados(self):
+        self._conexion().execute(
+            "DELETE FROM correos_salientes WHERE estado = 'enviado' AND enviado_en < ?",
+            (time.time() - MAIL_RETENCION_ENVIADOS,)
+        )
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            despertado = self._despertar.wait(MAIL_INTERVALO_REVISION)
+            if self._detener.is_set():
+                break
+            if despertado:
+                # Juntar la ráfaga en curso antes de reservar
+                time.sleep(MAIL_LOTE_ESPERA_MS / 1000)
+                self._despertar.clear()
+            try:
+                while self.procesar_lote() >= MAIL_LOTE_MAX and not self._detener.is_set():
+                    pass
+                self._smtp().cerrar_si_inactiva()
+                if not despertado:
+                    self._purgar_enviados()
+            except Exception:
+                logger.exception('Error en el envío de la cola de correo')
+        if self._conexion_smtp is not None:
+            self._conexion_smtp.cerrar()
+
+    def iniciar(self):
+        """Arrancar el hilo remitente si no está vivo en este proceso"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._hilo_lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._detener.clear()
+                self._hilo = threading.Thread(target=self._bucle, name='cola-correo', daemon=True)
+                self._hilo.start()
+
+    def detener(self, timeout=5):
+        self._detener.set()
+        self._despertar.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+
+_colas = {}
+_colas_lock = threading.Lock()
+
+
+def obtener_cola_correo():
+    """Cola del proceso actual (los workers creados por fork no heredan el hilo)"""
+    llave = (os.getpid(), os.path.abspath(MAIL_OUTBOX_PATH))
+    cola = _colas.get(llave)
+    if cola is None:
+        with _colas_lock:
+            cola = _colas.get(llave)
+            if cola is None:
+                cola = ColaCorreo(llave[1])
+                _colas[llave] = cola
+    return cola
+
+
+def registrar_cola_correo(app):
+    """Arranca el remitente con la primera petición de cada worker para vaciar lo pendiente"""
+    @app.before_request
+    def _iniciar_cola_correo():
+        obtener_cola_correo().iniciar()
@@ -1,15 +1,18 @@
-import smtplib
-import os
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+import logging
 import random
 import string
-from datetime import datetime, timedelta
+
+from app.services.email.cola_correo import MAIL_SMTP_HOST, credenciales_smtp, obtener_cola_correo
+from app.utils.almacen_ttl import obtener_almacen_ttl
+
+# Vigencia de los códigos de verificación (el email indica 15 minutos)
+VERIFICATION_CODE_TTL = 15 * 60
+
+logger = logging.getLogger(__name__)
 
 class EmailService:
-    # Almacenamiento temporal de códigos (en producción usa Redis o DB)
-    verification_codes = {}
-    
     @staticmethod
     def generate_verification_code(length=6):
         """Generar código de verificación aleatorio"""
@@ -17,17 +20,14 @@ class EmailService:
     
     @staticmethod
     def send_verification_email(user_email, user_name, verification_code):
-        """Enviar email de verificación"""
+        """Encolar email de verificación; True cuando quedó guardado en la cola de salida"""
         try:
-            print(f"📧 Preparando envío de email de verificación a: {user_email}")
+            logger.debug('Preparando email de verificación para: %s', user_email)
             
-            # Configuración del servidor SMTP de Gmail
-            smtp_server = "smtp.gmail.com"
-            port = 587
-            sender_email = os.getenv('GMAIL_EMAIL')
-            sender_password = os.getenv('GMAIL_APP_PASSWORD')
+            # Remitente y credenciales SMTP (el servidor se configura en cola_correo)
+            sender_email, sender_password = credenciales_smtp()
             
-            if not sender_email or not sender_password:
+            if not sender_email or (not sender_password and MAIL_SMTP_HOST == 'smtp.gmail.com'):
                 raise ValueError("Configuración de email no encontrada en variables de entorno")
             
             # Crear el mensaje
@@ -97,73 +97,66 @@ class EmailService:
             message.attach(part1)
             message.attach(part2)
             
-            # Enviar email
-            print("🔗 Conectando al servidor SMTP...")
-            server = smtplib.SMTP(smtp_server, port)
-            server.starttls()  # Seguridad
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, user_email, message.as_string())
-            server.quit()
+            # Encolar: el hilo remitente lo envía con la conexión SMTP compartida
+            id_correo = obtener_cola_correo().encolar(sender_email, user_email, message.as_string())
             
-            print(f"✅ Email de verificación enviado exitosamente a: {user_email}")
+            logger.debug('Email de verificación encolado (#%s) para: %s', id_correo, user_email)
             return True
             
         except Exception as e:
-            print(f"❌ Error al enviar email de verificación: {str(e)}")
+            logger.exception('Error al encolar email de verificación: %s', e)
             return False
     
     @staticmethod
     def store_verification_code(email, code):
-        """Almacenar código de verificación con timestamp"""
-        expiration_time = datetime.now() + timedelta(minutes=15)
-        EmailService.verification_codes[email] = {
-            'code': code,
-            'expires_at': expiration_time,
-            'verified': False
-        }
-        print(f"💾 Código almacenado para {email}: {code} (expira: {expiration_time})")
+        """Almacenar código de verificación con expiración"""
+        obtener_almacen_ttl().guardar(
+            EmailService._clave_codigo(email),
+            {'code': code, 'verified': False},
+            VERIFICATION_CODE_TTL
+        )
+        logger.debug('Código de verificación almacenado para %s (expira en %s min)', email, VERIFICATION_CODE_TTL // 60)
     
     @staticmethod
     def verify_code(email, code):
         """Verificar código de verificación"""
-        print(f"🔍 Verificando código para: {email}")
-        
-        if email not in EmailService.verification_codes:
-            print("❌ No se encontró código para este email")
-            return False
+        logger.debug('Verificando código para: %s', email)
         
-        stored_data = EmailService.verification_codes[email]
+        almacen = obtener_almacen_ttl()
+        clave = EmailService._clave_codigo(email)
+        stored_data = almacen.obtener(clave)
         
-        # Verificar expiración
-        if datetime.now() > stored_data['expires_at']:
-            print("❌ Código expirado")
-            del EmailService.verification_codes[email]
+        # Los códigos expirados ya no están en el almacén
+        if stored_data is None:
+            logger.info('No se encontró código para %s o expiró', email)
             return False
         
         # Verificar código
         if stored_data['code'] == code:
-            print("✅ Código verificado correctamente")
-            EmailService.verification_codes[email]['verified'] = True
+            logger.debug('Código verificado correctamente para %s', email)
+            stored_data['verified'] = True
+            almacen.actualizar(clave, stored_data)
             return True
         
-        print("❌ Código incorrecto")
+        logger.info('Código incorrecto para %s', email)
         return False
     
     @staticmethod
     def is_email_verified(email):
         """Verificar si el email ya fue verificado"""
-        return (email in EmailService.verification_codes and 
-                EmailService.verification_codes[email]['verified'])
+        stored_data = obtener_almacen_ttl().obtener(EmailService._clave_codigo(email))
+        return bool(stored_data and stored_data['verified'])
+    
+    @staticmethod
+    def delete_verification_code(email):
+        """Eliminar el código de verificación (registro completado)"""
+        obtener_almacen_ttl().eliminar(EmailService._clave_codigo(email))
     
     @staticmethod
     def cleanup_expired_codes():
-        """Limpiar códigos expirados (ejecutar periódicamente)"""
-        current_time = datetime.now()
-        expired_emails = [
-            email for email, data in EmailService.verification_codes.items()
-            if current_time > data['expires_at']
-        ]
-        
-        for email in expired_emails:
-            del EmailService.verification_codes[email]
-            print(f"🗑️ Código expirado eliminado para: {email}")
\ No newline at end of file
+        """Limpiar códigos expirados (el almacén ya los descarta al vencer)"""
+        obtener_almacen_ttl().purgar()
+    
+    @staticmethod
+    def _clave_codigo(email):
+        return f"verificacion:{email}"
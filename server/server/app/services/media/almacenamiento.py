@@ -0,0 +1,238 @@
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+from flask import current_app
+from werkzeug.security import safe_join
+
+logger = logging.getLogger(__name__)
+
+# Las URLs guardadas en BD conservan este prefijo; lo que sigue es la clave en el almacenamiento
+PREFIJO_URL = '/utils/pictures/'
+
+CACHE_CONTROL_OBJETOS = 'public, max-age=31536000, immutable'
+
+_instancias = {}
+_instancias_lock = threading.Lock()
+
+
+def clave_desde_url(url):
+    """'/utils/pictures/canchas/5/webp/x.webp' -> 'canchas/5/webp/x.webp' (None si no es local)"""
+    if not url or not url.startswith(PREFIJO_URL):
+        return None
+    return url[len(PREFIJO_URL):]
+
+
+def url_desde_clave(clave):
+    return PREFIJO_URL + clave
+
+
+class AlmacenamientoLocal:
+    """Objetos como archivos bajo ``raiz``; la escritura es atómica (temporal + rename)"""
+
+    def __init__(self, raiz):
+        self.raiz = raiz
+
+    def config(self):
+        return {'tipo': 'local', 'raiz': self.raiz}
+
+    def ruta_local(self, clave):
+        """Ruta absoluta del objeto, o None si la clave sale de la raíz"""
+        return safe_join(self.raiz, clave)
+
+    def existe(self, clave):
+        ruta = self.ruta_local(clave)
+        return ruta is not None and os.path.exists(ruta)
+
+    def _destino(self, clave):
+        ruta = self.ruta_local(clave)
+        if ruta is None:
+            raise ValueError(f"Clave de almacenamiento inválida: {clave}")
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        return ruta
+
+    def guardar_archivo(self, ruta_origen, clave, content_type=None):
+        destino = self._destino(clave)
+        temporal = f"{destino}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.copyfile(ruta_origen, temporal)
+            os.replace(temporal, destino)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+    def guardar_bytes(self, datos, clave, content_type=None):
+        destino = self._destino(clave)
+        temporal = f"{destino}.{uuid.uuid4().hex}.tmp"
+        with open(temporal, 'wb') as f:
+            f.write(datos)
+        os.replace(temporal, destino)
+
+    def leer(self, clave):
+        ruta = self.ruta_local(clave)
+        if ruta is None or not os.path.exists(ruta):
+            return None
+        with open(ruta, 'rb') as f:
+            return f.read()
+
+    def abrir(self, clave):
+        """Archivo binario para leer por bloques"""
+        return open(self.ruta_local(clave), 'rb')
+
+    def tamano(self, clave):
+        return os.path.getsize(self.ruta_local(clave))
+
+    def eliminar(self, clave):
+        ruta = self.ruta_local(clave)
+        if ruta is None or not os.path.exists(ruta):
+            return
+        os.remove(ruta)
+
+        # Quitar carpetas que queden vacías, sin salir de la raíz
+        carpeta = os.path.dirname(ruta)
+        while carpeta.startswith(self.raiz) and carpeta != self.raiz and not os.listdir(carpeta):
+            os.rmdir(carpeta)
+            carpeta = os.path.dirname(carpeta)
+
+    def url_descarga(self, clave):
+        """Los archivos locales los sirve la propia app (ver app.utils.media)"""
+        return None
+
+
+class AlmacenamientoS3:
+    """
+    Objetos en un bucket S3 o compatible (MinIO con ``endpoint``).
+    ``boto3`` es opcional: solo se importa al usar este backend. Las
+    credenciales salen de la cadena estándar de boto3 (AWS_ACCESS_KEY_ID, ...).
+    """
+
+    def __init__(self, bucket, endpoint=None, region=None, prefijo='', url_publica=None, url_ttl=3600):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError("MEDIA_STORAGE=s3 requiere el paquete boto3") from e
+
+        self.bucket = bucket
+        self.endpoint = endpoint
+        self.region = region
+        self.prefijo = prefijo.strip('/') + '/' if prefijo else ''
+        self.url_publica = url_publica.rstrip('/') if url_publica else None
+        self.url_ttl = url_ttl
+        self._client_error = ClientError
+        self._cliente = boto3.client('s3', endpoint_url=endpoint, region_name=region)
+
+    def config(self):
+        return {
+            'tipo': 's3',
+            'bucket': self.bucket,
+            'endpoint': self.endpoint,
+            'region': self.region,
+            'prefijo': self.prefijo,
+            'url_publica': self.url_publica,
+            'url_ttl': self.url_ttl,
+        }
+
+    def _key(self, clave):
+        return self.prefijo + clave
+
+    def ruta_local(self, clave):
+        return None
+
+    def existe(self, clave):
+        try:
+            self._cliente.head_object(Bucket=self.bucket, Key=self._key(clave))
+            return True
+        except self._client_error as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def _extra(self, content_type):
+        extra = {'CacheControl': CACHE_CONTROL_OBJETOS}
+        if content_type:
+            extra['ContentType'] = content_type
+        return extra
+
+    def guardar_archivo(self, ruta_origen, clave, content_type=None):
+        self._cliente.upload_file(ruta_origen, self.bucket, self._key(clave), ExtraArgs=self._extra(content_type))
+
+    def guardar_bytes(self, datos, clave, content_type=None):
+        self._cliente.put_object(Bucket=self.bucket, Key=self._key(clave), Body=datos, **self._extra(content_type))
+
+    def leer(self, clave):
+        try:
+            return self._cliente.get_object(Bucket=self.bucket, Key=self._key(clave))['Body'].read()
+        except self._client_error as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def abrir(self, clave):
+        """Cuerpo de ``get_object`` (StreamingBody): se lee por bloques sin cargarlo entero"""
+        return self._cliente.get_object(Bucket=self.bucket, Key=self._key(clave))['Body']
+
+    def tamano(self, clave):
+        return self._cliente.head_object(Bucket=self.bucket, Key=self._key(clave))['ContentLength']
+
+    def eliminar(self, clave):
+        self._cliente.delete_object(Bucket=self.bucket, Key=self._key(clave))
+
+    def url_descarga(self, clave):
+        """URL pública (CDN/bucket público) o prefirmada con caducidad ``url_ttl``"""
+        if self.url_publica:
+            return f"{self.url_publica}/{self._key(clave)}"
+        return self._cliente.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': self._key(clave)},
+            ExpiresIn=self.url_ttl
+        )
+
+
+def crear_almacenamiento(config):
+    """Backend a partir de su ``config()``; se reutiliza una instancia por proceso"""
+    llave = tuple(sorted(config.items()))
+    instancia = _instancias.get(llave)
+    if instancia is None:
+        with _instancias_lock:
+            instancia = _instancias.get(llave)
+            if instancia is None:
+                datos = dict(config)
+                tipo = datos.pop('tipo')
+                if tipo == 's3':
+                    instancia = AlmacenamientoS3(**datos)
+                elif tipo == 'local':
+                    instancia = AlmacenamientoLocal(**datos)
+                else:
+                    raise ValueError(f"MEDIA_STORAGE desconocido: {tipo}")
+                _instancias[llave] = instancia
+    return instancia
+
+
+def obtener_almacenamiento():
+    """
+    Backend configurado por entorno:
+      MEDIA_STORAGE         'local' (por defecto) o 's3'
+      MEDIA_LOCAL_ROOT      raíz local (por defecto <app>/utils/pictures)
+      MEDIA_S3_BUCKET       bucket; MEDIA_S3_ENDPOINT para MinIO u otro compatible
+      MEDIA_S3_REGION, MEDIA_S3_PREFIJO
+      MEDIA_S3_URL_PUBLICA  base pública (CDN); si falta se usan URLs prefirmadas
+      MEDIA_S3_URL_TTL      segundos de validez de las URLs prefirmadas
+    """
+    tipo = os.getenv('MEDIA_STORAGE', 'local').strip().lower()
+    if tipo == 's3':
+        config = {
+            'tipo': 's3',
+            'bucket': os.environ['MEDIA_S3_BUCKET'],
+            'endpoint': os.getenv('MEDIA_S3_ENDPOINT') or None,
+            'region': os.getenv('MEDIA_S3_REGION') or None,
+            'prefijo': os.getenv('MEDIA_S3_PREFIJO', ''),
+            'url_publica': os.getenv('MEDIA_S3_URL_PUBLICA') or None,
+            'url_ttl': int(os.getenv('MEDIA_S3_URL_TTL', '3600')),
+        }
+    else:
+        raiz = os.getenv('MEDIA_LOCAL_ROOT') or os.path.join(current_app.root_path, 'utils', 'pictures')
+        config = {'tipo': 'local', 'raiz': os.path.abspath(raiz)}
+    return crear_almacenamiento(config)
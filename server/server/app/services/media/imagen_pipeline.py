@@ -0,0 +1,471 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.media_objeto import MediaObjeto
+from app.services.media.almacenamiento import (
+    clave_desde_url, crear_almacenamiento, obtener_almacenamiento, url_desde_clave
+)
+from app.utils.database import db
+
+logger = logging.getLogger(__name__)
+
+# Marcadores junto al WebP de destino en el almacenamiento: el estado se comparte entre servidores
+SUFIJO_PENDIENTE = '.pendiente'
+SUFIJO_ERROR = '.error'
+# session.info: archivos a borrar cuando se confirme la transacción que los liberó
+_CLAVE_LIBERADAS = '_imagenes_liberadas'
+# session.info: subidas nuevas a guardar y convertir cuando se confirme la transacción
+_CLAVE_NUEVAS = '_imagenes_nuevas'
+
+# Lados (px) de las variantes responsive; la mayor que no supere ``max_lado`` es el archivo base
+VARIANTES = (96, 320, 800, 1200)
+# Lado del archivo base para fotos de perfil (canchas y posts usan 1200)
+LADO_PERFIL = 800
+_PATRON_VARIANTE = re.compile(r'^(?P<base>.+)_w(?P<lado>\d+)\.webp$')
+# Nombre de un objeto direccionado por contenido: <sha256>_<lado>[_w<N>].webp
+_PATRON_CAS = re.compile(r'^(?P<sha>[0-9a-f]{64})_\d+(?:_w\d+)?\.webp$')
+
+IMAGENES_WORKERS = int(os.getenv('IMAGENES_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+IMAGENES_SINCRONO = os.getenv('IMAGENES_SINCRONO', 'false').lower() in ('1', 'true')
+# 'forkserver' evita heredar hilos (logging) y conexiones del proceso web; 'spawn' donde no exista
+IMAGENES_MP_CONTEXT = os.getenv(
+    'IMAGENES_MP_CONTEXT',
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+# Copia local de las subidas grandes mientras el pool las procesa (debe verla el proceso worker)
+IMAGENES_STAGING = os.getenv('IMAGENES_STAGING') or os.path.join(tempfile.gettempdir(), 'liga_agil_imagenes')
+# Hasta este tamaño la subida viaja en memoria al worker; por encima pasa por IMAGENES_STAGING
+IMAGENES_MEMORIA_MAX = int(os.getenv('IMAGENES_MEMORIA_MAX', str(8 * 1024 * 1024)))
+# Límites comprobados antes de decodificar (protección contra bombas de descompresión)
+IMAGENES_MAX_BYTES = int(os.getenv('IMAGENES_MAX_BYTES', str(15 * 1024 * 1024)))
+IMAGENES_MAX_PIXELES = int(os.getenv('IMAGENES_MAX_PIXELES', str(40_000_000)))
+FORMATOS_PERMITIDOS = {'JPEG', 'PNG', 'WEBP', 'GIF', 'BMP', 'TIFF', 'MPO'}
+
+# Pillow rechaza por su cuenta (DecompressionBombError) lo que supere el doble de este valor
+Image.MAX_IMAGE_PIXELS = IMAGENES_MAX_PIXELES
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def ruta_variante(ruta_base, lado):
+    """``.../<stem>.webp`` -> ``.../<stem>_w<lado>.webp`` (sirve para claves y URLs)"""
+    return f"{ruta_base[:-len('.webp')]}_w{lado}.webp"
+
+
+def lados_variantes(max_lado):
+    """Lados de las variantes menores que el archivo base"""
+    return [lado for lado in VARIANTES if lado < max_lado]
+
+
+def clave_original(sha256):
+    return f"originales/{sha256[:2]}/{sha256}"
+
+
+def _subir_webp(img, almacenamiento, clave, calidad, trabajo):
+    temporal = os.path.join(trabajo, os.path.basename(clave))
+    img.save(temporal, 'WEBP', quality=calidad, optimize=True)
+    almacenamiento.guardar_archivo(temporal, clave, content_type='image/webp')
+
+
+def _convertir_a_webp(origen, clave, max_lado, calidad, config_almacenamiento):
+    """
+    Convertir el original a WebP (se ejecuta en el pool de procesos).
+
+    ``origen`` son los bytes de la subida o la ruta en staging si era grande.
+    Con una sola decodificación genera el archivo base (``max_lado``) y las
+    variantes menores, reduciendo cada una a partir de la anterior. El base se
+    sube al final: cuando existe, todas las variantes ya están guardadas.
+    """
+    almacenamiento = crear_almacenamiento(config_almacenamiento)
+    trabajo = tempfile.mkdtemp(prefix='webp_')
+    en_memoria = isinstance(origen, bytes)
+    try:
+        with Image.open(io.BytesIO(origen) if en_memoria else origen) as img:
+            # JPEG: decodificar directamente a 1/2, 1/4 u 1/8 si sobra resolución
+            img.draft('RGB', (max_lado, max_lado))
+
+            # Convertir a RGB si es necesario
+            if img.mode in ('RGBA', 'P'):
+                img = img.convert('RGB')
+
+            # Redimensionar al lado máximo indicado
+            img.thumbnail((max_lado, max_lado), Image.Resampling.LANCZOS)
+            base = img.copy()
+
+            for lado in reversed(lados_variantes(max_lado)):
+                img.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+                _subir_webp(img, almacenamiento, ruta_variante(clave, lado), calidad, trabajo)
+
+            _subir_webp(base, almacenamiento, clave, calidad, trabajo)
+    except Exception as e:
+        almacenamiento.guardar_bytes(str(e).encode('utf-8'), clave + SUFIJO_ERROR)
+        raise
+    finally:
+        almacenamiento.eliminar(clave + SUFIJO_PENDIENTE)
+        shutil.rmtree(trabajo, ignore_errors=True)
+        if not en_memoria and os.path.exists(origen):
+            os.remove(origen)
+    return clave
+
+
+class ImagenPipeline:
+    """
+    Conversión de imágenes subidas a WebP fuera del ciclo de la petición.
+
+    La subida se guarda direccionada por contenido (SHA-256 del original): si
+    ya existe un objeto igual solo se suma una referencia en ``MediaObjeto``.
+    Si es nuevo, al confirmarse la transacción se guarda el original, se deja
+    un marcador ``.pendiente`` junto al WebP de destino y un pool de procesos
+    hace el trabajo de Pillow, retirando el marcador al terminar (o dejando un
+    ``.error``). Las rutas que sirven imágenes responden 202 mientras el
+    marcador exista.
+    """
+
+    @staticmethod
+    def _obtener_pool():
+        global _pool, _pool_pid
+        # Un pool por proceso: tras el fork de gunicorn el heredado no sirve
+        if _pool is None or _pool_pid != os.getpid():
+            with _pool_lock:
+                if _pool is None or _pool_pid != os.getpid():
+                    _pool = ProcessPoolExecutor(
+                        max_workers=IMAGENES_WORKERS,
+                        mp_context=multiprocessing.get_context(IMAGENES_MP_CONTEXT)
+                    )
+                    _pool_pid = os.getpid()
+        return _pool
+
+    @staticmethod
+    def _leer_subida(imagen_file):
+        """
+        Leer el stream de la subida calculando su SHA-256 en la misma pasada.
+
+        Devuelve ``(origen, sha256, total)``: ``origen`` son los bytes si caben
+        en IMAGENES_MEMORIA_MAX o la ruta en staging si no. Corta la lectura al
+        superar IMAGENES_MAX_BYTES.
+        """
+        digest = hashlib.sha256()
+        buffer = io.BytesIO()
+        archivo = None
+        ruta = None
+        total = 0
+        # Desde el inicio aunque alguien haya leído antes el stream
+        imagen_file.stream.seek(0)
+        try:
+            for bloque in iter(lambda: imagen_file.stream.read(1024 * 1024), b''):
+                total += len(bloque)
+                if total > IMAGENES_MAX_BYTES:
+                    raise ValueError(f"La imagen supera el tamaño máximo de {IMAGENES_MAX_BYTES // (1024 * 1024)} MB")
+                digest.update(bloque)
+
+                if archivo is None and total > IMAGENES_MEMORIA_MAX:
+                    # Demasiado grande para memoria: continuar en un archivo de staging
+                    os.makedirs(IMAGENES_STAGING, exist_ok=True)
+                    ruta = os.path.join(IMAGENES_STAGING, uuid.uuid4().hex)
+                    archivo = open(ruta, 'wb')
+                    archivo.write(buffer.getbuffer())
+                    buffer = None
+                (archivo or buffer).write(bloque)
+        except Exception:
+            if archivo is not None:
+                archivo.close()
+                os.remove(ruta)
+            raise
+
+        if archivo is not None:
+            archivo.close()
+            return ruta, digest.hexdigest(), total
+        return buffer.getvalue(), digest.hexdigest(), total
+
+    @staticmethod
+    def _validar_cabecera(origen):
+        """Formato y dimensiones leyendo solo la cabecera (sin decodificar los píxeles)"""
+        try:
+            with Image.open(io.BytesIO(origen) if isinstance(origen, bytes) else origen) as img:
+                formato = img.format
+                ancho, alto = img.size
+        except Image.DecompressionBombError:
+            raise ValueError(f"La imagen supera el máximo de {IMAGENES_MAX_PIXELES} píxeles")
+        except (Image.UnidentifiedImageError, OSError):
+            raise ValueError("El archivo no es una imagen válida")
+
+        if formato not in FORMATOS_PERMITIDOS:
+            raise ValueError(f"Formato de imagen no soportado: {formato}")
+        if ancho * alto > IMAGENES_MAX_PIXELES:
+            raise ValueError(f"La imagen supera el máximo de {IMAGENES_MAX_PIXELES} píxeles")
+
+    @staticmethod
+    def encolar(imagen_file, max_lado=1200, calidad=80):
+        """
+        Guardar ``imagen_file`` y programar su conversión si el contenido es nuevo.
+
+        Devuelve la URL relativa del WebP para guardar en BD, o None si el
+        archivo no se pudo guardar. Lanza ValueError si la subida excede los
+        límites de tamaño/píxeles o no es una imagen. La referencia en
+        ``MediaObjeto`` se confirma con el commit de quien llama; si no se pudo
+        guardar, la sesión queda como estaba. Los archivos de un contenido nuevo
+        se escriben después de ese commit (ver ``_guardar_nuevas``): si la
+        transacción se deshace no queda nada en el almacenamiento.
+        """
+        origen = None
+        try:
+            almacenamiento = obtener_almacenamiento()
+            origen, sha256, total = ImagenPipeline._leer_subida(imagen_file)
+            ImagenPipeline._validar_cabecera(origen)
+            clave = f"cas/{sha256[:2]}/{sha256}_{max_lado}.webp"
+
+            # Si algo falla, el savepoint deshace la referencia sumada o el objeto insertado:
+            # no debe confirmarse con el commit de quien llama sin una URL que la libere
+            with db.session.begin_nested():
+                if ImagenPipeline._sumar_referencia(clave):
+                    logger.debug('Imagen duplicada, se reutiliza %s', clave)
+                    ImagenPipeline._descartar(origen)
+                    return url_desde_clave(clave)
+
+                if not ImagenPipeline._insertar_objeto(clave, sha256, total):
+                    # Otra subida del mismo contenido insertó el objeto a la vez
+                    ImagenPipeline._sumar_referencia(clave)
+                    logger.debug('Imagen subida en paralelo, se reutiliza %s', clave)
+                    ImagenPipeline._descartar(origen)
+                    return url_desde_clave(clave)
+
+            nuevas = db.session.info.setdefault(_CLAVE_NUEVAS, [])
+            nuevas.append((origen, sha256, clave, max_lado, calidad, almacenamiento.config()))
+            return url_desde_clave(clave)
+
+        except ValueError:
+            ImagenPipeline._descartar(origen)
+            raise
+        except Exception as e:
+            logger.exception('Error al guardar imagen: %s', e)
+            ImagenPipeline._descartar(origen)
+            return None
+
+    @staticmethod
+    def _guardar_y_programar(origen, sha256, clave, max_lado, calidad, config_almacenamiento):
+        almacenamiento = crear_almacenamiento(config_almacenamiento)
+        with db.engine.connect() as conexion:
+            # Un savepoint de quien llama pudo deshacer el objeto después de encolar
+            if not conexion.execute(select(MediaObjeto.clave).where(MediaObjeto.clave == clave)).first():
+                ImagenPipeline._descartar(origen)
+                return
+
+        if not almacenamiento.existe(clave_original(sha256)):
+            if isinstance(origen, bytes):
+                almacenamiento.guardar_bytes(origen, clave_original(sha256))
+            else:
+                almacenamiento.guardar_archivo(origen, clave_original(sha256))
+        almacenamiento.guardar_bytes(b'', clave + SUFIJO_PENDIENTE)
+
+        ImagenPipeline._programar(origen, clave, max_lado, calidad, config_almacenamiento)
+
+    @staticmethod
+    def _descartar(origen):
+        if isinstance(origen, str) and os.path.exists(origen):
+            os.remove(origen)
+
+    @staticmethod
+    def _sumar_referencia(clave):
+        """True si el objeto ya existía (y se le sumó una referencia)"""
+        filas = (
+            db.session.query(MediaObjeto)
+            .filter(MediaObjeto.clave == clave)
+            .update({MediaObjeto.referencias: MediaObjeto.referencias + 1}, synchronize_session=False)
+        )
+        return filas > 0
+
+    @staticmethod
+    def _insertar_objeto(clave, sha256, total):
+        """False si otra transacción ya insertó ``clave`` (clave primaria duplicada)"""
+        try:
+            with db.session.begin_nested():
+                db.session.add(MediaObjeto(clave=clave, sha256=sha256, bytes_original=total, referencias=1))
+            return True
+        except IntegrityError:
+            return False
+
+    @staticmethod
+    def liberar(url):
+        """
+        Quitar una referencia a la imagen de ``url``. Los objetos direccionados
+        por contenido se borran al quedar sin referencias; las imágenes
+        anteriores (por entidad) se borran directamente. Los archivos se
+        eliminan después del commit de quien llama (ver ``_borrar_liberadas``).
+        """
+        clave = clave_desde_url(url)
+        if clave is None:
+            return
+
+        sha256 = None
+        consulta = db.session.query(MediaObjeto).filter(MediaObjeto.clave == clave)
+        # Decremento en SQL: las liberaciones concurrentes no pisan el contador
+        if consulta.update({MediaObjeto.referencias: MediaObjeto.referencias - 1}, synchronize_session=False):
+            borradas = consulta.filter(MediaObjeto.referencias <= 0).delete(synchronize_session=False)
+            if not borradas:
+                return
+            sha256 = _PATRON_CAS.match(os.path.basename(clave)).group('sha')
+
+        pendientes = db.session.info.setdefault(_CLAVE_LIBERADAS, [])
+        pendientes.append((clave, sha256, obtener_almacenamiento().config()))
+
+    @staticmethod
+    def _borrar_archivos(clave, sha256, config_almacenamiento):
+        almacenamiento = crear_almacenamiento(config_almacenamiento)
+        if sha256 is not None:
+            with db.engine.connect() as conexion:
+                # Una subida pudo volver a crear el objeto entre el commit y este punto
+                if conexion.execute(select(MediaObjeto.clave).where(MediaObjeto.clave == clave)).first():
+                    return
+                # El original se comparte entre tamaños (perfil 800 / cancha 1200)
+                original_en_uso = conexion.execute(
+                    select(MediaObjeto.clave).where(MediaObjeto.sha256 == sha256).limit(1)
+                ).first()
+            if not original_en_uso:
+                almacenamiento.eliminar(clave_original(sha256))
+
+        for derivada in ImagenPipeline.claves_derivadas(clave):
+            almacenamiento.eliminar(derivada)
+        almacenamiento.eliminar(clave)
+        logger.debug('Imagen eliminada del almacenamiento: %s', clave)
+
+    @staticmethod
+    def _programar(origen, clave, max_lado, calidad, config_almacenamiento):
+        if not IMAGENES_SINCRONO:
+            try:
+                futuro = ImagenPipeline._obtener_pool().submit(
+                    _convertir_a_webp, origen, clave, max_lado, calidad, config_almacenamiento
+                )
+                futuro.add_done_callback(ImagenPipeline._registrar_resultado)
+                return
+            except Exception as e:
+                logger.warning('Pool de imágenes no disponible, se convierte en línea: %s', e)
+
+        try:
+            _convertir_a_webp(origen, clave, max_lado, calidad, config_almacenamiento)
+        except Exception as e:
+            logger.exception('Error al convertir imagen: %s', e)
+
+    @staticmethod
+    def _registrar_resultado(futuro):
+        error = futuro.exception()
+        if error is not None:
+            logger.error('Error al convertir imagen: %s', error)
+        else:
+            logger.debug('Imagen convertida a WebP: %s', futuro.result())
+
+    @staticmethod
+    def srcset(url_base, max_lado=1200):
+        """
+        Mapa estilo ``srcset`` ``{'96w': url, ..., '<max_lado>w': url_base}``
+        para una URL accesible de WebP local. El descriptor es el lado mayor.
+        """
+        if not url_base or not url_base.endswith('.webp'):
+            return None
+        mapa = {f"{lado}w": ruta_variante(url_base, lado) for lado in lados_variantes(max_lado)}
+        mapa[f"{max_lado}w"] = url_base
+        return mapa
+
+    @staticmethod
+    def clave_para(carpeta, filename):
+        """
+        Clave de almacenamiento del archivo pedido a una ruta de imagen.
+        Los nombres direccionados por contenido viven en ``cas/``; el resto
+        (imágenes anteriores) bajo la carpeta de la entidad.
+        """
+        coincidencia = _PATRON_CAS.match(filename)
+        if coincidencia:
+            return f"cas/{coincidencia.group('sha')[:2]}/{filename}"
+        return f"{carpeta}/{filename}"
+
+    @staticmethod
+    def resolver_variante(almacenamiento, clave):
+        """
+        Clave a servir: la variante si existe; si no (imágenes anteriores a
+        las variantes o aún en proceso), la del archivo base.
+        """
+        coincidencia = _PATRON_VARIANTE.match(clave)
+        if coincidencia is None or almacenamiento.existe(clave):
+            return clave
+        return f"{coincidencia.group('base')}.webp"
+
+    @staticmethod
+    def claves_derivadas(clave_base):
+        """Variantes y marcadores posibles de un WebP base (para borrarlos con él)"""
+        claves = [ruta_variante(clave_base, lado) for lado in VARIANTES]
+        return claves + [clave_base + SUFIJO_PENDIENTE, clave_base + SUFIJO_ERROR]
+
+    @staticmethod
+    def estado(almacenamiento, clave):
+        """'lista', 'pendiente', 'error' o 'no_encontrada' para la clave de un WebP"""
+        # El base se escribe al final de la conversión: si existe, está completo
+        if almacenamiento.existe(clave):
+            return 'lista'
+        if almacenamiento.existe(clave + SUFIJO_PENDIENTE):
+            return 'pendiente'
+        if almacenamiento.existe(clave + SUFIJO_ERROR):
+            return 'error'
+        return 'no_encontrada'
+
+    @staticmethod
+    def respuesta_no_lista(almacenamiento, clave, mensaje_no_encontrada="Imagen no encontrada"):
+        """
+        Respuesta para una imagen que aún no se puede servir, o None si está lista.
+        Mientras se convierte: 202 con ``Retry-After`` para que el cliente reintente.
+        """
+        estado = ImagenPipeline.estado(almacenamiento, clave)
+        if estado == 'lista':
+            return None
+        if estado == 'pendiente':
+            return {"estado": "pendiente", "mensaje": "La imagen se está procesando"}, 202, {'Retry-After': '1', 'Cache-Control': 'no-store'}
+        if estado == 'error':
+            return {"estado": "error", "error": "No se pudo procesar la imagen"}, 404
+        return {"estado": "no_encontrada", "error": mensaje_no_encontrada}, 404
+
+
+@event.listens_for(Session, 'after_commit')
+def _borrar_liberadas(session):
+    for clave, sha256, config_almacenamiento in session.info.pop(_CLAVE_LIBERADAS, ()):
+        try:
+            ImagenPipeline._borrar_archivos(clave, sha256, config_almacenamiento)
+        except Exception as e:
+            logger.exception('Error al eliminar imagen liberada %s: %s', clave, e)
+
+
+@event.listens_for(Session, 'after_commit')
+def _guardar_nuevas(session):
+    for origen, sha256, clave, max_lado, calidad, config_almacenamiento in session.info.pop(_CLAVE_NUEVAS, ()):
+        try:
+            ImagenPipeline._guardar_y_programar(origen, sha256, clave, max_lado, calidad, config_almacenamiento)
+        except Exception as e:
+            logger.exception('Error al guardar imagen %s: %s', clave, e)
+            ImagenPipeline._descartar(origen)
+            try:
+                # La fila ya está confirmada: que las rutas respondan error en vez de 404 sin más
+                crear_almacenamiento(config_almacenamiento).guardar_bytes(str(e).encode('utf-8'), clave + SUFIJO_ERROR)
+            except Exception:
+                pass
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_al_deshacer(session):
+    # El rollback de un savepoint (begin_nested) no deshace lo liberado fuera de él
+    if not session.in_nested_transaction():
+        session.info.pop(_CLAVE_LIBERADAS, None)
+        for nueva in session.info.pop(_CLAVE_NUEVAS, ()):
+            ImagenPipeline._descartar(nueva[0])
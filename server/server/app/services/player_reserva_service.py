@@ -1,9 +1,13 @@
 # app/services/player_reserva_service.py
+import logging
+
 from app.models.reserva import Reserva
 from app.models.cancha import Cancha
 from app.utils.database import db
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class PlayerReservaService:
     @staticmethod
     def obtener_reservas_jugador(user_id: int) -> dict:
@@ -11,7 +15,7 @@ class PlayerReservaService:
         Obtener todas las reservas de un jugador
         """
         try:
-            print(f"🔍 Buscando reservas para el jugador ID: {user_id}")
+            logger.debug('Buscando reservas para el jugador ID: %s', user_id)
             
             # Obtener todas las reservas del usuario ordenadas por fecha y hora
             reservas = Reserva.query.filter_by(user_id=user_id).order_by(
@@ -19,7 +23,7 @@ class PlayerReservaService:
                 Reserva.hora.desc()
             ).all()
             
-            print(f"✅ Encontradas {len(reservas)} reservas")
+            logger.debug('Encontradas %s reservas', len(reservas))
             
             # Formatear la respuesta
             reservas_data = []
@@ -70,7 +74,7 @@ class PlayerReservaService:
             return {"reservas": reservas_data}
             
         except Exception as e:
-            print(f"❌ Error al obtener reservas del jugador: {str(e)}")
+            logger.exception('Error al obtener reservas del jugador: %s', e)
             raise e
 
     @staticmethod
@@ -79,16 +83,16 @@ class PlayerReservaService:
         Cancelar una reserva específica de un jugador
         """
         try:
-            print(f"🔍 Buscando reserva {reserva_id} del jugador ID: {user_id}")
+            logger.debug('Buscando reserva %s del jugador ID: %s', reserva_id, user_id)
             
             # Buscar la reserva que pertenece a este usuario
             reserva = Reserva.query.filter_by(id=reserva_id, user_id=user_id).first()
             
             if not reserva:
-                print("❌ Reserva no encontrada o no pertenece al usuario")
+                logger.debug('Reserva no encontrada o no pertenece al usuario')
                 raise ValueError("Reserva no encontrada")
             
-            print("✅ Reserva encontrada, verificando condiciones de cancelación...")
+            logger.debug('Reserva encontrada, verificando condiciones de cancelación...')
             
             # Verificar si la reserva puede ser cancelada
             fecha_reserva = reserva.fecha
@@ -103,27 +107,27 @@ class PlayerReservaService:
             
             # No permitir cancelar si ya pasó la reserva
             if datetime_reserva < ahora:
-                print("❌ No se puede cancelar una reserva pasada")
+                logger.debug('No se puede cancelar una reserva pasada')
                 raise ValueError("No puedes cancelar una reserva pasada")
             
             # No permitir cancelar si falta poco tiempo
             tiempo_restante = datetime_reserva - ahora
             if tiempo_restante.total_seconds() < 3600:  # 1 hora antes
-                print("❌ No se puede cancelar con menos de 1 hora de anticipación")
+                logger.debug('No se puede cancelar con menos de 1 hora de anticipación')
                 raise ValueError("Solo puedes cancelar con al menos 1 hora de anticipación")
             
             # Proceder con la cancelación
-            print("🗑️ Eliminando reserva...")
+            logger.debug('Eliminando reserva...')
             db.session.delete(reserva)
             db.session.commit()
             
-            print("✅ Reserva cancelada exitosamente")
+            logger.debug('Reserva cancelada exitosamente')
             return {"message": "Reserva cancelada correctamente"}
             
         except ValueError as ve:
-            print(f"❌ Error de validación: {str(ve)}")
+            logger.info('Cancelación rechazada: %s', ve)
             raise ve
         except Exception as e:
-            print(f"❌ Error inesperado al cancelar reserva: {str(e)}")
+            logger.exception('Error inesperado al cancelar reserva: %s', e)
             db.session.rollback()
             raise Exception(f"Error al cancelar la reserva: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,214 @@
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+
+from app.utils.sqlite_local import conectar_sqlite_privado, ruta_instancia
+
+logger = logging.getLogger(__name__)
+
+# Backend compartido por los workers: 'memoria' (un solo proceso), 'sqlite'
+# (workers en la misma máquina) o 'redis' (varias máquinas)
+TTL_STORE = os.getenv('TTL_STORE', 'memoria').strip().lower()
+# Guarda códigos y hashes de contraseña: archivo 0600 en el directorio de la app
+TTL_STORE_SQLITE_PATH = os.getenv('TTL_STORE_SQLITE_PATH') or ruta_instancia('ttl.sqlite3')
+TTL_STORE_REDIS_URL = os.getenv('TTL_STORE_REDIS_URL', 'redis://localhost:6379/0')
+TTL_STORE_PREFIJO = os.getenv('TTL_STORE_PREFIJO', 'liga:')
+
+
+class AlmacenMemoria:
+    """
+    Claves con expiración dentro del proceso. Un heap ordenado por vencimiento
+    permite purgar lo expirado en cada operación sin recorrer todo el dict.
+    Solo sirve con un único worker.
+    """
+
+    def __init__(self):
+        self._entradas = {}
+        self._vencimientos = []
+        self._lock = threading.Lock()
+
+    def config(self):
+        return {'tipo': 'memoria'}
+
+    def _purgar(self, ahora):
+        while self._vencimientos and self._vencimientos[0][0] <= ahora:
+            expira_en, clave = heapq.heappop(self._vencimientos)
+            entrada = self._entradas.get(clave)
+            # Si la clave se reescribió, su vencimiento vigente es otro
+            if entrada is not None and entrada[0] == expira_en:
+                del self._entradas[clave]
+
+    def guardar(self, clave, valor, ttl_segundos):
+        expira_en = time.monotonic() + ttl_segundos
+        with self._lock:
+            self._purgar(time.monotonic())
+            self._entradas[clave] = (expira_en, json.dumps(valor))
+            heapq.heappush(self._vencimientos, (expira_en, clave))
+
+    def obtener(self, clave):
+        with self._lock:
+            self._purgar(time.monotonic())
+            entrada = self._entradas.get(clave)
+        return json.loads(entrada[1]) if entrada else None
+
+    def actualizar(self, clave, valor):
+        """Reemplazar el valor conservando el vencimiento; False si no existe"""
+        with self._lock:
+            self._purgar(time.monotonic())
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return False
+            self._entradas[clave] = (entrada[0], json.dumps(valor))
+            return True
+
+    def eliminar(self, clave):
+        with self._lock:
+            self._entradas.pop(clave, None)
+
+    def purgar(self):
+        with self._lock:
+            self._purgar(time.monotonic())
+
+
+class AlmacenSQLite:
+    """
+    Claves con expiración en un archivo SQLite (WAL) compartido por los
+    workers de la misma máquina. Una conexión por hilo.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._local = threading.local()
+        conexion = self._conexion()
+        conexion.execute(
+            'CREATE TABLE IF NOT EXISTS ttl_entradas ('
+            'clave TEXT PRIMARY KEY, valor TEXT NOT NULL, expira_en REAL NOT NULL)'
+        )
+        conexion.execute('CREATE INDEX IF NOT EXISTS ix_ttl_entradas_expira_en ON ttl_entradas (expira_en)')
+
+    def config(self):
+        return {'tipo': 'sqlite', 'ruta': self.ruta}
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = conectar_sqlite_privado(self.ruta)
+            self._local.conexion = conexion
+        return conexion
+
+    def guardar(self, clave, valor, ttl_segundos):
+        ahora = time.time()
+        conexion = self._conexion()
+        conexion.execute('DELETE FROM ttl_entradas WHERE expira_en <= ?', (ahora,))
+        conexion.execute(
+            'INSERT OR REPLACE INTO ttl_entradas (clave, valor, expira_en) VALUES (?, ?, ?)',
+            (clave, json.dumps(valor), ahora + ttl_segundos)
+        )
+
+    def obtener(self, clave):
+        fila = self._conexion().execute(
+            'SELECT valor FROM ttl_entradas WHERE clave = ? AND expira_en > ?', (clave, time.time())
+        ).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def actualizar(self, clave, valor):
+        """Reemplazar el valor conservando el vencimiento; False si no existe"""
+        cursor = self._conexion().execute(
+            'UPDATE ttl_entradas SET valor = ? WHERE clave = ? AND expira_en > ?',
+            (json.dumps(valor), clave, time.time())
+        )
+        return cursor.rowcount > 0
+
+    def eliminar(self, clave):
+        self._conexion().execute('DELETE FROM ttl_entradas WHERE clave = ?', (clave,))
+
+    def purgar(self):
+        self._conexion().execute('DELETE FROM ttl_entradas WHERE expira_en <= ?', (time.time(),))
+
+
+class AlmacenRedis:
+    """
+    Claves con expiración en Redis (SET EX); la expiración la hace el servidor.
+    ``redis`` es opcional: solo se importa al usar este backend. ``cliente``
+    permite pasar cualquier objeto con la interfaz de ``redis.Redis``.
+    """
+
+    def __init__(self, url, prefijo='', cliente=None):
+        if cliente is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("TTL_STORE=redis requiere el paquete redis") from e
+            cliente = redis.Redis.from_url(url)
+
+        self.url = url
+        self.prefijo = prefijo
+        self._cliente = cliente
+
+    def config(self):
+        return {'tipo': 'redis', 'url': self.url, 'prefijo': self.prefijo}
+
+    def guardar(self, clave, valor, ttl_segundos):
+        self._cliente.set(self.prefijo + clave, json.dumps(valor), ex=int(ttl_segundos))
+
+    def obtener(self, clave):
+        valor = self._cliente.get(self.prefijo + clave)
+        return json.loads(valor) if valor is not None else None
+
+    def actualizar(self, clave, valor):
+        """Reemplazar el valor conservando el vencimiento; False si no existe"""
+        # XX: solo si existe; KEEPTTL (Redis >= 6): no toca la expiración
+        return bool(self._cliente.set(self.prefijo + clave, json.dumps(valor), xx=True, keepttl=True))
+
+    def eliminar(self, clave):
+        self._cliente.delete(self.prefijo + clave)
+
+    def purgar(self):
+        """Redis expira las claves por su cuenta"""
+
+
+_instancias = {}
+_instancias_lock = threading.Lock()
+
+
+def crear_almacen_ttl(config):
+    """Backend a partir de su ``config()``; se reutiliza una instancia por proceso"""
+    llave = tuple(sorted(config.items()))
+    instancia = _instancias.get(llave)
+    if instancia is None:
+        with _instancias_lock:
+            instancia = _instancias.get(llave)
+            if instancia is None:
+                datos = dict(config)
+                tipo = datos.pop('tipo')
+                if tipo == 'memoria':
+                    instancia = AlmacenMemoria()
+                elif tipo == 'sqlite':
+                    instancia = AlmacenSQLite(**datos)
+                elif tipo == 'redis':
+                    instancia = AlmacenRedis(**datos)
+                else:
+                    raise ValueError(f"TTL_STORE desconocido: {tipo}")
+                _instancias[llave] = instancia
+    return instancia
+
+
+def obtener_almacen_ttl():
+    """
+    Backend configurado por entorno:
+      TTL_STORE              'memoria' (por defecto), 'sqlite' o 'redis'
+      TTL_STORE_SQLITE_PATH  archivo compartido (por defecto instance/ttl.sqlite3)
+      TTL_STORE_REDIS_URL    redis://host:puerto/db
+      TTL_STORE_PREFIJO      prefijo de las claves en Redis
+    Con más de un worker hay que usar 'sqlite' o 'redis'.
+    """
+    if TTL_STORE == 'sqlite':
+        config = {'tipo': 'sqlite', 'ruta': os.path.abspath(TTL_STORE_SQLITE_PATH)}
+    elif TTL_STORE == 'redis':
+        config = {'tipo': 'redis', 'url': TTL_STORE_REDIS_URL, 'prefijo': TTL_STORE_PREFIJO}
+    else:
+        config = {'tipo': TTL_STORE}
+    return crear_almacen_ttl(config)
@@ -1,41 +1,162 @@
 # app/utils/auth_utils.py
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
 import jwt
-from flask import request
+from flask import request, g
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
 from app.models.user_model import User
 from app.utils.config import Config
+from app.utils.database import db
 
-def obtener_usuario_desde_token():
-    print("🔐 Intentando obtener usuario desde token...")
+logger = logging.getLogger(__name__)
+
+# Segundos que se confía en el estado (activo/inactivo) de un usuario antes de volver a consultarlo.
+# Desactivar o eliminar una cuenta por el ORM invalida la entrada en el proceso que hace el
+# commit; los demás workers pueden seguir autorizándola hasta este tiempo
+AUTH_ESTADO_TTL = int(os.getenv('AUTH_ESTADO_TTL', '60'))
+_MAX_ESTADOS = 10000
+
+_estados = {}
+_estados_lock = threading.Lock()
+
+
+class ContextoAuth:
+    """
+    Identidad de la petición actual tomada de los claims firmados del JWT.
+    La fila ``User`` solo se carga si el handler accede a ``usuario``.
+    """
+
+    __slots__ = ('id', 'role', '_usuario')
+
+    def __init__(self, user_id, role):
+        self.id = user_id
+        self.role = role
+        self._usuario = None
+
+    @property
+    def usuario(self):
+        if self._usuario is None:
+            self._usuario = db.session.get(User, self.id)
+        return self._usuario
+
+
+def _usuario_activo(user_id):
+    """Estado del usuario con cache TTL; False si no existe o está desactivado"""
+    ahora = time.monotonic()
+    entrada = _estados.get(user_id)
+    if entrada is not None and entrada[1] > ahora:
+        return entrada[0]
+
+    status = db.session.query(User.status).filter(User.id == user_id).first()
+    activo = status is not None and status[0] is not False
+    with _estados_lock:
+        if len(_estados) >= _MAX_ESTADOS:
+            _estados.clear()
+        _estados[user_id] = (activo, ahora + AUTH_ESTADO_TTL)
+    return activo
+
+
+def invalidar_estado_usuario(user_id):
+    """Olvidar el estado cacheado (p. ej. al desactivar o eliminar la cuenta)"""
+    with _estados_lock:
+        _estados.pop(user_id, None)
+
+
+_CLAVE_USUARIOS_CAMBIADOS = '_usuarios_estado_cambiado'
+
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_cambios_estado(session, flush_context):
+    cambiados = [
+        usuario.id for usuario in session.deleted if isinstance(usuario, User)
+    ] + [
+        usuario.id for usuario in session.dirty
+        if isinstance(usuario, User) and inspect(usuario).attrs.status.history.has_changes()
+    ]
+    if cambiados:
+        session.info.setdefault(_CLAVE_USUARIOS_CAMBIADOS, set()).update(cambiados)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_estados_cambiados(session):
+    for user_id in session.info.pop(_CLAVE_USUARIOS_CAMBIADOS, ()):
+        invalidar_estado_usuario(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_estados_cambiados(session):
+    if not session.in_nested_transaction():
+        session.info.pop(_CLAVE_USUARIOS_CAMBIADOS, None)
+
+
+def _resolver_contexto():
     token = request.cookies.get("liga_token")
-    print(f"🍪 Token encontrado en cookies: {token}")
-    print(f"📋 Todas las cookies: {request.cookies}")
-    
     if not token:
-        print("❌ No se encontró token en las cookies")
         return None, {"error": "Usuario no autenticado"}, 401
 
     try:
-        print("🔓 Decodificando token...")
         data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
-        print(f"📊 Token decodificado: {data}")
-        
-        user_id = data.get("id")
-        print(f"👤 User ID desde token: {user_id}")
-        
-        usuario = User.query.get(user_id)
-        if not usuario:
-            print("❌ Usuario no encontrado en BD")
-            return None, {"error": "Usuario no válido"}, 403
-        
-        print(f"✅ Usuario válido: {usuario.email}, Role: {usuario.role}")
-        return usuario, None, 200
-        
     except jwt.ExpiredSignatureError:
-        print("❌ Token expirado")
         return None, {"error": "Token expirado"}, 401
     except jwt.InvalidTokenError as e:
-        print(f"❌ Token inválido: {str(e)}")
+        logger.info('Token inválido: %s', e)
         return None, {"error": "Token inválido"}, 401
+
+    user_id = data.get("id")
+    if user_id is None:
+        return None, {"error": "Token inválido"}, 401
+
+    try:
+        if not _usuario_activo(user_id):
+            return None, {"error": "Usuario no válido"}, 403
     except Exception as e:
-        print(f"❌ Error inesperado: {str(e)}")
-        return None, {"error": "Error interno"}, 500
\ No newline at end of file
+        logger.exception('Error inesperado: %s', e)
+        return None, {"error": "Error interno"}, 500
+
+    return ContextoAuth(user_id, data.get("role")), None, 200
+
+
+def obtener_contexto_auth():
+    """
+    Devuelve ``(contexto, error, status)`` para la petición actual.
+    Se resuelve una sola vez por petición y se guarda en ``g``.
+    """
+    if 'contexto_auth' not in g:
+        g.contexto_auth = _resolver_contexto()
+    return g.contexto_auth
+
+
+def requiere_auth(*roles, mensaje_rol=None):
+    """
+    Decorador para métodos de ``Resource``: responde con el error de
+    autenticación o, si se indican ``roles``, 403 con ``mensaje_rol`` cuando
+    el rol del token no coincide. El contexto llega al handler como ``auth``.
+    """
+    def decorador(f):
+        @wraps(f)
+        def envoltura(*args, **kwargs):
+            contexto, error, status = obtener_contexto_auth()
+            if error:
+                return error, status
+            if roles and contexto.role not in roles:
+                return {'message': mensaje_rol or 'No autorizado'}, 403
+            return f(*args, auth=contexto, **kwargs)
+        return envoltura
+    return decorador
+
+
+def obtener_usuario_desde_token():
+    """Compatibilidad: devuelve la fila ``User`` completa del usuario autenticado"""
+    contexto, error, status = obtener_contexto_auth()
+    if error:
+        return None, error, status
+
+    usuario = contexto.usuario
+    if not usuario:
+        return None, {"error": "Usuario no válido"}, 403
+    return usuario, None, 200
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.utils.replicas import en_primario
+
+
+class CacheVersionada:
+    """
+    Cache en memoria del proceso con invalidación por versión.
+
+    Cada entrada guarda la versión vigente al construirse; ``invalidar()``
+    incrementa la versión y descarta todo. El TTL opcional acota el tiempo
+    que un worker puede servir datos viejos cuando el cambio ocurrió en
+    otro proceso.
+    """
+
+    def __init__(self, nombre, ttl_segundos=None):
+        self.nombre = nombre
+        self.ttl_segundos = ttl_segundos
+        self._version = 0
+        self._entradas = {}
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._version
+
+    def obtener(self, clave, constructor):
+        """Devolver el valor cacheado o construirlo con ``constructor()``"""
+        ahora = time.monotonic()
+        entrada = self._entradas.get(clave)
+        if entrada is not None:
+            version, expira_en, valor = entrada
+            if version == self._version and (expira_en is None or ahora < expira_en):
+                return valor
+
+        version = self._version
+        # Lo cacheado se comparte entre clientes: no construir desde una réplica atrasada
+        with en_primario():
+            valor = constructor()
+        with self._lock:
+            # Si hubo una invalidación mientras se construía, no se guarda
+            if version == self._version:
+                expira_en = ahora + self.ttl_segundos if self.ttl_segundos else None
+                self._entradas[clave] = (version, expira_en, valor)
+        return valor
+
+    def invalidar(self):
+        with self._lock:
+            self._version += 1
+            self._entradas.clear()
+
+
+_suscripciones = []
+_CLAVE_PENDIENTES = '_caches_pendientes'
+
+
+def invalidar_al_confirmar(cache, *modelos):
+    """
+    Invalidar ``cache`` cuando se confirme una transacción que inserte,
+    modifique o elimine instancias de ``modelos`` a través del ORM.
+
+    Los UPDATE/DELETE masivos (``query.update()``) no pasan por el flush y
+    deben invalidar la cache explícitamente.
+    """
+    _suscripciones.append((cache, tuple(modelos)))
+
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_cambios(session, flush_context):
+    if not _suscripciones:
+        return
+    cambiados = list(session.new) + list(session.dirty) + list(session.deleted)
+    if not cambiados:
+        return
+    pendientes = session.info.setdefault(_CLAVE_PENDIENTES, set())
+    for cache, modelos in _suscripciones:
+        if any(isinstance(obj, modelos) for obj in cambiados):
+            pendientes.add(cache)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_pendientes(session):
+    for cache in session.info.pop(_CLAVE_PENDIENTES, ()):
+        cache.invalidar()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_pendientes(session):
+    session.info.pop(_CLAVE_PENDIENTES, None)
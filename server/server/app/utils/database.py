@@ -1,19 +1,42 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask import current_app
 from app.utils.config import Config
+from app.utils.db_config import opciones_motor, instrumentar_motor
+from app.utils.replicas import SesionEnrutada, DB_REPLICA_URIS, binds_replicas, registrar_enrutamiento
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': SesionEnrutada})
+
+def configurar_base_datos(app):
+    """
+    Inicializa Flask-SQLAlchemy con las opciones de motor y pool del entorno
+    (ver app.utils.db_config). Un SQLALCHEMY_ENGINE_OPTIONS ya definido en
+    la configuración tiene prioridad.
+    
+    Con réplicas (DB_REPLICA_URIS, o la clave de configuración del mismo
+    nombre) se agregan como binds ``replica_N`` y los métodos
+    ``@solo_lectura`` leen de ellas (ver app.utils.replicas).
+    """
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', opciones_motor(app.config['SQLALCHEMY_DATABASE_URI']))
+    
+    replicas = app.config.get('DB_REPLICA_URIS', DB_REPLICA_URIS)
+    if replicas:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.update(binds_replicas(replicas, opciones_motor))
+        app.config['SQLALCHEMY_BINDS'] = binds
+        registrar_enrutamiento(app)
+    
+    db.init_app(app)
+    
+    with app.app_context():
+        for engine in db.engines.values():
+            instrumentar_motor(engine)
 
 def init_db(app):
     # Configuración de la base de datos
     app.config['SQLALCHEMY_DATABASE_URI'] = Config.DATABASE_URI
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_pre_ping': True,
-        'pool_recycle': 3600,
-    }
     
-    db.init_app(app)
+    configurar_base_datos(app)
     
     # Verificar conexión
     with app.app_context():
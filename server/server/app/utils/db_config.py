@@ -0,0 +1,184 @@
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+def _bool_env(nombre, por_defecto):
+    return os.getenv(nombre, por_defecto).strip().lower() in ('1', 'true', 'si', 'yes')
+
+
+# Pool de conexiones (QueuePool). Conexiones máximas por proceso = tamaño + overflow
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+# Segundos (enteros) esperando una conexión libre antes de fallar; SQLAlchemy usa 30
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '10'))
+# Reciclar antes del wait_timeout de MySQL para no usar conexiones cerradas por el servidor
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = _bool_env('DB_POOL_PRE_PING', 'true')
+# Esperas por conexión a partir de las cuales se registra un warning
+DB_POOL_ESPERA_LENTA_MS = float(os.getenv('DB_POOL_ESPERA_LENTA_MS', '100'))
+
+# Timeouts de red del driver (pymysql); read_timeout corta también sentencias colgadas
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '10'))
+DB_READ_TIMEOUT = int(os.getenv('DB_READ_TIMEOUT', '0'))
+DB_WRITE_TIMEOUT = int(os.getenv('DB_WRITE_TIMEOUT', '0'))
+# Límite por sentencia en el servidor (max_execution_time en MySQL, max_statement_time en MariaDB); 0 = sin límite
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0'))
+
+
+class MetricasPool:
+    """Contadores acumulados de adquisición de conexiones (seguros entre hilos)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.adquisiciones = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.esperas_lentas = 0
+        self.timeouts = 0
+        self.conexiones_creadas = 0
+        self.invalidaciones = 0
+
+    def registrar_espera(self, segundos):
+        with self._lock:
+            self.adquisiciones += 1
+            self.espera_total += segundos
+            self.espera_max = max(self.espera_max, segundos)
+            if segundos * 1000 >= DB_POOL_ESPERA_LENTA_MS:
+                self.esperas_lentas += 1
+
+    def registrar_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def sumar(self, contador):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'adquisiciones': self.adquisiciones,
+                'espera_promedio_ms': round(self.espera_total / self.adquisiciones * 1000, 3) if self.adquisiciones else 0.0,
+                'espera_max_ms': round(self.espera_max * 1000, 3),
+                'esperas_lentas': self.esperas_lentas,
+                'timeouts': self.timeouts,
+                'conexiones_creadas': self.conexiones_creadas,
+                'invalidaciones': self.invalidaciones,
+            }
+
+
+class PoolInstrumentado(QueuePool):
+    """
+    QueuePool que mide cuánto espera cada checkout (incluye abrir conexión
+    nueva en overflow) y cuenta los timeouts por agotamiento.
+    """
+
+    def __init__(self, *args, metricas=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = metricas or MetricasPool()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            self.metricas.registrar_timeout()
+            logger.error('Pool de conexiones agotado tras %.1fs', time.perf_counter() - inicio,
+                         extra={'pool': estadisticas_pool_de(self)})
+            raise
+        espera = time.perf_counter() - inicio
+        self.metricas.registrar_espera(espera)
+        if espera * 1000 >= DB_POOL_ESPERA_LENTA_MS:
+            logger.warning('Espera por conexión de %.1f ms', espera * 1000,
+                           extra={'en_uso': self.checkedout(), 'overflow': max(0, self.overflow())})
+        return conexion
+
+    def recreate(self):
+        # dispose() recrea el pool: se conservan los contadores
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+
+def opciones_motor(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS a partir del entorno"""
+    opciones = {
+        'pool_pre_ping': DB_POOL_PRE_PING,
+        'pool_recycle': DB_POOL_RECYCLE,
+    }
+    if uri.startswith('sqlite'):
+        # Flask-SQLAlchemy elige el pool de SQLite; no aplica tamaño ni overflow
+        return opciones
+
+    opciones.update({
+        'poolclass': PoolInstrumentado,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+    })
+
+    if 'pymysql' in uri:
+        connect_args = {'connect_timeout': DB_CONNECT_TIMEOUT}
+        if DB_READ_TIMEOUT:
+            connect_args['read_timeout'] = DB_READ_TIMEOUT
+        if DB_WRITE_TIMEOUT:
+            connect_args['write_timeout'] = DB_WRITE_TIMEOUT
+        opciones['connect_args'] = connect_args
+
+    return opciones
+
+
+def _fijar_timeout_sentencias(dbapi_conn, registro):
+    """Límite por sentencia en la sesión; MariaDB no conoce max_execution_time"""
+    cursor = dbapi_conn.cursor()
+    try:
+        try:
+            cursor.execute(f'SET SESSION max_execution_time = {DB_STATEMENT_TIMEOUT_MS}')
+        except Exception:
+            cursor.execute(f'SET SESSION max_statement_time = {DB_STATEMENT_TIMEOUT_MS / 1000}')
+    finally:
+        cursor.close()
+
+
+def instrumentar_motor(engine):
+    """Eventos del pool y timeout por sentencia; llamar una vez por motor"""
+    if engine.dialect.name == 'mysql' and DB_STATEMENT_TIMEOUT_MS:
+        event.listen(engine, 'connect', _fijar_timeout_sentencias)
+
+    pool = engine.pool
+    if isinstance(pool, PoolInstrumentado):
+        event.listen(engine, 'connect', lambda *_: engine.pool.metricas.sumar('conexiones_creadas'))
+        event.listen(engine, 'invalidate', lambda *_: engine.pool.metricas.sumar('invalidaciones'))
+
+    logger.info('Motor de base de datos configurado', extra={'pool': estadisticas_pool(engine)})
+
+
+def estadisticas_pool_de(pool):
+    if not isinstance(pool, QueuePool):
+        return {'clase': type(pool).__name__}
+
+    datos = {
+        'clase': type(pool).__name__,
+        'tamano': pool.size(),
+        'max_overflow': pool._max_overflow,
+        'timeout_s': pool.timeout(),
+        'en_uso': pool.checkedout(),
+        'disponibles': pool.checkedin(),
+        # overflow() es negativo mientras no se abrieron todas las del tamaño base
+        'overflow_en_uso': max(0, pool.overflow()),
+    }
+    if isinstance(pool, PoolInstrumentado):
+        datos.update(pool.metricas.to_dict())
+    return datos
+
+
+def estadisticas_pool(engine):
+    """Ocupación actual y contadores acumulados del pool del motor"""
+    return estadisticas_pool_de(engine.pool)
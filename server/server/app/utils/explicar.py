@@ -0,0 +1,85 @@
+"""
+Comprobación de planes de ejecución de las consultas frecuentes
+
+Cada consulta se compila con valores literales y se pasa por EXPLAIN (MySQL) o
+EXPLAIN QUERY PLAN (SQLite). Una consulta "usa índice" si el plan no recorre la
+tabla completa.
+"""
+from datetime import date, datetime, time
+
+from sqlalchemy import select, text
+
+from app.models.cancha import Cancha
+from app.models.horario_cancha import HorarioCancha
+from app.models.post_model import Post, PostComentario, PostLike
+from app.models.reserva import Reserva
+
+
+def consultas_frecuentes():
+    """(nombre, select) de los predicados calientes de los servicios"""
+    hoy = date(2026, 1, 1)
+    return [
+        ('reservas por cancha y fecha',
+         select(Reserva.hora).where(Reserva.cancha_id == 1, Reserva.fecha == hoy)),
+        ('reservas del usuario por día',
+         select(Reserva.id).where(
+             Reserva.user_id == 1, Reserva.fecha == hoy, Reserva.estado == 'confirmada'
+         )),
+        ('horarios de cancha por día',
+         select(HorarioCancha.hora_inicio, HorarioCancha.hora_fin).where(
+             HorarioCancha.cancha_id == 1,
+             HorarioCancha.dia_semana == 'lunes',
+             HorarioCancha.disponible == True
+         )),
+        ('comentarios de un post',
+         select(PostComentario.id).where(
+             PostComentario.post_id == 1, PostComentario.eliminado == False
+         ).order_by(PostComentario.created_at.asc())),
+        ('like del usuario en un post',
+         select(PostLike.id).where(PostLike.post_id == 1, PostLike.usuario_id == 1)),
+        ('canchas activas',
+         select(Cancha.id).where(Cancha.estado == 'activa')),
+        ('feed de posts (cursor)',
+         select(Post.id).where(
+             Post.eliminado == False, Post.created_at < datetime.combine(hoy, time())
+         ).order_by(Post.created_at.desc(), Post.id.desc()).limit(20)),
+    ]
+
+
+def _compilar(stmt, dialecto):
+    return str(stmt.compile(dialect=dialecto, compile_kwargs={'literal_binds': True}))
+
+
+def _plan_mysql(conexion, sql):
+    filas = conexion.execute(text(f'EXPLAIN {sql}')).mappings().all()
+    # La primera fila es la tabla filtrada; type=ALL es un recorrido completo
+    fila = filas[0]
+    detalle = f"type={fila['type']} key={fila['key']}"
+    return fila['key'] is not None and fila['type'] != 'ALL', detalle
+
+
+def _plan_sqlite(conexion, sql):
+    filas = conexion.execute(text(f'EXPLAIN QUERY PLAN {sql}')).all()
+    pasos = [fila[-1] for fila in filas]
+    detalle = '; '.join(pasos)
+    # "SEARCH ... USING INDEX" o "SCAN ... USING COVERING INDEX" evitan leer la tabla
+    usa_indice = all(
+        'USING' in paso and 'INDEX' in paso
+        for paso in pasos if paso.startswith(('SCAN', 'SEARCH'))
+    )
+    return usa_indice, detalle
+
+
+def explicar_consultas(engine):
+    """Lista de (nombre, usa_indice, detalle) para cada consulta frecuente"""
+    planes = {'mysql': _plan_mysql, 'mariadb': _plan_mysql, 'sqlite': _plan_sqlite}
+    plan = planes.get(engine.dialect.name)
+    if plan is None:
+        raise ValueError(f"Dialecto no soportado: {engine.dialect.name}")
+
+    resultados = []
+    with engine.connect() as conexion:
+        for nombre, stmt in consultas_frecuentes():
+            usa_indice, detalle = plan(conexion, _compilar(stmt, engine.dialect))
+            resultados.append((nombre, usa_indice, detalle))
+    return resultados
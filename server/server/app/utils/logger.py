@@ -1,47 +1,177 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
-from flask import current_app
-from app.utils.config import Config
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask.logging import default_handler
+
+# Atributos propios de LogRecord; el resto llega por ``extra`` y se incluye en el JSON
+_ATRIBUTOS_RECORD = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro"""
+
+    def format(self, record):
+        datos = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'linea': record.lineno,
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _ATRIBUTOS_RECORD:
+                datos[clave] = valor
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            datos['excepcion'] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class MuestreoDebug(logging.Filter):
+    """Deja pasar solo una fracción de los mensajes DEBUG; el resto de niveles pasa siempre"""
+
+    def __init__(self, tasa):
+        super().__init__()
+        self.tasa = tasa
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.tasa >= 1:
+            return True
+        return random.random() < self.tasa
+
+
+class _ColaHandler(QueueHandler):
+    """
+    QueueHandler que resuelve mensaje y traceback antes de encolar pero
+    deja el formato final (JSON) a los handlers del listener.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _nivel(nombre, por_defecto):
+    if not nombre:
+        return por_defecto
+    nivel = logging.getLevelName(nombre.strip().upper())
+    # Para un nombre desconocido getLevelName devuelve el texto 'Level X'
+    if not isinstance(nivel, int):
+        logging.getLogger(__name__).warning(
+            'Nivel de log desconocido %r, se usa %s', nombre, logging.getLevelName(por_defecto)
+        )
+        return por_defecto
+    return nivel
+
+
+def _fraccion(valor, por_defecto):
+    """Número entre 0 y 1; fuera de rango se recorta, si no es un número se usa ``por_defecto``"""
+    if not valor:
+        return por_defecto
+    try:
+        fraccion = float(valor)
+    except ValueError:
+        fraccion = float('nan')
+    if fraccion != fraccion:
+        logging.getLogger(__name__).warning('Fracción de muestreo inválida %r, se usa %s', valor, por_defecto)
+        return por_defecto
+    return min(1.0, max(0.0, fraccion))
+
+
+def _niveles_por_modulo(valor):
+    """'app.services.auth.post_service=DEBUG,sqlalchemy.engine=INFO' -> {modulo: nivel}"""
+    niveles = {}
+    for parte in (valor or '').split(','):
+        if '=' in parte:
+            modulo, nivel = parte.split('=', 1)
+            niveles[modulo.strip()] = _nivel(nivel, logging.WARNING)
+    return niveles
+
 
 def setup_logger(app):
-    """Configura el sistema de logging para la aplicación"""
-    
-    # Crear directorio de logs si no existe
-    log_dir = 'logs'
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    
-    # Configurar el nivel de log
-    log_level = logging.INFO
-    if app.config['DEBUG']:
-        log_level = logging.DEBUG
-    
-    # Configurar el formato del log
-    formatter = logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-    )
-    
-    # Configurar el handler para archivo
-    file_handler = RotatingFileHandler(
-        filename=os.path.join(log_dir, 'liga_agil.log'),
-        maxBytes=1024 * 1024 * 10,  # 10 MB
-        backupCount=10
-    )
-    file_handler.setFormatter(formatter)
-    file_handler.setLevel(log_level)
-    
-    # Configurar el handler para consola
+    """
+    Configura el sistema de logging para la aplicación.
+
+    Los módulos usan ``logging.getLogger(__name__)``. Los registros se
+    encolan en el logger raíz y un hilo (QueueListener) los escribe en JSON
+    a consola y, opcionalmente, a archivo.
+
+    Variables de entorno:
+      LOG_LEVEL           nivel general (por defecto WARNING; DEBUG en desarrollo)
+      LOG_LEVELS          niveles por módulo: modulo=NIVEL,modulo=NIVEL
+      LOG_DEBUG_MUESTREO  fracción de mensajes DEBUG que se emiten (0-1, por defecto 1)
+      LOG_FILE            archivo rotativo; vacío para solo consola
+    """
+    global _listener
+
+    desarrollo = os.environ.get('FLASK_ENV') == 'development' or app.config.get('DEBUG')
+    log_level = _nivel(os.getenv('LOG_LEVEL'), logging.DEBUG if desarrollo else logging.WARNING)
+
+    formatter = JsonFormatter()
+
+    handlers = []
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    console_handler.setLevel(log_level)
-    
-    # Añadir handlers al logger de la app
-    app.logger.addHandler(file_handler)
-    app.logger.addHandler(console_handler)
-    app.logger.setLevel(log_level)
-    
+    handlers.append(console_handler)
+
+    log_file = os.getenv('LOG_FILE', os.path.join('logs', 'liga_agil.log'))
+    if log_file:
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            filename=log_file,
+            maxBytes=1024 * 1024 * 10,  # 10 MB
+            backupCount=10
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    # Si create_app se llama más de una vez, se reemplaza el pipeline anterior
+    if _listener is not None:
+        _listener.stop()
+
+    cola = queue.SimpleQueue()
+    cola_handler = _ColaHandler(cola)
+    cola_handler.addFilter(MuestreoDebug(_fraccion(os.getenv('LOG_DEBUG_MUESTREO'), 1.0)))
+
+    _listener = QueueListener(cola, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    # El pipeline cuelga del logger raíz: app.logger y los módulos propagan hacia él
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(cola_handler)
+    raiz.setLevel(log_level)
+
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(logging.NOTSET)
+
+    for modulo, nivel in _niveles_por_modulo(os.getenv('LOG_LEVELS')).items():
+        logging.getLogger(modulo).setLevel(nivel)
+
     # Deshabilitar el logger por defecto de Werkzeug
     logging.getLogger('werkzeug').setLevel(logging.WARNING)
-    
-    app.logger.info('Logger configurado correctamente')
\ No newline at end of file
+
+    app.logger.info('Logger configurado correctamente')
+
+
+@atexit.register
+def _detener_listener():
+    if _listener is not None:
+        _listener.stop()
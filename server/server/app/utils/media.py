@@ -0,0 +1,141 @@
+import logging
+import os
+import zipfile
+from contextlib import closing
+from datetime import datetime
+from urllib.parse import quote
+
+from flask import current_app, redirect, request
+from werkzeug.utils import send_file
+
+from app.services.media.almacenamiento import obtener_almacenamiento
+from app.services.media.imagen_pipeline import ImagenPipeline
+
+logger = logging.getLogger(__name__)
+
+# Los nombres llevan un uuid y el archivo nunca se reescribe: se puede cachear un año
+MEDIA_MAX_AGE = int(os.getenv('MEDIA_MAX_AGE', str(60 * 60 * 24 * 365)))
+
+# Delegar el envío de bytes al servidor web: '' (Flask), 'nginx' (X-Accel-Redirect) o 'sendfile' (X-Sendfile)
+MEDIA_OFFLOAD = os.getenv('MEDIA_OFFLOAD', '').strip().lower()
+# Location ``internal`` de nginx que apunta a la raíz del almacenamiento local, p. ej.:
+#   location /_media/ { internal; alias /srv/liga_agil/app/utils/pictures/; }
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/_media/')
+# Cache de la redirección a S3; menor que la validez de las URLs prefirmadas
+MEDIA_REDIRECT_MAX_AGE = int(os.getenv('MEDIA_REDIRECT_MAX_AGE', '1800'))
+
+
+def _etag(ruta_archivo, stat):
+    """ETag fuerte sin leer el archivo: nombre (uuid o sha256) + tamaño identifican el contenido"""
+    nombre = os.path.splitext(os.path.basename(ruta_archivo))[0]
+    return f"{nombre}-{stat.st_size:x}"
+
+
+def _respuesta_accel(clave, ruta_archivo, stat):
+    """
+    Respuesta vacía con ``X-Accel-Redirect``: nginx envía el archivo (y
+    atiende ``Range``); aquí solo se fijan cabeceras y se resuelve el 304.
+    """
+    respuesta = current_app.response_class(mimetype='image/webp')
+    respuesta.headers['X-Accel-Redirect'] = MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + quote(clave)
+    respuesta.set_etag(_etag(ruta_archivo, stat))
+    respuesta.last_modified = stat.st_mtime
+    respuesta.cache_control.max_age = MEDIA_MAX_AGE
+    return respuesta.make_conditional(request)
+
+
+def servir_imagen(carpeta, filename, mensaje_no_encontrada="Imagen no encontrada"):
+    """
+    Servir un WebP con cache HTTP. ``carpeta`` es la carpeta de la entidad
+    en el almacenamiento (p. ej. ``canchas/5/webp``) para imágenes anteriores
+    al direccionamiento por contenido.
+
+    - Variantes (``_w<N>``) ausentes se resuelven al archivo base.
+    - Mientras la conversión está pendiente: 202 sin cache (ver ImagenPipeline).
+    - ETag fuerte y ``Cache-Control: public, max-age, immutable``.
+    - ``If-None-Match`` responde 304 y ``Range`` 206, vía ``send_file(conditional=True)``.
+    - Con ``MEDIA_OFFLOAD`` el cuerpo lo envía el servidor web (``X-Accel-Redirect``
+      o ``X-Sendfile``) tras las mismas comprobaciones; el worker queda libre al instante.
+    - Con almacenamiento S3 se redirige a la URL del objeto.
+    """
+    almacenamiento = obtener_almacenamiento()
+    clave = ImagenPipeline.resolver_variante(almacenamiento, ImagenPipeline.clave_para(carpeta, filename))
+
+    no_lista = ImagenPipeline.respuesta_no_lista(almacenamiento, clave, mensaje_no_encontrada)
+    if no_lista:
+        logger.info('Archivo WebP no disponible (%s): %s', no_lista[0]['estado'], clave)
+        return no_lista
+
+    ruta_archivo = almacenamiento.ruta_local(clave)
+    if ruta_archivo is None:
+        # Objeto remoto: el cliente lo descarga directo del bucket/CDN
+        respuesta = redirect(almacenamiento.url_descarga(clave), code=302)
+        respuesta.cache_control.public = True
+        respuesta.cache_control.max_age = MEDIA_REDIRECT_MAX_AGE
+        return respuesta
+
+    stat = os.stat(ruta_archivo)
+    if MEDIA_OFFLOAD == 'nginx':
+        respuesta = _respuesta_accel(clave, ruta_archivo, stat)
+    else:
+        # send_file de Werkzeug para decidir X-Sendfile aquí y no por USE_X_SENDFILE global
+        respuesta = send_file(
+            ruta_archivo,
+            request.environ,
+            mimetype='image/webp',
+            conditional=True,
+            etag=_etag(ruta_archivo, stat),
+            last_modified=stat.st_mtime,
+            max_age=MEDIA_MAX_AGE,
+            use_x_sendfile=MEDIA_OFFLOAD == 'sendfile',
+            response_class=current_app.response_class
+        )
+    respuesta.cache_control.public = True
+    respuesta.cache_control.immutable = True
+    logger.debug('Sirviendo archivo WebP: %s (%s)', clave, respuesta.status_code)
+    return respuesta
+
+
+class _SalidaZip:
+    """Destino no buscable para ZipFile: guarda lo escrito hasta que el generador lo entrega"""
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def generar_zip(almacenamiento, entradas, tam_bloque=64 * 1024):
+    """
+    Generador de un ZIP con los objetos ``entradas`` (``(nombre, clave, tamaño)``),
+    leídos y emitidos por bloques: la memoria usada no depende del total.
+    Se guardan sin comprimir (ZIP_STORED): WebP ya está comprimido.
+    """
+    salida = _SalidaZip()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for nombre, clave, tamano in entradas:
+            info = zipfile.ZipInfo(nombre, date_time=datetime.now().timetuple()[:6])
+            info.file_size = tamano
+            with closing(almacenamiento.abrir(clave)) as origen, zf.open(info, 'w') as destino:
+                for bloque in iter(lambda: origen.read(tam_bloque), b''):
+                    destino.write(bloque)
+                    datos = salida.vaciar()
+                    if datos:
+                        yield datos
+            yield salida.vaciar()
+    yield salida.vaciar()
@@ -0,0 +1,124 @@
+import contextvars
+import itertools
+import logging
+import os
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+# URIs de réplicas de lectura separadas por coma; vacío = todo va al primario
+DB_REPLICA_URIS = [uri.strip() for uri in os.getenv('DB_REPLICA_URIS', '').split(',') if uri.strip()]
+# Tras escribir, el cliente lee del primario este tiempo (cubre el retraso de replicación)
+DB_REPLICA_STICKY_SEGUNDOS = int(os.getenv('DB_REPLICA_STICKY_SEGUNDOS', '5'))
+COOKIE_PRIMARIO = 'liga_db_primario'
+
+PREFIJO_BIND = 'replica_'
+
+_solo_lectura = contextvars.ContextVar('solo_lectura', default=False)
+_turno = itertools.count()
+
+
+def solo_lectura(f):
+    """
+    Marca un método de servicio como de solo lectura: sus consultas van a una
+    réplica salvo que el cliente deba leer del primario (escribió hace poco o
+    en esta misma petición). Se aplica debajo de ``@staticmethod``.
+    """
+    @wraps(f)
+    def envoltura(*args, **kwargs):
+        token = _solo_lectura.set(True)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            _solo_lectura.reset(token)
+    return envoltura
+
+
+@contextmanager
+def en_primario():
+    """Fuerza el primario dentro del bloque (p. ej. al llenar caches compartidas)"""
+    token = _solo_lectura.set(False)
+    try:
+        yield
+    finally:
+        _solo_lectura.reset(token)
+
+
+def _leer_del_primario():
+    if not has_request_context():
+        return False
+    return g.get('db_escritura', False) or g.get('db_primario_sticky', False)
+
+
+class SesionEnrutada(Session):
+    """
+    Sesión de Flask-SQLAlchemy que manda las lecturas de métodos
+    ``@solo_lectura`` a las réplicas (binds ``replica_N``, por turnos).
+    Escrituras, flush, ``SELECT ... FOR UPDATE`` y todo lo demás usan el primario.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _solo_lectura.get() and not self._flushing and not _leer_del_primario():
+            es_escritura = isinstance(clause, UpdateBase) or getattr(clause, '_for_update_arg', None) is not None
+            if not es_escritura:
+                replica = _elegir_replica(self._db.engines)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _elegir_replica(engines):
+    replicas = [engine for clave, engine in engines.items() if clave and clave.startswith(PREFIJO_BIND)]
+    if not replicas:
+        return None
+    return replicas[next(_turno) % len(replicas)]
+
+
+def _marcar_escritura():
+    if has_request_context():
+        g.db_escritura = True
+
+
+@event.listens_for(SesionEnrutada, 'after_flush')
+def _escritura_por_flush(session, flush_context):
+    _marcar_escritura()
+
+
+@event.listens_for(SesionEnrutada, 'do_orm_execute')
+def _escritura_masiva(estado):
+    # query.update() / delete() no pasan por el flush
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        _marcar_escritura()
+
+
+def binds_replicas(uris, opciones_motor):
+    """SQLALCHEMY_BINDS de las réplicas, con las mismas opciones de pool que el primario"""
+    return {
+        f'{PREFIJO_BIND}{i}': {'url': uri, **opciones_motor(uri)}
+        for i, uri in enumerate(uris)
+    }
+
+
+def registrar_enrutamiento(app):
+    """Cookie de lectura del primario tras escribir (read-your-writes entre peticiones)"""
+
+    @app.before_request
+    def _leer_cookie_primario():
+        g.db_primario_sticky = request.cookies.get(COOKIE_PRIMARIO) == '1'
+
+    @app.after_request
+    def _fijar_cookie_primario(response):
+        if g.get('db_escritura'):
+            response.set_cookie(
+                COOKIE_PRIMARIO, '1',
+                max_age=DB_REPLICA_STICKY_SEGUNDOS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
@@ -0,0 +1,28 @@
+import os
+import sqlite3
+
+# Directorio propio de la aplicación para archivos locales (server/server/instance,
+# el instance_path por defecto de Flask); solo accesible por el usuario del proceso
+DIRECTORIO_INSTANCIA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'instance'
+)
+
+
+def ruta_instancia(nombre):
+    return os.path.join(DIRECTORIO_INSTANCIA, nombre)
+
+
+def conectar_sqlite_privado(ruta, timeout=5):
+    """
+    Conexión en autocommit y WAL a un archivo SQLite con permisos 0600. El
+    -wal y el -shm los crea SQLite con los permisos del archivo principal.
+    """
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, mode=0o700, exist_ok=True)
+    # Crear el archivo ya restringido (sqlite3 lo crearía con 0644 según la umask)
+    os.close(os.open(ruta, os.O_RDWR | os.O_CREAT, 0o600))
+    os.chmod(ruta, 0o600)
+    conexion = sqlite3.connect(ruta, timeout=timeout, isolation_level=None)
+    conexion.execute('PRAGMA journal_mode=WAL')
+    return conexion
@@ -0,0 +1,206 @@
+"""Esquema inicial (tablas anteriores a los scripts sql/)
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 08:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.String(length=255), nullable=False),
+    sa.Column('terms', sa.Boolean(), nullable=False),
+    sa.Column('is_profile_completed', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.Column('status', sa.Boolean(), nullable=True, comment='si el usuario esta activo o no'),
+    sa.Column('name_user', sa.String(length=255), nullable=False),
+    sa.Column('urlphotoperfil', sa.String(length=255), nullable=True),
+    sa.Column('telephone', sa.String(length=255), nullable=True),
+    sa.Column('city', sa.String(length=255), nullable=True),
+    sa.Column('sport', sa.String(length=255), nullable=True),
+    sa.Column('fechanacimiento', sa.DateTime(), nullable=True),
+    sa.Column('position', sa.String(length=255), nullable=True),
+    sa.Column('biography', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_table('canchas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('subtipo', sa.String(length=50), nullable=False),
+    sa.Column('direccion', sa.String(length=200), nullable=False),
+    sa.Column('latitud', sa.Float(), nullable=False),
+    sa.Column('longitud', sa.Float(), nullable=False),
+    sa.Column('direccion_completa', sa.String(length=300), nullable=False),
+    sa.Column('superficie', sa.String(length=50), nullable=False),
+    sa.Column('capacidad', sa.Integer(), nullable=False),
+    sa.Column('precio_hora', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('descripcion', sa.Text(), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+    sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('dias_festivos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False, comment='Fecha exacta del día festivo'),
+    sa.Column('descripcion', sa.String(length=100), nullable=True),
+    sa.Column('es_laborable', sa.Boolean(), nullable=False, comment='0 = No se trabaja, 1 = Sí se trabaja'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('fecha')
+    )
+    op.create_table('owners',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('nombre_administrador', sa.String(length=100), nullable=False),
+    sa.Column('telefono', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('players',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('deporte', sa.String(length=255), nullable=False),
+    sa.Column('nombre_completo', sa.String(length=255), nullable=False),
+    sa.Column('fecha_nacimiento', sa.Date(), nullable=False),
+    sa.Column('posicion', sa.String(length=255), nullable=False),
+    sa.Column('pierna_dominante', sa.Enum('izquierda', 'derecha', 'ambas', name='ladodominante'), nullable=True),
+    sa.Column('mano_dominante', sa.Enum('izquierda', 'derecha', 'ambas', name='ladodominante'), nullable=True),
+    sa.Column('genero', sa.Enum('masculino', 'femenino', 'otro', name='genero'), nullable=True),
+    sa.Column('altura', sa.Integer(), nullable=True),
+    sa.Column('peso', sa.Integer(), nullable=True),
+    sa.Column('estado', sa.Enum('activo', 'inactivo', 'lesion', name='estadojugador'), nullable=True),
+    sa.Column('ciudad', sa.String(length=255), nullable=True),
+    sa.Column('telefono', sa.String(length=20), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('amenidades_cancha',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cancha_id', sa.Integer(), nullable=False),
+    sa.Column('amenidad', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['cancha_id'], ['canchas.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('reglas_cancha',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cancha_id', sa.Integer(), nullable=False),
+    sa.Column('regla', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['cancha_id'], ['canchas.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('horarios_cancha',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cancha_id', sa.Integer(), nullable=False),
+    sa.Column('dia_semana', sa.Enum('lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo'), nullable=False),
+    sa.Column('hora_inicio', sa.Time(), nullable=False, comment='Ejemplo: 10:00:00'),
+    sa.Column('hora_fin', sa.Time(), nullable=False, comment='Ejemplo: 23:00:00'),
+    sa.Column('intervalo_minutos', sa.Integer(), nullable=True, comment='Cada cuántos minutos se puede reservar'),
+    sa.Column('disponible', sa.Boolean(), nullable=True),
+    sa.Column('fecha_creacion', sa.TIMESTAMP(), nullable=True),
+    sa.ForeignKeyConstraint(['cancha_id'], ['canchas.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('imagenes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cancha_id', sa.Integer(), nullable=True),
+    sa.Column('player_id', sa.Integer(), nullable=True),
+    sa.Column('url_imagen', sa.String(length=255), nullable=False),
+    sa.Column('orden', sa.Integer(), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['cancha_id'], ['canchas.id'], ),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('reservas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cancha_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('hora', sa.Time(), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['cancha_id'], ['canchas.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('posts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('tipo_post', sa.Enum('texto', 'foto'), nullable=False),
+    sa.Column('contenido', sa.Text(), nullable=False),
+    sa.Column('imagen_url', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.Column('eliminado', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('post_comentarios',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('contenido', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.Column('eliminado', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('post_likes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('comentario_likes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('comentario_id', sa.Integer(), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['comentario_id'], ['post_comentarios.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('comentario_likes')
+    op.drop_table('post_likes')
+    op.drop_table('post_comentarios')
+    op.drop_table('posts')
+    op.drop_table('reservas')
+    op.drop_table('imagenes')
+    op.drop_table('horarios_cancha')
+    op.drop_table('reglas_cancha')
+    op.drop_table('amenidades_cancha')
+    op.drop_table('players')
+    op.drop_table('owners')
+    op.drop_table('dias_festivos')
+    op.drop_table('canchas')
+    op.drop_table('users')
@@ -0,0 +1,25 @@
+"""Índice para la paginación por cursor del feed de posts (antes sql/001)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 08:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # /posts/obtener_post y /posts/mis-posts con ?after=<created_at>,<id>
+    op.create_index('ix_posts_eliminado_created_at_id', 'posts', ['eliminado', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_posts_eliminado_created_at_id', table_name='posts')
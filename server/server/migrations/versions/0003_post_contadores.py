@@ -0,0 +1,46 @@
+"""Contadores desnormalizados de likes y comentarios (antes sql/002)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 08:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_comentarios', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('total_likes', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('post_comentarios', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_likes', sa.Integer(), server_default='0', nullable=False))
+
+    # Carga inicial (equivalente a: flask --app run recalcular-contadores)
+    op.execute(
+        "UPDATE posts SET "
+        "total_likes = (SELECT COUNT(*) FROM post_likes WHERE post_likes.post_id = posts.id), "
+        "total_comentarios = (SELECT COUNT(*) FROM post_comentarios "
+        "WHERE post_comentarios.post_id = posts.id AND post_comentarios.eliminado = 0)"
+    )
+    op.execute(
+        "UPDATE post_comentarios SET "
+        "total_likes = (SELECT COUNT(*) FROM comentario_likes WHERE comentario_likes.comentario_id = post_comentarios.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('post_comentarios', schema=None) as batch_op:
+        batch_op.drop_column('total_likes')
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('total_likes')
+        batch_op.drop_column('total_comentarios')
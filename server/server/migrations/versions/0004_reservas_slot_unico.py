@@ -0,0 +1,44 @@
+"""Reservas confirmadas únicas por turno y por usuario/día (antes sql/003)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 08:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # slot_activo vale 1 solo para reservas confirmadas; los NULL no chocan en índices únicos.
+    # Antes hay que resolver los duplicados existentes:
+    #   SELECT cancha_id, fecha, hora, COUNT(*) FROM reservas
+    #   WHERE estado = 'confirmada' GROUP BY cancha_id, fecha, hora HAVING COUNT(*) > 1;
+    #   SELECT user_id, fecha, COUNT(*) FROM reservas
+    #   WHERE estado = 'confirmada' GROUP BY user_id, fecha HAVING COUNT(*) > 1;
+    with op.batch_alter_table('reservas', schema=None) as batch_op:
+        batch_op.add_column(sa.Column(
+            'slot_activo', sa.SmallInteger(),
+            sa.Computed("CASE WHEN estado = 'confirmada' THEN 1 ELSE NULL END", persisted=True),
+            nullable=True
+        ))
+        batch_op.create_unique_constraint('uq_reservas_slot_activo', ['cancha_id', 'fecha', 'hora', 'slot_activo'])
+        batch_op.create_unique_constraint('uq_reservas_usuario_dia_activo', ['user_id', 'fecha', 'slot_activo'])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        # MySQL usa los índices únicos para las FK de cancha_id y user_id; sin otro índice no deja borrarlos
+        op.create_index('ix_reservas_cancha_id', 'reservas', ['cancha_id'], unique=False)
+        op.create_index('ix_reservas_user_id', 'reservas', ['user_id'], unique=False)
+    with op.batch_alter_table('reservas', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_reservas_usuario_dia_activo', type_='unique')
+        batch_op.drop_constraint('uq_reservas_slot_activo', type_='unique')
+        batch_op.drop_column('slot_activo')
@@ -0,0 +1,35 @@
+"""Imágenes direccionadas por contenido con conteo de referencias (antes sql/004)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 08:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Las imágenes ya subidas (canchas/<id>/webp/..., posts/..., users/...) se siguen
+    # sirviendo desde su ruta; no necesitan fila aquí.
+    op.create_table('media_objetos',
+    sa.Column('clave', sa.String(length=255), nullable=False, comment='cas/<sha[:2]>/<sha>_<lado>.webp'),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('bytes_original', sa.BigInteger(), nullable=True),
+    sa.Column('referencias', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('clave')
+    )
+    op.create_index('ix_media_objetos_sha256', 'media_objetos', ['sha256'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_media_objetos_sha256', table_name='media_objetos')
+    op.drop_table('media_objetos')
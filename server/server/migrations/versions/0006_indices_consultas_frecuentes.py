@@ -0,0 +1,56 @@
+"""Índices compuestos para las consultas frecuentes y like único por usuario
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 08:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_canchas_estado', 'canchas', ['estado'], unique=False)
+    op.create_index(
+        'ix_horarios_cancha_cancha_dia_disponible', 'horarios_cancha',
+        ['cancha_id', 'dia_semana', 'disponible'], unique=False
+    )
+    op.create_index(
+        'ix_post_comentarios_post_eliminado_created', 'post_comentarios',
+        ['post_id', 'eliminado', 'created_at'], unique=False
+    )
+
+    # Likes duplicados (dobles clics concurrentes): se conserva el más antiguo.
+    # La tabla derivada evita el error 1093 de MySQL (misma tabla en el DELETE y el subquery)
+    op.execute(
+        "DELETE FROM post_likes WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM post_likes GROUP BY post_id, usuario_id) AS conservados)"
+    )
+    op.execute(
+        "UPDATE posts SET total_likes = (SELECT COUNT(*) FROM post_likes WHERE post_likes.post_id = posts.id)"
+    )
+    with op.batch_alter_table('post_likes', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_post_likes_post_usuario', ['post_id', 'usuario_id'])
+
+    # reservas (cancha_id, fecha) y (user_id, fecha) ya las cubren los índices
+    # únicos de 0004 por prefijo; no se duplican
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        # MySQL usa estos índices para las FK de post_id y cancha_id; sin otro índice no deja borrarlos
+        op.create_index('ix_post_likes_post_id', 'post_likes', ['post_id'], unique=False)
+        op.create_index('ix_post_comentarios_post_id', 'post_comentarios', ['post_id'], unique=False)
+        op.create_index('ix_horarios_cancha_cancha_id', 'horarios_cancha', ['cancha_id'], unique=False)
+    with op.batch_alter_table('post_likes', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_post_likes_post_usuario', type_='unique')
+    op.drop_index('ix_post_comentarios_post_eliminado_created', table_name='post_comentarios')
+    op.drop_index('ix_horarios_cancha_cancha_dia_disponible', table_name='horarios_cancha')
+    op.drop_index('ix_canchas_estado', table_name='canchas')
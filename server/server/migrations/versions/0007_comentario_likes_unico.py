@@ -0,0 +1,39 @@
+"""Like único por usuario y comentario
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 08:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Likes duplicados (dobles clics concurrentes): se conserva el más antiguo.
+    # La tabla derivada evita el error 1093 de MySQL (misma tabla en el DELETE y el subquery)
+    op.execute(
+        "DELETE FROM comentario_likes WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM comentario_likes GROUP BY comentario_id, usuario_id) AS conservados)"
+    )
+    op.execute(
+        "UPDATE post_comentarios SET "
+        "total_likes = (SELECT COUNT(*) FROM comentario_likes WHERE comentario_likes.comentario_id = post_comentarios.id)"
+    )
+    with op.batch_alter_table('comentario_likes', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_comentario_likes_comentario_usuario', ['comentario_id', 'usuario_id'])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        # MySQL usa el índice único para la FK de comentario_id; sin otro índice no deja borrarlo
+        op.create_index('ix_comentario_likes_comentario_id', 'comentario_likes', ['comentario_id'], unique=False)
+    with op.batch_alter_table('comentario_likes', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_comentario_likes_comentario_usuario', type_='unique')
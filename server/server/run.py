@@ -1,6 +1,10 @@
 from app import create_app
 
-app = create_app()
+# Objeto WSGI para producción: `gunicorn run:app`. Los procesos del pool de imágenes
+# (forkserver/spawn) vuelven a importar este archivo como __mp_main__ al ejecutarlo
+# con `python run.py`, y no deben levantar otra app.
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5050)
\ No newline at end of file